@@ -0,0 +1,77 @@
+"""
+Membandingkan ukuran payload dan waktu CPU pengiriman frame:
+mode lama (JPEG -> base64 -> JSON) vs mode biner (JPEG mentah + metadata JSON).
+
+Pemakaian:
+    python bench_transport.py recordings/overhead.mp4 [jumlah_frame]
+Tanpa argumen, frame sintetis yang digunakan.
+"""
+import base64
+import json
+import sys
+import time
+
+import cv2
+import numpy as np
+
+
+def load_frames(path, limit):
+    frames = []
+    if path:
+        capture = cv2.VideoCapture(path)
+        while len(frames) < limit:
+            grabbed, frame = capture.read()
+            if not grabbed:
+                break
+            frames.append(cv2.resize(frame, (640, 480)))
+        capture.release()
+    else:
+        rng = np.random.default_rng(0)
+        base = rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)
+        base = cv2.GaussianBlur(base, (31, 31), 0)
+        for i in range(limit):
+            frames.append(np.roll(base, i * 4, axis=1))
+    return frames
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    frames = load_frames(path, limit)
+    if not frames:
+        print("❌ Tidak ada frame yang bisa dibaca.")
+        return
+
+    metadata = {
+        'connection_status': 'connected',
+        'vehicle_id': 'V0001',
+        'axle_count': 2,
+        'classification': 'Golongan 1',
+        'detection_time': '12:00:00',
+        'detected_axles': 2,
+        'system_status': 'AKTIF'
+    }
+    jpegs = [cv2.imencode('.jpg', f, [cv2.IMWRITE_JPEG_QUALITY, 75])[1].tobytes() for f in frames]
+
+    start = time.perf_counter()
+    legacy_bytes = 0
+    for jpeg in jpegs:
+        payload = dict(metadata, image_data=base64.b64encode(jpeg).decode('utf-8'))
+        legacy_bytes += len(json.dumps(payload))
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    binary_bytes = 0
+    for jpeg in jpegs:
+        binary_bytes += len(jpeg) + len(json.dumps(metadata))
+    binary_seconds = time.perf_counter() - start
+
+    n = len(jpegs)
+    print(f"Frame diuji        : {n}")
+    print(f"Base64 + JSON      : {legacy_bytes / n / 1024:.1f} KiB/frame, {legacy_seconds / n * 1e6:.0f} µs/frame")
+    print(f"Biner + metadata   : {binary_bytes / n / 1024:.1f} KiB/frame, {binary_seconds / n * 1e6:.0f} µs/frame")
+    print(f"Penghematan payload: {(1 - binary_bytes / legacy_bytes) * 100:.1f}%")
+
+
+if __name__ == '__main__':
+    main()
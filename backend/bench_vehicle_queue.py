@@ -0,0 +1,98 @@
+"""
+Benchmark antrean kendaraan: cara lama (sort seluruh dict tiap frame frontal,
+scan penuh saat cleanup, VehicleData dengan __dict__) vs VehicleIndex
+(FIFO + heap expiry, VehicleData dengan __slots__).
+
+Pemakaian:
+    python bench_vehicle_queue.py [jumlah_kendaraan ...]
+"""
+import sys
+import time
+import tracemalloc
+
+from vehicle_index import VehicleIndex
+
+FIELDS = ('vehicle_id', 'axle_count', 'tire_config', 'classification', 'created_time', 'detection_time',
+          'is_classified', 'last_seen_frontal', 'status', 'config_locked', 'has_entered_transaction_zone',
+          'transaction_start_time', 'max_transaction_time', 'timeout_extended', 'processing_attempts',
+          'bus_detection_count', 'truck_detection_count')
+
+
+class DictVehicle:
+    def __init__(self, vehicle_id, created_time, status):
+        for field in FIELDS:
+            setattr(self, field, None)
+        self.vehicle_id, self.created_time, self.status, self.axle_count = vehicle_id, created_time, status, 2
+
+
+class SlotVehicle:
+    __slots__ = FIELDS
+
+    def __init__(self, vehicle_id, created_time, status):
+        for field in FIELDS:
+            setattr(self, field, None)
+        self.vehicle_id, self.created_time, self.status, self.axle_count = vehicle_id, created_time, status, 2
+
+
+def build(vehicle_class, count):
+    # Separuh selesai (menunggu dibuang), separuh menunggu di antrean.
+    vehicles, index = {}, VehicleIndex()
+    for i in range(1, count + 1):
+        vehicle_id = f"V{i:04d}"
+        status = "completed" if i <= count // 2 else "counted_and_waiting"
+        vehicle = vehicle_class(vehicle_id, float(i), status)
+        vehicles[vehicle_id] = vehicle
+        if status == "completed":
+            index.schedule_expiry(vehicle.created_time + 60, vehicle, 'completed')
+        else:
+            index.enqueue_waiting(vehicle_id)
+    return vehicles, index
+
+
+def legacy_next(vehicles):
+    for vehicle_id, vehicle in sorted(vehicles.items(), key=lambda item: int(item[0].replace('V', ''))):
+        if vehicle.status == "counted_and_waiting":
+            return vehicle_id
+    return None
+
+
+def legacy_cleanup_scan(vehicles, now):
+    return [vid for vid, v in vehicles.items()
+            if (v.status == "completed" and now - v.created_time > 60) or
+               (v.status == "detected" and v.axle_count == 0 and now - v.created_time > 20)]
+
+
+def per_call(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def memory_of(vehicle_class, count):
+    tracemalloc.start()
+    vehicles, _ = build(vehicle_class, count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del vehicles
+    return current / count
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000, 20000]
+    print(f"{'kendaraan':>10} | {'next lama':>12} | {'next indeks':>12} | {'cleanup lama':>13} | "
+          f"{'cleanup indeks':>14} | {'byte/kend. dict':>15} | {'byte/kend. slots':>16}")
+    for count in counts:
+        vehicles, index = build(SlotVehicle, count)
+        repeat = max(5, 20000 // count)
+        now = 50.0  # belum ada yang kedaluwarsa: biaya murni pemeriksaan per frame
+        old_next = per_call(lambda: legacy_next(vehicles), repeat)
+        new_next = per_call(index.first_waiting, repeat * 100)
+        old_cleanup = per_call(lambda: legacy_cleanup_scan(vehicles, now), repeat)
+        new_cleanup = per_call(lambda: index.pop_due(now), repeat * 100)
+        print(f"{count:>10} | {old_next:>10.1f}µs | {new_next:>10.2f}µs | {old_cleanup:>11.1f}µs | "
+              f"{new_cleanup:>12.2f}µs | {memory_of(DictVehicle, count):>15.0f} | {memory_of(SlotVehicle, count):>16.0f}")
+
+
+if __name__ == '__main__':
+    main()
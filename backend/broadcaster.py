@@ -0,0 +1,245 @@
+import base64
+import json
+import threading
+import time
+from collections import namedtuple
+from threading import Lock
+
+from logs import get_logger
+
+log = get_logger()
+
+# Frame ter-encode terakhir satu kamera, dipakai bersama oleh Socket.IO, MJPEG dan snapshot.
+EncodedFrame = namedtuple('EncodedFrame', ['version', 'jpeg', 'payload', 'metadata', 'timestamp', 'etag'])
+
+
+class _Subscription:
+    __slots__ = ('min_interval', 'use_ack', 'last_sent', 'sent_version', 'in_flight_since')
+
+    def __init__(self, max_fps, use_ack):
+        self.min_interval = 1.0 / max_fps
+        self.use_ack = use_ack
+        self.last_sent = 0.0
+        self.sent_version = 0
+        self.in_flight_since = None
+
+
+class FrameBroadcaster:
+    """
+    Memisahkan loop inferensi dari penonton dashboard. Loop kamera hanya
+    memanggil publish() (JPEG di-encode sekali per frame, tidak per client);
+    thread pengirim mengirim frame terbaru ke setiap client sesuai jadwalnya
+    sendiri (max_fps per client).
+
+    Client yang lambat tidak mengantre frame lama: selama frame sebelumnya belum
+    di-ack, client itu dilewati dan nantinya langsung menerima frame terbaru.
+    Client lama yang tidak mengirim ack tetap dilayani, hanya dibatasi max_fps.
+
+    Penonton HTTP (MJPEG/snapshot) membaca cache frame yang sama lewat
+    latest_frame()/wait_for_frame(), sehingga tidak menambah encode.
+    """
+    def __init__(self, socketio, cameras, transport='binary', default_max_fps=15, max_fps_limit=30,
+                 ack_timeout=2.0, snapshot_hold=5.0, metrics=None):
+        self.socketio = socketio
+        self.cameras = tuple(cameras)
+        self.transport = transport
+        self.default_max_fps = default_max_fps
+        self.max_fps_limit = max_fps_limit
+        self.ack_timeout = ack_timeout
+        self.snapshot_hold = snapshot_hold
+        self.metrics = metrics
+        self.boot_id = format(int(time.time()), 'x')
+
+        self.condition = threading.Condition(Lock())
+        self.latest = {camera: None for camera in self.cameras}  # camera -> EncodedFrame
+        self.versions = {camera: 0 for camera in self.cameras}
+        self.clients = {}  # sid -> {camera: _Subscription}
+        self.namespaces = {}  # sid -> namespace Socket.IO client (satu broadcaster per lajur)
+        self.http_streams = {camera: 0 for camera in self.cameras}
+        self.last_snapshot = {camera: 0.0 for camera in self.cameras}
+        self.pending_wake = False
+        self.stopped = threading.Event()
+        self.started = False
+
+        if metrics:
+            for camera in self.cameras:
+                metrics.register_gauge(f'{camera}.viewers', lambda camera=camera: self.viewer_count(camera))
+                metrics.register_gauge(f'{camera}.http_viewers', lambda camera=camera: self.http_streams[camera])
+
+    def start(self):
+        if not self.started:
+            self.started = True
+            self.socketio.start_background_task(target=self._run)
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        with self.condition:
+            self._wake()
+
+    def _wake(self):
+        # Dipanggil dengan condition terkunci. Flag menjaga agar sinyal yang datang
+        # saat thread pengirim sedang mengirim (di luar lock) tidak hilang.
+        self.pending_wake = True
+        self.condition.notify_all()
+
+    # --- Sisi client (dipanggil dari handler Socket.IO) ---
+
+    def subscribe(self, sid, cameras=None, max_fps=None, use_ack=False, namespace='/'):
+        max_fps = min(float(max_fps or self.default_max_fps), self.max_fps_limit)
+        if max_fps <= 0:
+            max_fps = self.default_max_fps
+        cameras = [c for c in (cameras or self.cameras) if c in self.latest]
+        with self.condition:
+            subscriptions = self.clients.setdefault(sid, {})
+            self.namespaces[sid] = namespace
+            for camera in cameras:
+                subscriptions[camera] = _Subscription(max_fps, use_ack)
+            # Client baru langsung menerima frame terakhir yang ada.
+            self._wake()
+        return cameras
+
+    def unsubscribe(self, sid, cameras=None):
+        with self.condition:
+            subscriptions = self.clients.get(sid)
+            if subscriptions is None:
+                return
+            for camera in (cameras or self.cameras):
+                subscriptions.pop(camera, None)
+
+    def remove_client(self, sid):
+        with self.condition:
+            self.clients.pop(sid, None)
+            self.namespaces.pop(sid, None)
+
+    def viewer_count(self, camera):
+        with self.condition:
+            return sum(1 for subscriptions in self.clients.values() if camera in subscriptions)
+
+    def has_viewers(self, camera):
+        if self.http_streams[camera] or time.monotonic() - self.last_snapshot[camera] < self.snapshot_hold:
+            return True
+        return self.viewer_count(camera) > 0
+
+    # --- Sisi HTTP (MJPEG/snapshot) ---
+
+    def open_http_stream(self, camera):
+        with self.condition:
+            self.http_streams[camera] += 1
+
+    def close_http_stream(self, camera):
+        with self.condition:
+            self.http_streams[camera] -= 1
+
+    def note_snapshot(self, camera):
+        # Snapshot yang dipoll berkala dihitung sebagai penonton selama snapshot_hold detik.
+        self.last_snapshot[camera] = time.monotonic()
+
+    def latest_frame(self, camera):
+        return self.latest[camera]
+
+    def wait_for_frame(self, camera, after_version=0, timeout=None):
+        """Tunggu frame dengan versi lebih baru dari after_version; None bila timeout."""
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.stopped.is_set() or (self.latest[camera] is not None and
+                                                  self.latest[camera].version > after_version),
+                timeout=timeout)
+            frame = self.latest[camera]
+        return frame if frame is not None and frame.version > after_version else None
+
+    # --- Sisi loop kamera ---
+
+    def publish(self, camera, jpeg_bytes, metadata):
+        """Simpan frame terbaru kamera; tidak pernah menunggu client."""
+        if self.transport == 'binary':
+            payload = jpeg_bytes
+            payload_bytes = len(jpeg_bytes)
+        else:
+            metadata = dict(metadata, image_data=base64.b64encode(jpeg_bytes).decode('utf-8'))
+            payload = None
+            payload_bytes = len(json.dumps(metadata))
+        if self.metrics:
+            self.metrics.observe(f'{camera}.payload_bytes', payload_bytes)
+
+        with self.condition:
+            self.versions[camera] += 1
+            version = self.versions[camera]
+            self.latest[camera] = EncodedFrame(version, jpeg_bytes, payload, metadata, time.time(),
+                                               f'{camera}-{self.boot_id}-{version}')
+            self._wake()
+
+    # --- Thread pengirim ---
+
+    def _ack(self, sid, camera, *args):
+        with self.condition:
+            subscription = self.clients.get(sid, {}).get(camera)
+            if subscription is not None:
+                subscription.in_flight_since = None
+            self._wake()
+
+    def _collect_due(self, now):
+        """Kumpulkan pengiriman yang jatuh tempo dan waktu tunggu hingga pengiriman berikutnya."""
+        due = []
+        next_wake = None
+        for sid, subscriptions in self.clients.items():
+            for camera, subscription in subscriptions.items():
+                latest = self.latest[camera]
+                if latest is None or latest.version == subscription.sent_version:
+                    continue
+                if subscription.in_flight_since is not None:
+                    if now - subscription.in_flight_since < self.ack_timeout:
+                        continue
+                    # Ack hilang (client lambat atau terputus): anggap selesai.
+                    subscription.in_flight_since = None
+                    self._count(f'{camera}.ack_timeouts')
+
+                ready_at = subscription.last_sent + subscription.min_interval
+                if ready_at > now:
+                    wait = ready_at - now
+                    next_wake = wait if next_wake is None else min(next_wake, wait)
+                    continue
+
+                skipped = latest.version - subscription.sent_version - 1
+                if subscription.sent_version and skipped > 0:
+                    self._count(f'{camera}.frames_skipped_for_viewers', skipped)
+                subscription.sent_version = latest.version
+                subscription.last_sent = now
+                if subscription.use_ack:
+                    subscription.in_flight_since = now
+                due.append((sid, self.namespaces.get(sid, '/'), camera, subscription.use_ack, latest))
+
+        if next_wake is None and any(s.in_flight_since is not None
+                                     for subs in self.clients.values() for s in subs.values()):
+            next_wake = self.ack_timeout
+        return due, next_wake
+
+    def _send(self, sid, namespace, camera, use_ack, latest):
+        payload, metadata = latest.payload, latest.metadata
+        callback = (lambda *args: self._ack(sid, camera, *args)) if use_ack else None
+        try:
+            if payload is not None:
+                self.socketio.emit(f'{camera}_stream', metadata, to=sid, namespace=namespace)
+                self.socketio.emit(f'{camera}_frame', payload, to=sid, namespace=namespace, callback=callback)
+            else:
+                self.socketio.emit(f'{camera}_stream', metadata, to=sid, namespace=namespace, callback=callback)
+        except Exception as e:
+            log.warning("⚠️ Gagal mengirim frame ke client", camera=camera, sid=sid, error=e)
+            self.remove_client(sid)
+            return
+        self._count(f'{camera}.frames_delivered')
+
+    def _count(self, name, amount=1):
+        if self.metrics:
+            self.metrics.increment(name, amount)
+
+    def _run(self):
+        next_wake = None
+        while not self.stopped.is_set():
+            with self.condition:
+                if not self.pending_wake:
+                    self.condition.wait(timeout=next_wake)
+                self.pending_wake = False
+                due, next_wake = self._collect_due(time.monotonic())
+            for delivery in due:
+                self._send(*delivery)
@@ -0,0 +1,152 @@
+"""
+Capture kamera di proses terpisah: decode RTSP dan resize ke 640x480 berjalan
+di run_capture(), hasilnya ditulis ke SharedRing. Lajur membacanya lewat
+CaptureProcess, yang punya antarmuka sama dengan OptimizedVideoStream.
+
+Crash di decoder FFmpeg/OpenCV hanya mematikan proses capture itu; lajur
+melihat stream stale (placeholder) dan CaptureProcess menyalakannya lagi.
+"""
+import multiprocessing as mp
+import os
+import time
+import uuid
+from collections import deque
+
+import numpy as np
+
+from clock import SystemClock
+from logs import get_logger, logging_settings, setup_logging
+from shm_ring import SharedRing
+from video_stream import FramePacket
+
+log = get_logger()
+
+FRAME_SHAPE = (480, 640, 3)
+FRAME_BYTES = FRAME_SHAPE[0] * FRAME_SHAPE[1] * FRAME_SHAPE[2]
+META_BYTES = 64
+POLL_INTERVAL = 0.002
+FROZEN_META = b'frozen'
+
+
+def run_capture(ring_name, ring_slots, src, name, stale_after, parent_pid, log_settings=None):
+    """Entry point proses capture (spawn)."""
+    os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = 'rtsp_transport;tcp'
+    setup_logging(log_settings)
+    import cv2
+    from video_stream import OptimizedVideoStream
+
+    ring = SharedRing.attach(ring_name, ring_slots, FRAME_BYTES + META_BYTES)
+    vs = OptimizedVideoStream(src=src, name=name, stale_after=stale_after).start()
+    small_frame = np.empty(FRAME_SHAPE, dtype=np.uint8)
+    last_seq = -1
+    # Berhenti sendiri bila proses lajur hilang tanpa sempat mematikan proses ini.
+    while os.getppid() == parent_pid:
+        packet = vs.read_next(last_seq, timeout=1.0)
+        if packet is None:
+            continue
+        last_seq = packet.seq
+        try:
+            cv2.resize(packet.image, (FRAME_SHAPE[1], FRAME_SHAPE[0]), dst=small_frame, interpolation=cv2.INTER_LINEAR)
+        except cv2.error:
+            continue
+        finally:
+            vs.release(packet.image)
+        ring.write(small_frame, FROZEN_META if vs.frozen else b'', packet.timestamp)
+    vs.stop()
+    ring.close()
+
+
+class CaptureProcess:
+    """
+    Pengganti OptimizedVideoStream untuk lajur: frame dibaca dari SharedRing
+    yang diisi proses capture. Proses yang mati dicatat sebagai
+    {kamera}.capture_restarts dan dinyalakan ulang setelah restart_delay detik.
+    """
+    def __init__(self, src, name, clock=None, metrics=None, ring_slots=4, stale_after=3.0, restart_delay=2.0):
+        self.src = src
+        self.name = name
+        self.clock = clock or SystemClock()
+        self.metrics = metrics
+        self.ring_slots = ring_slots
+        self.stale_after = stale_after
+        self.restart_delay = restart_delay
+        self.ring = SharedRing.create(f'avc_{os.getpid()}_{uuid.uuid4().hex[:8]}', ring_slots, FRAME_BYTES + META_BYTES)
+        self.context = mp.get_context('spawn')
+        self.process = None
+        self.died_at = None
+        self.frame_time = None
+        self.frozen = False
+        self.free = deque()
+        self.stopped = False
+        self.finished = False
+
+    def start(self):
+        self._spawn()
+        return self
+
+    def _spawn(self):
+        self.process = self.context.Process(
+            target=run_capture,
+            args=(self.ring.name, self.ring_slots, self.src, self.name, self.stale_after, os.getpid(),
+                  logging_settings()),
+            name=f'capture-{self.name}', daemon=True)
+        self.process.start()
+        self.died_at = None
+
+    def _supervise(self):
+        if self.stopped or self.process.is_alive():
+            return
+        now = time.monotonic()
+        if self.died_at is None:
+            self.died_at = now
+            log.error("❌ Proses capture berhenti, akan dinyalakan ulang", rate_limit=False, camera=self.name,
+                      exitcode=self.process.exitcode, restart_in=self.restart_delay)
+            if self.metrics:
+                self.metrics.increment(f'{self.name}.capture_restarts')
+        elif now - self.died_at >= self.restart_delay:
+            self._spawn()
+
+    def read_next(self, last_seq=-1, timeout=1.0):
+        """Tunggu frame dengan seq > last_seq; None bila timeout atau stream berhenti."""
+        deadline = time.perf_counter() + timeout
+        while not self.stopped:
+            seq = self.ring.latest_seq()
+            # seq 0: proses capture belum menulis frame apa pun.
+            if seq > max(last_seq, 0):
+                image = self.free.popleft() if self.free else np.empty(FRAME_SHAPE, dtype=np.uint8)
+                # Decode RTSP terjadi di proses capture; di sisi lajur tahap "decode" adalah salinan dari ring.
+                copy_start = time.perf_counter()
+                slot = self.ring.read(seq, out=image)
+                if slot is None:
+                    # Slot ditimpa saat disalin: ambil ulang yang terbaru.
+                    self.free.append(image)
+                    continue
+                if self.metrics:
+                    self.metrics.observe_stage(self.name, 'decode', time.perf_counter() - copy_start)
+                    self.metrics.increment(f'{self.name}.frames_read')
+                    if last_seq >= 0 and seq > last_seq + 1:
+                        self.metrics.increment(f'{self.name}.frames_dropped', seq - last_seq - 1)
+                self.frame_time = slot.timestamp
+                self.frozen = slot.meta == FROZEN_META
+                return FramePacket(image, seq, slot.timestamp)
+            if time.perf_counter() >= deadline:
+                self._supervise()
+                return None
+            time.sleep(POLL_INTERVAL)
+        return None
+
+    def release(self, image):
+        if image is not None and len(self.free) < self.ring_slots:
+            self.free.append(image)
+
+    def is_stale(self):
+        if self.frame_time is None or not self.process.is_alive():
+            return True
+        return self.clock.time() - self.frame_time > self.stale_after
+
+    def stop(self):
+        self.stopped = True
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=2.0)
+        self.ring.close()
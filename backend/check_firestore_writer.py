@@ -0,0 +1,162 @@
+"""
+Pemeriksaan FirestoreWriteBehind tanpa jaringan: client Firestore palsu (batch(),
+collection().document()) yang bisa dibuat gagal commit atau gagal terhubung.
+
+Skenario:
+- commit gagal -> record masuk spool; setelah pulih spool diputar ulang dan
+  setiap doc_id tersimpan tepat sekali
+- connect() gagal saat start -> record di-spool, connect dicoba ulang dengan
+  backoff, lalu spool diputar ulang
+- antrean penuh -> record langsung di-spool dan tetap terkirim setelah writer jalan
+
+Pemakaian:
+    python check_firestore_writer.py
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from firestore_writer import FirestoreWriteBehind
+from logs import LOGGER_NAME
+
+
+class FakeBatch:
+    def __init__(self, client):
+        self.client = client
+        self.writes = []
+
+    def set(self, doc_ref, fields):
+        self.writes.append((doc_ref, fields))
+
+    def commit(self):
+        if self.client.fail_commits:
+            raise ConnectionError("Firestore palsu sedang tidak dapat dijangkau")
+        for doc_ref, fields in self.writes:
+            self.client.documents[doc_ref] = fields
+            self.client.writes[doc_ref] += 1
+
+
+class FakeCollection:
+    def __init__(self, name):
+        self.name = name
+
+    def document(self, doc_id):
+        return (self.name, doc_id)
+
+
+class FakeFirestore:
+    """Cukup untuk FirestoreWriteBehind: batch() dan collection(name).document(id)."""
+    def __init__(self, fail_commits=False):
+        self.fail_commits = fail_commits
+        self.documents = {}
+        self.writes = Counter()
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def collection(self, name):
+        return FakeCollection(name)
+
+    def stored_ids(self):
+        return {doc_id for _, doc_id in self.documents}
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def spool_lines(writer):
+    lines = 0
+    for path in (writer.spool_path, writer.replay_path):
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                lines += sum(1 for line in f if line.strip())
+    return lines
+
+
+def make_writer(directory, **kwargs):
+    return FirestoreWriteBehind(spool_path=os.path.join(directory, 'spool.jsonl'), flush_interval=0.05,
+                                max_backoff=0.2, **kwargs)
+
+
+def submit_records(writer, count):
+    exit_time = datetime.now(timezone.utc)
+    return [writer.submit({'vehicle_id': f'V{i + 1:04d}', 'exit_time': exit_time}) for i in range(count)]
+
+
+def delivered_once(client, doc_ids):
+    return client.stored_ids() == set(doc_ids) and all(client.writes[('transactions', d)] == 1 for d in doc_ids)
+
+
+def check_failed_commit_spools_and_replays(directory):
+    client = FakeFirestore(fail_commits=True)
+    writer = make_writer(directory, db=client).start()
+    doc_ids = submit_records(writer, 5)
+    spooled = wait_until(lambda: spool_lines(writer) == 5)
+    client.fail_commits = False
+    replayed = wait_until(lambda: delivered_once(client, doc_ids) and not writer._has_spool())
+    writer.stop()
+    return spooled and replayed and isinstance(client.documents[('transactions', doc_ids[0])]['exit_time'], datetime)
+
+
+def check_reconnect_replays_spool(directory):
+    client = FakeFirestore()
+    attempts = []
+
+    def connect():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise ConnectionError("Firestore palsu belum dapat dijangkau")
+        return client
+
+    writer = make_writer(directory, connect=connect).start()
+    doc_ids = submit_records(writer, 4)
+    delivered = wait_until(lambda: delivered_once(client, doc_ids) and not writer._has_spool())
+    writer.stop()
+    return delivered and len(attempts) == 3
+
+
+def check_full_queue_spools(directory):
+    client = FakeFirestore()
+    # Writer belum dijalankan: antrean tidak dikosongkan, sehingga record ketiga dst. langsung di-spool.
+    writer = make_writer(directory, db=client, max_queue=2)
+    doc_ids = submit_records(writer, 6)
+    spooled = spool_lines(writer) == 4 and writer.pending() == 2
+    writer.start()
+    delivered = wait_until(lambda: delivered_once(client, doc_ids) and not writer._has_spool())
+    writer.stop()
+    return spooled and delivered
+
+
+CHECKS = (
+    ("Commit gagal -> spool -> replay tanpa doc_id ganda", check_failed_commit_spools_and_replays),
+    ("connect() gagal saat start -> dicoba ulang -> spool diputar ulang", check_reconnect_replays_spool),
+    ("Antrean penuh -> spool -> terkirim setelah writer jalan", check_full_queue_spools),
+)
+
+
+def main():
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.disabled = True
+    failures = 0
+    for name, check in CHECKS:
+        with tempfile.TemporaryDirectory() as directory:
+            ok = check(directory)
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {name}")
+    logger.disabled = False
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import time
+import threading
+
+from logs import get_logger
+
+log = get_logger()
+
+
+class SystemClock:
+    """Jam dinding biasa, dipakai saat membaca stream RTSP langsung."""
+    is_max_speed = False
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class ReplayClock:
+    """
+    Jam untuk mode replay. Semua state machine (body_timeout, vehicle_timeout,
+    learning window, max_transaction_time, zone_clear_delay) membaca waktu dari
+    sini sehingga perilakunya sama pada kecepatan berapa pun.
+
+    - speed=float : waktu media berjalan `speed` kali waktu dinding.
+    - speed=None  : kecepatan maksimum; waktu = posisi media sumber paling lambat,
+                    dan sumber yang lebih cepat menunggu agar kamera tetap sinkron.
+    """
+    def __init__(self, speed=1.0, origin=None):
+        self.speed = speed
+        self.origin = time.time() if origin is None else origin
+        self.wall_start = None
+        self.positions = {}
+        self.media_high_water = 0.0
+        self.condition = threading.Condition()
+
+    @property
+    def is_max_speed(self):
+        return self.speed is None
+
+    def start(self):
+        # Waktu media baru mulai berjalan saat sumber replay pertama dimulai.
+        with self.condition:
+            if self.wall_start is None:
+                self.wall_start = time.perf_counter()
+
+    def time(self):
+        if not self.is_max_speed:
+            if self.wall_start is None:
+                return self.origin
+            return self.origin + (time.perf_counter() - self.wall_start) * self.speed
+        with self.condition:
+            return self.origin + self._media_position()
+
+    def sleep(self, seconds):
+        if seconds <= 0:
+            return
+        if self.is_max_speed:
+            # Tidak ada waktu dinding yang perlu ditunggu; cukup beri kesempatan thread lain.
+            time.sleep(0)
+            return
+        time.sleep(seconds / self.speed)
+
+    def _media_position(self):
+        # Dijaga monotonik walaupun sumber baru mendaftar atau sumber selesai.
+        if self.positions:
+            self.media_high_water = max(self.media_high_water, min(self.positions.values()))
+        return self.media_high_water
+
+    def register(self, source_name):
+        with self.condition:
+            self.positions[source_name] = 0.0
+            self.condition.notify_all()
+
+    def unregister(self, source_name):
+        with self.condition:
+            self._media_position()
+            self.positions.pop(source_name, None)
+            self.condition.notify_all()
+
+    def wait_for_turn(self, source_name, media_time, max_lead, stop_event=None):
+        """
+        Hanya untuk kecepatan maksimum: tahan sumber yang sudah mendahului
+        sumber lain lebih dari `max_lead` detik waktu media.
+        """
+        with self.condition:
+            while True:
+                others = [pos for name, pos in self.positions.items() if name != source_name]
+                if not others or media_time <= min(others) + max_lead:
+                    return True
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                self.condition.wait(timeout=0.1)
+
+    def advance(self, source_name, media_time):
+        with self.condition:
+            if source_name in self.positions:
+                self.positions[source_name] = max(self.positions[source_name], media_time)
+                self.condition.notify_all()
+
+
+def create_clock(replay_config):
+    """SystemClock untuk kamera live, atau ReplayClock bila replay.enabled."""
+    if not replay_config.get('enabled', False):
+        return SystemClock()
+    replay_speed = replay_config.get('speed', 1.0)
+    log.info("🎞️ Mode replay aktif", rate_limit=False, speed=replay_speed)
+    return ReplayClock(speed=None if replay_speed == 'max' else float(replay_speed))
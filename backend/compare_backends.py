@@ -0,0 +1,183 @@
+"""
+Laporan perbandingan backend inferensi terhadap model PyTorch: latensi per frame
+dan kesesuaian deteksi (box dengan kelas sama dan IoU >= ambang dianggap cocok),
+diukur pada frame rekaman dengan ROI dan imgsz yang sama seperti server.
+Juga memeriksa bahwa model backend menerima batch N frame dalam satu panggilan
+predict (seperti InferenceService) dengan hasil yang sama dengan per frame.
+
+Pemakaian:
+    python compare_backends.py --backend onnxruntime --camera overhead
+    python compare_backends.py --backend openvino --int8 --frames 500 --report laporan.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from detections import Detections
+from inference import InferenceROI, run_detector
+from model_backends import load_detector, read_calibration_frames
+
+CAMERAS = ('overhead', 'frontal')
+
+
+def box_iou(a, b):
+    """IoU matriks antara box a (Nx4) dan b (Mx4)."""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return intersection / (area_a[:, None] + area_b[None, :] - intersection + 1e-9)
+
+
+def count_matches(reference, candidate, iou_threshold):
+    """Pencocokan greedy per kelas, dari IoU tertinggi."""
+    matched = 0
+    for class_id in np.union1d(reference.cls, candidate.cls):
+        ref_boxes = reference.xyxy[reference.cls == class_id]
+        cand_boxes = candidate.xyxy[candidate.cls == class_id]
+        if len(ref_boxes) == 0 or len(cand_boxes) == 0:
+            continue
+        iou = box_iou(ref_boxes, cand_boxes)
+        while iou.size and iou.max() >= iou_threshold:
+            r, c = np.unravel_index(np.argmax(iou), iou.shape)
+            matched += 1
+            iou[r, :] = -1
+            iou[:, c] = -1
+    return matched
+
+
+def timed_detections(model, frame, roi):
+    start = time.perf_counter()
+    results = run_detector(model, frame, roi)
+    elapsed = time.perf_counter() - start
+    return Detections.from_results(results), elapsed
+
+
+def check_batch(model, frames, roi, batch_size, conf=0.5):
+    """
+    Satu panggilan predict berisi batch_size gambar, dibandingkan dengan panggilan
+    per gambar. Model yang diekspor dengan batch statis gagal di sini.
+    """
+    if roi is not None:
+        images = [frame[roi.y1:roi.y2, roi.x1:roi.x2] for frame in frames[:batch_size]]
+        kwargs = {'verbose': False, 'conf': conf, 'imgsz': roi.imgsz}
+    else:
+        images = list(frames[:batch_size])
+        kwargs = {'verbose': False, 'conf': conf}
+    try:
+        start = time.perf_counter()
+        batched = model.predict(images, **kwargs)
+        elapsed = time.perf_counter() - start
+    except Exception as e:
+        return {'batch_size': len(images), 'ok': False, 'error': str(e)}
+    if len(batched) != len(images):
+        return {'batch_size': len(images), 'ok': False, 'error': f"{len(batched)} hasil untuk {len(images)} gambar"}
+
+    same_counts = 0
+    for image, result in zip(images, batched):
+        single = Detections.from_results(model.predict(image, **kwargs))
+        if np.array_equal(np.bincount(single.cls, minlength=8),
+                          np.bincount(Detections.from_results([result]).cls, minlength=8)):
+            same_counts += 1
+    return {'batch_size': len(images), 'ok': True, 'error': None,
+            'images_with_identical_class_counts': same_counts / len(images),
+            'batch_ms': elapsed * 1000}
+
+
+def latency_summary(samples):
+    samples = np.asarray(samples) * 1000
+    return {'p50_ms': float(np.percentile(samples, 50)), 'p95_ms': float(np.percentile(samples, 95)),
+            'mean_ms': float(samples.mean()), 'fps': float(1000 / samples.mean())}
+
+
+def compare_camera(camera_name, config, backend, int8, frame_count, iou_threshold, batch_size, warmup=10):
+    import torch
+
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    pt_path = config['model_paths'][camera_name]
+    roi = InferenceROI.from_config(config.get('inference_roi', {}).get(camera_name))
+    frames = read_calibration_frames(config['replay'][camera_name], frame_count)
+    if not frames:
+        raise FileNotFoundError(f"Tidak ada frame rekaman untuk {camera_name}")
+
+    reference_model = load_detector(pt_path, 'torch', device)
+    candidate_model = load_detector(pt_path, backend, device, int8=int8)
+    for frame in frames[:warmup]:
+        run_detector(reference_model, frame, roi)
+        run_detector(candidate_model, frame, roi)
+
+    reference_latency, candidate_latency = [], []
+    reference_total = candidate_total = matched = frames_same_counts = 0
+    for frame in frames:
+        reference, ref_seconds = timed_detections(reference_model, frame, roi)
+        candidate, cand_seconds = timed_detections(candidate_model, frame, roi)
+        reference_latency.append(ref_seconds)
+        candidate_latency.append(cand_seconds)
+        reference_total += len(reference)
+        candidate_total += len(candidate)
+        matched += count_matches(reference, candidate, iou_threshold)
+        # Jumlah per kelas (mis. gandar) yang sama adalah yang menentukan golongan.
+        if np.array_equal(np.bincount(reference.cls, minlength=8), np.bincount(candidate.cls, minlength=8)):
+            frames_same_counts += 1
+
+    return {
+        'camera': camera_name,
+        'backend': backend + (' (INT8)' if int8 else ''),
+        'frames': len(frames),
+        'torch_device': device,
+        'latency_torch': latency_summary(reference_latency),
+        'latency_backend': latency_summary(candidate_latency),
+        'recall_vs_torch': matched / reference_total if reference_total else 1.0,
+        'precision_vs_torch': matched / candidate_total if candidate_total else 1.0,
+        'frames_with_identical_class_counts': frames_same_counts / len(frames),
+        'batch_check': check_batch(candidate_model, frames, roi, batch_size),
+    }
+
+
+def print_report(report):
+    torch_latency, backend_latency = report['latency_torch'], report['latency_backend']
+    print(f"\n=== {report['camera']} : torch ({report['torch_device']}) vs {report['backend']} — {report['frames']} frame ===")
+    print(f"Latensi torch   : p50 {torch_latency['p50_ms']:.1f} ms, p95 {torch_latency['p95_ms']:.1f} ms ({torch_latency['fps']:.1f} fps)")
+    print(f"Latensi backend : p50 {backend_latency['p50_ms']:.1f} ms, p95 {backend_latency['p95_ms']:.1f} ms ({backend_latency['fps']:.1f} fps)")
+    print(f"Recall / presisi terhadap torch : {report['recall_vs_torch'] * 100:.1f}% / {report['precision_vs_torch'] * 100:.1f}%")
+    print(f"Frame dengan jumlah per kelas identik : {report['frames_with_identical_class_counts'] * 100:.1f}%")
+    batch = report['batch_check']
+    if batch['error']:
+        print(f"❌ Batch {batch['batch_size']} gagal: {batch['error']} (ekspor ulang dengan export_models.py)")
+    else:
+        print(f"✅ Batch {batch['batch_size']} dalam satu panggilan: {batch['batch_ms']:.1f} ms, "
+              f"jumlah per kelas identik dengan per frame {batch['images_with_identical_class_counts'] * 100:.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandingkan backend inferensi dengan model PyTorch.")
+    parser.add_argument('--backend', choices=('onnxruntime', 'openvino'), required=True)
+    parser.add_argument('--int8', action='store_true')
+    parser.add_argument('--camera', choices=CAMERAS, action='append')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--iou', type=float, default=0.5)
+    parser.add_argument('--batch', type=int, help="Ukuran batch yang diuji (default: inference_service.max_batch).")
+    parser.add_argument('--report', help="Simpan laporan sebagai JSON.")
+    parser.add_argument('--config', default='config.json')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    batch_size = args.batch or config.get('inference_service', {}).get('max_batch', 8)
+    reports = [compare_camera(camera_name, config, args.backend, args.int8, args.frames, args.iou, batch_size)
+               for camera_name in args.camera or CAMERAS]
+    for report in reports:
+        print_report(report)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n💾 Laporan disimpan ke '{args.report}'")
+    if not all(report['batch_check']['ok'] for report in reports):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
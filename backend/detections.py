@@ -0,0 +1,60 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+
+class Detections:
+    """
+    Hasil deteksi dalam bentuk array ringkas (numpy, di CPU): xyxy Nx4, conf N, cls N.
+    Diambil dari results[0].boxes dengan satu kali transfer device->host.
+    """
+    __slots__ = ('xyxy', 'conf', 'cls')
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64))
+
+    @classmethod
+    def from_results(cls, results):
+        if not results or results[0].boxes is None or len(results[0].boxes) == 0:
+            return cls.empty()
+        # Kolom data: x1, y1, x2, y2, [track_id], conf, cls
+        data = results[0].boxes.data.cpu().numpy()
+        return cls(data[:, :4].astype(np.float32), data[:, -2].astype(np.float32), data[:, -1].astype(np.int64))
+
+    def __len__(self):
+        return len(self.cls)
+
+    def select(self, mask):
+        return Detections(self.xyxy[mask], self.conf[mask], self.cls[mask])
+
+    def of_classes(self, class_ids):
+        return self.select(np.isin(self.cls, class_ids))
+
+    @property
+    def centers(self):
+        return np.column_stack(((self.xyxy[:, 0] + self.xyxy[:, 2]) / 2, (self.xyxy[:, 1] + self.xyxy[:, 3]) / 2))
+
+
+def match_by_distance(track_points, detection_points, max_distance):
+    """
+    Asosiasi optimal (Hungarian) antara titik track (Mx2) dan titik deteksi (Nx2)
+    berdasarkan matriks jarak. Satu track hanya bisa dipasangkan ke satu deteksi.
+    Mengembalikan (pasangan [(track_idx, det_idx)], indeks deteksi tanpa pasangan).
+    """
+    n_detections = len(detection_points)
+    if len(track_points) == 0 or n_detections == 0:
+        return [], list(range(n_detections))
+
+    distances = np.linalg.norm(track_points[:, None, :] - detection_points[None, :, :], axis=2)
+    cost = np.where(distances < max_distance, distances, max_distance * 1000)
+    track_idx, det_idx = linear_sum_assignment(cost)
+
+    matches = [(t, d) for t, d in zip(track_idx, det_idx) if distances[t, d] < max_distance]
+    matched_detections = {d for _, d in matches}
+    unmatched = [d for d in range(n_detections) if d not in matched_detections]
+    return matches, unmatched
@@ -0,0 +1,95 @@
+import heapq
+import itertools
+import threading
+
+
+class ExpiryHeap:
+    """
+    Heap (deadline, urutan, item). Entri tidak pernah dicari/dihapus di tengah
+    heap: pemilik memvalidasi item saat di-pop (lazy deletion) dan boleh
+    menjadwalkannya ulang bila deadline-nya sudah bergeser.
+    """
+    def __init__(self):
+        self.heap = []
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return len(self.heap)
+
+    def schedule(self, deadline, item):
+        heapq.heappush(self.heap, (deadline, next(self._sequence), item))
+
+    def next_deadline(self):
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now):
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            due.append(heapq.heappop(self.heap)[2])
+        return due
+
+    def clear(self):
+        self.heap.clear()
+
+
+class _ExpirySource:
+    __slots__ = ('next_deadline', 'expire', 'metrics', 'label')
+
+    def __init__(self, next_deadline, expire, metrics, label):
+        self.next_deadline = next_deadline
+        self.expire = expire
+        self.metrics = metrics
+        self.label = label
+
+
+class ExpiryScheduler:
+    """
+    Satu thread yang tidur hingga deadline terdekat dari semua sumber terdaftar
+    (kendaraan, track gandar), lalu memanggil expire(now) sumber tersebut.
+    Jumlah yang dibuang dilaporkan sebagai counter expiry.<nama>_evicted.
+
+    Tidur dibatasi max_sleep detik (waktu dinding) agar deadline baru yang lebih
+    awal dari jadwal tidur tetap tertangani tanpa perlu sinyal dari pemilik.
+    """
+    def __init__(self, clock, metrics=None, max_sleep=1.0, min_sleep=0.05):
+        self.clock = clock
+        self.metrics = metrics
+        self.max_sleep = max_sleep
+        self.min_sleep = min_sleep
+        self.sources = {}
+        self.evicted_total = {}
+        self.stopped = threading.Event()
+
+    def register(self, name, next_deadline, expire, metrics=None, label=None):
+        """
+        next_deadline() -> float|None; expire(now) -> daftar item yang dibuang.
+        `metrics`/`label` memungkinkan tiap lajur mencatat ke LaneMetrics-nya sendiri.
+        """
+        self.sources[name] = _ExpirySource(next_deadline, expire, metrics or self.metrics, label or name)
+        self.evicted_total[name] = 0
+
+    def run_once(self):
+        now = self.clock.time()
+        earliest = None
+        for name, source in self.sources.items():
+            evicted = source.expire(now)
+            if evicted:
+                self.evicted_total[name] += len(evicted)
+                if source.metrics:
+                    source.metrics.increment(f'expiry.{source.label}_evicted', len(evicted))
+            deadline = source.next_deadline()
+            if deadline is not None and (earliest is None or deadline < earliest):
+                earliest = deadline
+        return earliest
+
+    def run(self):
+        while not self.stopped.is_set():
+            earliest = self.run_once()
+            if earliest is None:
+                wait = self.max_sleep
+            else:
+                wait = min(self.max_sleep, max(self.min_sleep, earliest - self.clock.time()))
+            self.stopped.wait(wait)
+
+    def stop(self):
+        self.stopped.set()
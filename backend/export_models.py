@@ -0,0 +1,120 @@
+"""
+Ekspor models/best-overhead.pt dan models/best-frontal.pt ke ONNX Runtime atau
+OpenVINO untuk PC lajur tanpa GPU, dengan kalibrasi INT8 opsional memakai
+frame dari rekaman (config.json -> replay).
+
+Pemakaian:
+    python export_models.py --backend onnxruntime
+    python export_models.py --backend openvino --int8 --calib-frames 300
+    python export_models.py --backend onnxruntime --int8 --camera overhead --calib-video rekaman.mp4
+
+Ukuran input diambil dari inference_roi.<kamera>.imgsz (atau 640 tanpa ROI),
+sama dengan yang dipakai run_detector saat inferensi. Model diekspor dengan
+dimensi batch dinamis karena InferenceService menggabungkan frame beberapa
+lajur/kamera (hingga inference_service.max_batch) dalam satu panggilan predict.
+"""
+import argparse
+import json
+import os
+
+import cv2
+
+from inference import InferenceROI
+from model_backends import exported_model_path, letterbox_tensor, read_calibration_frames
+
+CAMERAS = ('overhead', 'frontal')
+
+
+def write_calibration_dataset(camera_name, frames, names, root='calibration'):
+    """Simpan frame kalibrasi sebagai dataset YOLO (tanpa label) untuk kalibrasi INT8 OpenVINO (NNCF)."""
+    image_dir = os.path.abspath(os.path.join(root, camera_name, 'images'))
+    os.makedirs(image_dir, exist_ok=True)
+    for i, frame in enumerate(frames):
+        cv2.imwrite(os.path.join(image_dir, f'{camera_name}_{i:05d}.jpg'), frame)
+    yaml_path = os.path.join(root, camera_name, 'data.yaml')
+    with open(yaml_path, 'w') as f:
+        f.write(f"path: {os.path.dirname(image_dir)}\ntrain: images\nval: images\n")
+        f.write("names:\n" + "".join(f"  {k}: {v}\n" for k, v in names.items()))
+    return yaml_path
+
+
+class FrameCalibrationReader:
+    """CalibrationDataReader ONNX Runtime yang mengumpankan frame rekaman satu per satu."""
+    def __init__(self, input_name, frames, imgsz):
+        self.input_name = input_name
+        self.frames = iter(frames)
+        self.imgsz = imgsz
+
+    def get_next(self):
+        frame = next(self.frames, None)
+        if frame is None:
+            return None
+        return {self.input_name: letterbox_tensor(frame, self.imgsz)}
+
+
+def quantize_onnx(fp32_path, int8_path, frames, imgsz):
+    import onnxruntime
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+
+    input_name = onnxruntime.InferenceSession(fp32_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+    quantize_static(
+        fp32_path, int8_path, FrameCalibrationReader(input_name, frames, imgsz),
+        quant_format=QuantFormat.QDQ, activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+        per_channel=True, calibrate_method=CalibrationMethod.MinMax
+    )
+
+
+def export_camera(camera_name, config, backend, int8, calib_video, calib_frames):
+    from ultralytics import YOLO
+
+    pt_path = config['model_paths'][camera_name]
+    roi = InferenceROI.from_config(config.get('inference_roi', {}).get(camera_name))
+    imgsz = roi.imgsz if roi else 640
+    model = YOLO(pt_path)
+
+    frames = []
+    if int8:
+        calib_video = calib_video or config.get('replay', {}).get(camera_name)
+        if not calib_video or not os.path.exists(calib_video):
+            raise FileNotFoundError(f"Rekaman kalibrasi untuk {camera_name} tidak ditemukan: '{calib_video}'")
+        frames = read_calibration_frames(calib_video, calib_frames, roi)
+        print(f"📼 {len(frames)} frame kalibrasi {camera_name} diambil dari '{calib_video}'")
+
+    target = exported_model_path(pt_path, backend, int8)
+    if backend == 'onnxruntime':
+        fp32_path = model.export(format='onnx', imgsz=imgsz, simplify=True, dynamic=True)
+        if int8:
+            quantize_onnx(fp32_path, target, frames, imgsz)
+        else:
+            target = fp32_path
+    elif backend == 'openvino':
+        if int8:
+            data_yaml = write_calibration_dataset(camera_name, frames, model.names)
+            target = model.export(format='openvino', imgsz=imgsz, int8=True, data=data_yaml, dynamic=True)
+        else:
+            target = model.export(format='openvino', imgsz=imgsz, dynamic=True)
+    else:
+        raise ValueError(f"Backend tidak didukung untuk ekspor: {backend}")
+
+    print(f"✅ {camera_name}: {pt_path} -> {target} (imgsz {imgsz}{', INT8' if int8 else ''})")
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ekspor model YOLO ke ONNX Runtime / OpenVINO.")
+    parser.add_argument('--backend', choices=('onnxruntime', 'openvino'), required=True)
+    parser.add_argument('--int8', action='store_true', help="Kuantisasi INT8 dengan kalibrasi frame rekaman.")
+    parser.add_argument('--camera', choices=CAMERAS, action='append', help="Default: semua kamera.")
+    parser.add_argument('--calib-video', help="Rekaman kalibrasi (default: replay.<kamera> di config.json).")
+    parser.add_argument('--calib-frames', type=int, default=300)
+    parser.add_argument('--config', default='config.json')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    for camera_name in args.camera or CAMERAS:
+        export_camera(camera_name, config, args.backend, args.int8, args.calib_video, args.calib_frames)
+
+
+if __name__ == '__main__':
+    main()
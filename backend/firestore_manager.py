@@ -0,0 +1,80 @@
+import atexit
+import time
+
+from firestore_writer import FirestoreWriteBehind
+from logs import get_logger
+
+log = get_logger()
+
+
+class FirestoreManager:
+    """
+    Client Firestore dibuat secara malas di thread writer (import firebase_admin
+    dan inisialisasi app tidak menahan startup server). Transaksi yang masuk
+    sebelum koneksi siap menunggu di antrean writer seperti biasa.
+    """
+    def __init__(self, credentials_path, writer_config=None, metrics=None, spool_path=None):
+        writer_config = writer_config or {}
+        self.credentials_path = credentials_path
+        self.metrics = metrics
+        self.db = None
+        self.indonesia_tz = None
+
+        # Tanpa client pun writer tetap jalan: transaksi di-spool ke disk, bukan dibuang.
+        self.writer = FirestoreWriteBehind(
+            connect=self._connect,
+            collection='transactions',
+            spool_path=spool_path or writer_config.get('spool_path', 'transaction_spool.jsonl'),
+            max_queue=writer_config.get('max_queue', 1000),
+            batch_size=writer_config.get('batch_size', 20),
+            flush_interval=writer_config.get('flush_interval', 1.0),
+            max_backoff=writer_config.get('max_backoff', 60.0),
+            metrics=metrics
+        ).start()
+        atexit.register(self.writer.stop)
+
+    def _connect(self):
+        start = time.perf_counter()
+        try:
+            import firebase_admin
+            import pytz
+            from firebase_admin import credentials, firestore
+
+            # Writer mencoba ulang koneksi; app yang sudah terdaftar pada percobaan sebelumnya dipakai lagi.
+            if not firebase_admin._apps:
+                firebase_admin.initialize_app(credentials.Certificate(self.credentials_path))
+            self.db = firestore.client()
+            self.indonesia_tz = pytz.timezone('Asia/Makassar')
+            log.info("✅ Firestore berhasil diinisialisasi", seconds=round(time.perf_counter() - start, 2))
+        except Exception as e:
+            log.error("❌ Gagal inisialisasi Firestore", error=e)
+            self.db = None
+        if self.metrics:
+            self.metrics.set_gauge('startup.firestore_init_seconds', round(time.perf_counter() - start, 3))
+        return self.db
+
+    def save_vehicle_transaction(self, vehicle_data, processing_duration, entry_time, exit_time, is_timeout=False,
+                                 lane_id=None):
+        """Hanya memasukkan transaksi ke antrean writer; tidak pernah menunggu jaringan."""
+        self.writer.submit({
+            'lane_id': lane_id,
+            'vehicle_id': vehicle_data.vehicle_id,
+            'classification': vehicle_data.classification,
+            'axle_count': vehicle_data.axle_count,
+            'tire_config': vehicle_data.tire_config,
+            'entry_time': entry_time,
+            'exit_time': exit_time,
+            'processing_duration_seconds': round(processing_duration, 2) if processing_duration else None,
+            'status': 'timeout' if is_timeout else 'completed'
+        })
+        log.info("📝 Transaksi masuk antrean Firestore", rate_limit=False, vehicle_id=vehicle_data.vehicle_id,
+                 lane=lane_id, status="TIMEOUT" if is_timeout else "SELESAI")
+
+
+def create_firestore_manager(config, metrics=None, spool_path=None):
+    try:
+        return FirestoreManager(config['firestore_key_path'], config.get('firestore_writer'),
+                                metrics=metrics, spool_path=spool_path)
+    except Exception as e:
+        log.error("❌ Gagal inisialisasi Firestore", rate_limit=False, error=e)
+        return None
@@ -0,0 +1,210 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from threading import Lock
+
+from logs import get_logger
+
+log = get_logger()
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict) and '__datetime__' in value:
+        return datetime.fromisoformat(value['__datetime__'])
+    return value
+
+
+class FirestoreWriteBehind:
+    """
+    Penulis latar belakang untuk koleksi Firestore. Loop inferensi hanya memanggil
+    submit() (tidak pernah menunggu jaringan); thread writer mengirim record dalam
+    batched write, mencoba ulang dengan backoff, dan menyimpan record ke spool
+    lokal (JSON lines, append-only) selama Firestore tidak dapat dijangkau.
+    Spool diputar ulang otomatis setelah koneksi pulih.
+
+    `db` cukup objek yang punya .batch() dan .collection(name).document(id),
+    sehingga bisa diuji dengan client palsu atau Firestore emulator
+    (FIRESTORE_EMULATOR_HOST) tanpa jaringan. Alih-alih `db`, boleh diberikan
+    `connect()` yang membuat client di thread writer, sehingga inisialisasi
+    Firestore tidak menahan startup; bila gagal (None/exception), record di-spool
+    dan connect() dicoba lagi dengan backoff yang sama seperti commit gagal.
+    """
+    def __init__(self, db=None, collection='transactions', spool_path='transaction_spool.jsonl',
+                 max_queue=1000, batch_size=20, flush_interval=1.0, max_backoff=60.0, metrics=None, connect=None):
+        self.db = db
+        self.connect = connect
+        self.collection = collection
+        self.spool_path = spool_path
+        self.replay_path = spool_path + '.replaying'
+        self.batch_size = min(batch_size, 500)  # Batas Firestore: 500 operasi per batch.
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.metrics = metrics
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.spool_lock = Lock()
+        self.backoff = 0.0
+        self.next_attempt_time = 0.0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True, name=f'firestore-writer-{self.collection}')
+        self.thread.start()
+        return self
+
+    def submit(self, fields, doc_id=None):
+        """Masukkan record ke antrean. Tidak pernah memblokir; bila antrean penuh, record langsung di-spool."""
+        record = {'doc_id': doc_id or uuid.uuid4().hex, 'fields': fields}
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._spool([record])
+            self._count('firestore.queue_full')
+        return record['doc_id']
+
+    def pending(self):
+        return self.queue.qsize()
+
+    def stop(self, timeout=5.0):
+        """Hentikan writer; record yang belum terkirim di-spool agar tidak hilang."""
+        self.stopped.set()
+        if self.thread:
+            self.thread.join(timeout)
+        leftovers = self._drain(self.queue.qsize())
+        if leftovers:
+            self._spool(leftovers)
+
+    def _count(self, name, amount=1):
+        if self.metrics:
+            self.metrics.increment(name, amount)
+
+    def _drain(self, limit, first_timeout=0.0):
+        records = []
+        try:
+            records.append(self.queue.get(timeout=first_timeout) if first_timeout else self.queue.get_nowait())
+            while len(records) < limit:
+                records.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return records
+
+    def _run(self):
+        # Sisa spool dari proses sebelumnya (termasuk replay yang terputus) dikirim lebih dulu.
+        if self._ensure_connected():
+            self._replay_spool()
+        while not self.stopped.is_set():
+            records = self._drain(self.batch_size, first_timeout=self.flush_interval)
+
+            if time.monotonic() < self.next_attempt_time or not self._ensure_connected():
+                # Masa backoff atau belum terhubung: jangan sentuh jaringan, simpan ke spool.
+                if records:
+                    self._spool(records)
+                continue
+
+            if records:
+                if not self._commit(records):
+                    self._spool(records)
+                    continue
+
+            if self.db is not None and self._has_spool():
+                self._replay_spool()
+
+    def _schedule_retry(self):
+        self.backoff = min(self.max_backoff, self.backoff * 2 if self.backoff else 1.0)
+        self.next_attempt_time = time.monotonic() + self.backoff
+
+    def _ensure_connected(self):
+        """Buat client lewat connect() bila belum ada; gagal dijadwalkan ulang dengan backoff."""
+        if self.db is not None:
+            return True
+        if self.connect is None or time.monotonic() < self.next_attempt_time:
+            return False
+        try:
+            self.db = self.connect()
+        except Exception as e:
+            log.error("❌ Gagal terhubung ke Firestore", error=e)
+            self.db = None
+        if self.db is None:
+            self._schedule_retry()
+            self._count('firestore.connect_failed')
+            log.warning("Firestore belum terhubung, transaksi tetap di-spool", retry_in=f"{self.backoff:.0f}s")
+            return False
+        self.backoff = 0.0
+        log.info("✅ Writer Firestore terhubung", rate_limit=False, spool_pending=self._has_spool())
+        return True
+
+    def _commit(self, records):
+        if self.db is None:
+            return False
+        try:
+            batch = self.db.batch()
+            collection = self.db.collection(self.collection)
+            for record in records:
+                batch.set(collection.document(record['doc_id']), record['fields'])
+            batch.commit()
+        except Exception as e:
+            self._schedule_retry()
+            self._count('firestore.commit_failed')
+            log.error("❌ Gagal commit transaksi ke Firestore", records=len(records), retry_in=f"{self.backoff:.0f}s", error=e)
+            return False
+
+        self.backoff = 0.0
+        self._count('firestore.committed', len(records))
+        for record in records:
+            log.info("📝 Transaksi disimpan ke Firestore", rate_limit=False,
+                     vehicle_id=record['fields'].get('vehicle_id', record['doc_id']), lane=record['fields'].get('lane_id'))
+        return True
+
+    def _spool(self, records):
+        with self.spool_lock:
+            with open(self.spool_path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    fields = {k: _encode(v) for k, v in record['fields'].items()}
+                    f.write(json.dumps({'doc_id': record['doc_id'], 'fields': fields}) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        self._count('firestore.spooled', len(records))
+        log.warning("💾 Transaksi disimpan ke spool lokal", rate_limit=False, records=len(records), spool=self.spool_path)
+
+    def _has_spool(self):
+        return os.path.exists(self.spool_path) or os.path.exists(self.replay_path)
+
+    def _replay_spool(self):
+        with self.spool_lock:
+            if not os.path.exists(self.replay_path):
+                if not os.path.exists(self.spool_path):
+                    return True
+                os.replace(self.spool_path, self.replay_path)
+            with open(self.replay_path, 'r', encoding='utf-8') as f:
+                lines = [line for line in f if line.strip()]
+
+        records = []
+        for line in lines:
+            try:
+                raw = json.loads(line)
+            except json.JSONDecodeError:
+                # Baris terakhir bisa terpotong bila proses mati saat menulis.
+                continue
+            records.append({'doc_id': raw['doc_id'], 'fields': {k: _decode(v) for k, v in raw['fields'].items()}})
+
+        log.info("🔁 Memutar ulang transaksi dari spool", rate_limit=False, records=len(records))
+        for start in range(0, len(records), self.batch_size):
+            chunk = records[start:start + self.batch_size]
+            # doc_id tetap sama sehingga replay ulang tidak membuat dokumen ganda.
+            if not self._commit(chunk):
+                self._spool(records[start:])
+                os.remove(self.replay_path)
+                return False
+        os.remove(self.replay_path)
+        self._count('firestore.replayed', len(records))
+        return True
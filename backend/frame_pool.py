@@ -0,0 +1,58 @@
+from collections import deque
+from threading import Lock
+
+
+class FrameBufferPool:
+    """
+    Ring buffer frame yang dialokasikan sekali lalu dipakai ulang. Thread capture
+    men-decode langsung ke buffer milik pool; kepemilikan buffer diserahkan ke
+    konsumen (tanpa salinan) dan dikembalikan lewat release() setelah dipakai.
+    """
+    def __init__(self, count=4):
+        self.count = count
+        self.shape = None
+        self.allocated = 0
+        self.free = deque()
+        self.lock = Lock()
+
+    def acquire(self):
+        with self.lock:
+            return self.free.popleft() if self.free else None
+
+    def release(self, buffer):
+        if buffer is None:
+            return
+        with self.lock:
+            if buffer.shape == self.shape and len(self.free) < self.count:
+                self.free.append(buffer)
+
+    def read_from(self, capture):
+        """
+        Decode frame berikutnya dari cv2.VideoCapture ke buffer pool.
+        Mengembalikan (grabbed, frame). Bila semua buffer masih dipegang
+        konsumen, frame hanya di-grab (tanpa decode) dan frame bernilai None.
+        """
+        buffer = self.acquire()
+        if buffer is None:
+            with self.lock:
+                exhausted = self.shape is not None and self.allocated >= self.count
+            if exhausted:
+                return capture.grab(), None
+            grabbed, frame = capture.read()
+        else:
+            grabbed, frame = capture.read(buffer)
+
+        if not grabbed or frame is None:
+            self.release(buffer)
+            return False, None
+
+        if frame is not buffer:
+            with self.lock:
+                if frame.shape != self.shape:
+                    # Frame pertama atau resolusi stream berubah: buffer lama dibuang.
+                    self.shape = frame.shape
+                    self.free.clear()
+                    self.allocated = 1
+                else:
+                    self.allocated += 1
+        return True, frame
@@ -0,0 +1,53 @@
+import numpy as np
+
+
+class LineGeometry:
+    """
+    Garis deteksi overhead dengan persamaan ternormalisasi (a*x + b*y + c = 0,
+    a^2 + b^2 = 1) yang dihitung sekali dari config.json. Semua uji dilakukan
+    untuk seluruh box/titik sekaligus.
+    """
+    def __init__(self, line_coords, tolerance=15):
+        self.x1, self.y1, self.x2, self.y2 = [float(v) for v in line_coords]
+        a, b = self.y2 - self.y1, self.x1 - self.x2
+        norm = np.hypot(a, b)
+        self.a, self.b = a / norm, b / norm
+        self.c = (self.x2 * self.y1 - self.x1 * self.y2) / norm
+        self.tolerance = tolerance
+        self.x_min, self.x_max = min(self.x1, self.x2), max(self.x1, self.x2)
+        self.y_min, self.y_max = min(self.y1, self.y2), max(self.y1, self.y2)
+
+    def side(self, points):
+        return (self.x2 - self.x1) * (points[:, 1] - self.y1) - (self.y2 - self.y1) * (points[:, 0] - self.x1)
+
+    def crossing_mask(self, previous_points, new_points):
+        return (self.side(previous_points) > 0) != (self.side(new_points) > 0)
+
+    def boxes_touching(self, xyxy):
+        """Mask N: box menyentuh garis (sudut dalam toleransi, atau bbox-nya beririsan dengan garis)."""
+        if len(xyxy) == 0:
+            return np.zeros(0, dtype=bool)
+        x1, y1, x2, y2 = xyxy[:, 0], xyxy[:, 1], xyxy[:, 2], xyxy[:, 3]
+        corner_x = np.stack((x1, x2, x1, x2), axis=1)
+        corner_y = np.stack((y1, y1, y2, y2), axis=1)
+        near_corner = (np.abs(self.a * corner_x + self.b * corner_y + self.c) <= self.tolerance).any(axis=1)
+        overlaps = (x1 <= self.x_max) & (x2 >= self.x_min) & (y1 <= self.y_max) & (y2 >= self.y_min)
+        return near_corner | overlaps
+
+    def any_touching(self, xyxy):
+        return bool(self.boxes_touching(xyxy).any())
+
+
+class ZoneGeometry:
+    """Zona transaksi frontal (batas inklusif), diuji untuk semua box sekaligus."""
+    def __init__(self, area):
+        self.x1, self.y1, self.x2, self.y2 = area['x1'], area['y1'], area['x2'], area['y2']
+
+    def boxes_in_zone(self, xyxy):
+        if len(xyxy) == 0:
+            return np.zeros(0, dtype=bool)
+        return ~((xyxy[:, 2] < self.x1) | (xyxy[:, 0] > self.x2) |
+                 (xyxy[:, 3] < self.y1) | (xyxy[:, 1] > self.y2))
+
+    def any_in_zone(self, xyxy):
+        return bool(self.boxes_in_zone(xyxy).any())
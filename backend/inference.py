@@ -0,0 +1,48 @@
+from motion import clip_roi
+
+
+class InferenceROI:
+    """Area frame yang benar-benar dikirim ke YOLO, beserta imgsz untuk crop tersebut."""
+    def __init__(self, x1, y1, x2, y2, imgsz=640, frame_width=640, frame_height=480):
+        self.x1, self.y1, self.x2, self.y2 = clip_roi((x1, y1, x2, y2), frame_width, frame_height)
+        self.imgsz = imgsz
+
+    @classmethod
+    def from_config(cls, roi_config, frame_width=640, frame_height=480):
+        if not roi_config or not roi_config.get('enabled', True):
+            return None
+        return cls(roi_config['x1'], roi_config['y1'], roi_config['x2'], roi_config['y2'],
+                   imgsz=roi_config.get('imgsz', 640), frame_width=frame_width, frame_height=frame_height)
+
+
+def shift_result_to_frame(result, frame, offset_x, offset_y):
+    """Pindahkan box hasil inferensi crop ke koordinat frame penuh."""
+    result.orig_img = frame
+    result.orig_shape = frame.shape[:2]
+    if result.boxes is None:
+        return result
+    data = result.boxes.data.clone()
+    if len(data):
+        data[:, [0, 2]] += offset_x
+        data[:, [1, 3]] += offset_y
+    result.update(boxes=data)
+    return result
+
+
+def run_detector(model, frame, roi=None, conf=0.5):
+    """
+    Menjalankan YOLO pada frame, atau hanya pada crop `roi` dengan imgsz yang
+    lebih kecil. Box dikembalikan dalam koordinat frame penuh sehingga
+    is_box_touching_line dan is_box_in_area tetap bekerja tanpa perubahan.
+
+    `model` boleh berupa ultralytics.YOLO atau ServiceModel dari
+    InferenceService; keduanya dipanggil lewat predict().
+    """
+    if roi is None:
+        return model.predict(frame, verbose=False, conf=conf)
+
+    crop = frame[roi.y1:roi.y2, roi.x1:roi.x2]
+    results = model.predict(crop, verbose=False, conf=conf, imgsz=roi.imgsz)
+    for result in results:
+        shift_result_to_frame(result, frame, roi.x1, roi.y1)
+    return results
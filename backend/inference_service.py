@@ -0,0 +1,124 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class _Request:
+    __slots__ = ('image', 'imgsz', 'conf', 'future', 'submitted_at')
+
+    def __init__(self, image, imgsz, conf):
+        self.image = image
+        self.imgsz = imgsz
+        self.conf = conf
+        self.future = Future()
+        self.submitted_at = time.perf_counter()
+
+
+class ServiceModel:
+    """
+    Pengganti model YOLO untuk loop kamera: predict() punya bentuk yang sama
+    dengan YOLO.predict, tetapi gambar dikirim ke InferenceService dan
+    dijalankan dalam micro-batch bersama kamera/lajur lain.
+    """
+    def __init__(self, service, name):
+        self.service = service
+        self.name = name
+
+    def predict(self, source, verbose=False, conf=0.5, imgsz=None, timeout=None):
+        return [self.service.submit(self.name, source, imgsz=imgsz, conf=conf).result(timeout)]
+
+
+class _ModelWorker:
+    def __init__(self, name, model, max_batch, max_wait, metrics):
+        self.name = name
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.metrics = metrics
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True, name=f'inference-{name}')
+
+    def _collect_batch(self):
+        first = self.requests.get()
+        if first is None:
+            return None
+        batch = [first]
+        # Tunggu pasangan batch paling lama max_wait sejak request pertama datang.
+        deadline = first.submitted_at + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self.requests.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            if batch is None:
+                return
+            # imgsz/conf berbeda tidak bisa digabung dalam satu panggilan model.
+            groups = {}
+            for request in batch:
+                groups.setdefault((request.imgsz, request.conf), []).append(request)
+            for (imgsz, conf), requests in groups.items():
+                self._predict(requests, imgsz, conf)
+
+    def _predict(self, requests, imgsz, conf):
+        started = time.perf_counter()
+        kwargs = {'verbose': False, 'conf': conf}
+        if imgsz is not None:
+            kwargs['imgsz'] = imgsz
+        try:
+            results = self.model.predict([request.image for request in requests], **kwargs)
+        except Exception as e:
+            for request in requests:
+                request.future.set_exception(e)
+            return
+        finished = time.perf_counter()
+        for request, result in zip(requests, results):
+            request.future.set_result(result)
+
+        if self.metrics:
+            self.metrics.observe(f'inference.{self.name}.batch_size', len(requests))
+            self.metrics.observe(f'inference.{self.name}.batch_seconds', finished - started)
+            for request in requests:
+                self.metrics.observe(f'inference.{self.name}.queue_wait_seconds', started - request.submitted_at)
+
+
+class InferenceService:
+    """
+    Layanan inferensi bersama: setiap model dimuat sekali dan dilayani satu
+    thread worker, berapa pun jumlah loop kamera/lajur yang memakainya. Request
+    yang datang hampir bersamaan digabung menjadi satu batch (maksimum
+    max_batch gambar, menunggu paling lama max_wait detik), sehingga GPU/CPU
+    menerima sedikit panggilan besar alih-alih banyak panggilan batch-1.
+    """
+    def __init__(self, max_batch=8, max_wait=0.004, metrics=None):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.metrics = metrics
+        self.workers = {}
+
+    def register_model(self, name, model):
+        worker = _ModelWorker(name, model, self.max_batch, self.max_wait, self.metrics)
+        self.workers[name] = worker
+        worker.thread.start()
+        if self.metrics:
+            self.metrics.register_gauge(f'inference.{name}.queue_depth', worker.requests.qsize)
+        return ServiceModel(self, name)
+
+    def submit(self, name, image, imgsz=None, conf=0.5):
+        request = _Request(image, imgsz, conf)
+        self.workers[name].requests.put(request)
+        return request.future
+
+    def stop(self):
+        for worker in self.workers.values():
+            worker.requests.put(None)
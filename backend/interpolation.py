@@ -0,0 +1,129 @@
+import numpy as np
+
+from detections import Detections, match_by_distance
+
+
+class BoxPropagator:
+    """
+    Kalman kecepatan-konstan untuk semua box sekaligus (state cx, cy, w, h, vx, vy),
+    dipakai untuk mengisi frame di antara dua inferensi YOLO. correct() menyelaraskan
+    track dengan deteksi asli (deteksi tanpa pasangan menjadi track baru, track tanpa
+    pasangan dibuang); predict() memajukan box ke waktu frame sekarang.
+    """
+    def __init__(self, max_match_distance=80, position_noise=4.0, velocity_noise=200.0, measurement_noise=3.0):
+        self.max_match_distance = max_match_distance
+        self.position_noise = position_noise
+        self.velocity_noise = velocity_noise
+        self.measurement_noise = measurement_noise
+        self.H = np.hstack((np.eye(4), np.zeros((4, 2)))).astype(np.float32)
+        self.R = np.eye(4, dtype=np.float32) * measurement_noise ** 2
+        self.reset()
+
+    def reset(self):
+        self.state = np.zeros((0, 6), dtype=np.float32)
+        self.covariance = np.zeros((0, 6, 6), dtype=np.float32)
+        self.conf = np.zeros(0, dtype=np.float32)
+        self.cls = np.zeros(0, dtype=np.int64)
+        self.last_time = None
+
+    def __len__(self):
+        return len(self.state)
+
+    def _advance(self, now):
+        if self.last_time is None or not len(self.state):
+            self.last_time = now
+            return
+        dt = max(now - self.last_time, 0.0)
+        self.last_time = now
+        if dt == 0.0:
+            return
+        F = np.eye(6, dtype=np.float32)
+        F[0, 4] = F[1, 5] = dt
+        Q = np.diag([self.position_noise ** 2 * dt, self.position_noise ** 2 * dt,
+                     self.position_noise ** 2 * dt, self.position_noise ** 2 * dt,
+                     self.velocity_noise ** 2 * dt, self.velocity_noise ** 2 * dt]).astype(np.float32)
+        self.state = self.state @ F.T
+        self.covariance = F @ self.covariance @ F.T + Q
+
+    def _boxes(self):
+        cx, cy, w, h = self.state[:, 0], self.state[:, 1], self.state[:, 2], self.state[:, 3]
+        return np.column_stack((cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2)).astype(np.float32)
+
+    def predict(self, now):
+        """Box semua track pada waktu `now`, sebagai Detections."""
+        self._advance(now)
+        return Detections(self._boxes(), self.conf.copy(), self.cls.copy())
+
+    def correct(self, detections, now):
+        self._advance(now)
+        xyxy = detections.xyxy
+        measurements = np.column_stack(((xyxy[:, 0] + xyxy[:, 2]) / 2, (xyxy[:, 1] + xyxy[:, 3]) / 2,
+                                        xyxy[:, 2] - xyxy[:, 0], xyxy[:, 3] - xyxy[:, 1])).astype(np.float32)
+
+        # Pasangan hanya dalam kelas yang sama; gandar tidak boleh "berpindah" menjadi body.
+        matches = []
+        for class_id in np.unique(detections.cls):
+            track_idx = np.flatnonzero(self.cls == class_id)
+            det_idx = np.flatnonzero(detections.cls == class_id)
+            pairs, _ = match_by_distance(self.state[track_idx, :2], measurements[det_idx, :2], self.max_match_distance)
+            matches.extend((track_idx[t], det_idx[d]) for t, d in pairs)
+
+        state = np.zeros((len(detections), 6), dtype=np.float32)
+        covariance = np.zeros((len(detections), 6, 6), dtype=np.float32)
+        state[:, :4] = measurements
+        covariance[:] = np.diag([self.measurement_noise ** 2] * 4 + [self.velocity_noise ** 2] * 2)
+        if matches:
+            tracks = np.array([t for t, _ in matches])
+            dets = np.array([d for _, d in matches])
+            P = self.covariance[tracks]
+            innovation = measurements[dets] - self.state[tracks, :4]
+            S = self.H @ P @ self.H.T + self.R
+            K = P @ self.H.T @ np.linalg.inv(S)
+            state[dets] = self.state[tracks] + np.einsum('nij,nj->ni', K, innovation)
+            covariance[dets] = (np.eye(6, dtype=np.float32) - K @ self.H) @ P
+
+        self.state = state
+        self.covariance = covariance
+        self.conf = detections.conf.astype(np.float32)
+        self.cls = detections.cls.astype(np.int64)
+
+
+class DetectionSchedule:
+    """
+    Menentukan kapan YOLO benar-benar dijalankan: tiap `every` frame, dan
+    (adaptive) langsung di frame berikutnya bila confidence terendah pada
+    deteksi terakhir < min_confidence atau jumlah objek berubah dibanding
+    deteksi sebelumnya. every=1 berarti detektor di setiap frame seperti biasa.
+    """
+    def __init__(self, every=1, min_confidence=0.6, adaptive=True):
+        self.every = max(int(every), 1)
+        self.min_confidence = min_confidence
+        self.adaptive = adaptive
+        self.frames_since_detection = None
+        self.last_count = None
+        self.force_next = True
+
+    @classmethod
+    def from_config(cls, settings):
+        settings = settings or {}
+        return cls(every=settings.get('every_k_frames', 1),
+                   min_confidence=settings.get('min_confidence', 0.6),
+                   adaptive=settings.get('adaptive', True))
+
+    def should_detect(self):
+        return self.every == 1 or self.force_next or self.frames_since_detection >= self.every
+
+    def detected(self, detections):
+        count = len(detections)
+        self.force_next = self.adaptive and bool(
+            (count and float(detections.conf.min()) < self.min_confidence)
+            or (self.last_count is not None and count != self.last_count))
+        self.last_count = count
+        self.frames_since_detection = 1
+
+    def interpolated(self):
+        self.frames_since_detection += 1
+
+    def reset(self):
+        self.force_next = True
+        self.last_count = None
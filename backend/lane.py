@@ -0,0 +1,1101 @@
+import copy
+import functools
+import time
+from collections import deque
+from datetime import datetime
+
+import cv2
+import numpy as np
+import pytz
+
+from detections import Detections, match_by_distance
+from geometry import LineGeometry, ZoneGeometry
+from inference import InferenceROI, run_detector
+from logs import get_logger
+from lane_state import create_lane_journal
+from interpolation import BoxPropagator, DetectionSchedule
+from metrics import TimedLock
+from motion import MotionGate, AlwaysInferGate, roi_around_line, roi_around_area
+from pacing import FramePacer
+from renderer import LineOverlay, ZoneOverlay, draw_boxes
+from vehicle_index import VehicleIndex
+from expiry import ExpiryHeap
+from video_stream import OptimizedVideoStream, ReplayVideoStream
+from capture_worker import CaptureProcess
+
+CAMERAS = ('overhead', 'frontal')
+
+# Kunci config.json yang boleh ditimpa per lajur (lanes[i].<kunci>); nilai tingkat atas menjadi default.
+LANE_KEYS = ('rtsp_urls', 'transaction_area', 'line_crossing_detector', 'vehicle_queue',
+             'inference_roi', 'motion_gate', 'replay', 'capture_workers', 'detection_interval',
+             'state_persistence')
+
+# Event Socket.IO dari dashboard yang ditujukan ke satu lajur (lihat Lane.run_command).
+LANE_COMMANDS = ('reset_classification', 'hard_reset_system', 'obs_trigger')
+
+
+def lane_configs(config):
+    """
+    Daftar konfigurasi lajur dari config.json. Tanpa "lanes", satu lajur dibentuk
+    dari kunci tingkat atas seperti sebelumnya. Dict bertingkat (mis. replay,
+    inference_roi) digabung satu tingkat, sehingga lajur cukup menulis yang berbeda.
+    """
+    defaults = {key: config[key] for key in LANE_KEYS if key in config}
+    entries = config.get('lanes') or [{'id': '1'}]
+    lanes = []
+    for i, entry in enumerate(entries):
+        lane = copy.deepcopy(defaults)
+        for key, value in entry.items():
+            if isinstance(value, dict) and isinstance(lane.get(key), dict):
+                lane[key] = {**lane[key], **value}
+            else:
+                lane[key] = value
+        lane['id'] = str(entry.get('id', i + 1))
+        lane.setdefault('name', f"Lajur {lane['id']}")
+        lanes.append(lane)
+    return lanes
+
+
+def lane_warmup_rois(lane_configs):
+    """ROI inferensi semua lajur per kamera, untuk warm-up model (model_backends.warm_up)."""
+    return {camera: [InferenceROI.from_config(lane.get('inference_roi', {}).get(camera)) for lane in lane_configs]
+            for camera in CAMERAS}
+
+
+@functools.lru_cache(maxsize=None)
+def placeholder_frame_jpeg(width=640, height=480):
+    """JPEG "STREAM TERPUTUS", dibuat saat pertama kali dibutuhkan (bukan saat import)."""
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    text = "STREAM TERPUTUS"
+    text_size = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1, 2)[0]
+    text_x = (width - text_size[0]) // 2
+    text_y = (height + text_size[1]) // 2
+    cv2.putText(frame, text, (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    _, buffer = cv2.imencode('.jpg', frame)
+    return buffer.tobytes()
+
+def detect_tire_config_from_detections(detections):
+    is_bus = bool(np.any(detections.cls == 0)) # bus class
+    tire_config = None
+    # Sama seperti sebelumnya: box ban terakhir yang menentukan konfigurasi.
+    tire_indices = np.flatnonzero((detections.cls == 2) | (detections.cls == 3))
+    if tire_indices.size:
+        tire_config = "single_tire" if detections.cls[tire_indices[-1]] == 3 else "double_tire"
+    return tire_config, is_bus
+
+class VehicleData:
+    __slots__ = ('vehicle_id', 'axle_count', 'tire_config', 'classification', 'created_time', 'detection_time',
+                 'is_classified', 'last_seen_frontal', 'status', 'config_locked', 'has_entered_transaction_zone',
+                 'transaction_start_time', 'max_transaction_time', 'timeout_extended', 'processing_attempts',
+                 'bus_detection_count', 'truck_detection_count')
+
+    def __init__(self, vehicle_id, clock, max_transaction_time):
+        self.vehicle_id = vehicle_id
+        self.axle_count = 0
+        self.tire_config = None
+        self.classification = "--"
+        self.created_time = clock.time()
+        self.detection_time = time.strftime("%H:%M:%S", time.localtime(self.created_time))
+        self.is_classified = False
+        self.last_seen_frontal = None
+        self.status = "detected" # Status awal
+        self.config_locked = False
+        self.has_entered_transaction_zone = False
+        self.transaction_start_time = None
+        self.max_transaction_time = max_transaction_time
+        self.timeout_extended = False
+        self.processing_attempts = 0
+        self.bus_detection_count = 0
+        self.truck_detection_count = 0
+
+    def to_state(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_state(cls, state):
+        vehicle = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(vehicle, name, state[name])
+        return vehicle
+
+class VehicleQueue:
+    def __init__(self, clock, settings, metrics, emit, save_transaction=None, log=None):
+        self.clock = clock
+        self.log = log or get_logger()
+        self.emit = emit
+        self.save_transaction = save_transaction
+        self.line_detector = None  # Diisi oleh Lane setelah LineCrossingDetector dibuat.
+        self.journal = None  # LaneJournal (lane_state.py) bila state_persistence aktif.
+        self.vehicles = {}
+        self.vehicle_counter = 0
+        self.current_processing_vehicle = None
+        self.processing_start_time = None
+        self.LEARNING_WINDOW_SECONDS = settings['learning_window_seconds']
+        self.max_transaction_time = settings['max_transaction_time']
+        self.lock = TimedLock('vehicle_queue', metrics)
+        self.timeout_vehicles = set()
+        self.indonesia_tz = pytz.timezone('Asia/Makassar')
+        self.index = VehicleIndex()
+        self.completed_retention_seconds = 60
+        self.ghost_retention_seconds = 20
+
+    def queue_state(self):
+        return {'vehicle_counter': self.vehicle_counter,
+                'current_processing_vehicle': self.current_processing_vehicle,
+                'processing_start_time': self.processing_start_time}
+
+    def record_transition(self, event, vehicle=None, removed=None):
+        """Catat transisi ke journal state lajur; dipanggil sambil memegang lock yang melindungi perubahannya."""
+        if self.journal is not None:
+            self.journal.record(event, vehicle=vehicle.to_state() if vehicle else None, removed=removed,
+                                queue=self.queue_state())
+
+    def restore_state(self, vehicles, queue_state):
+        """Pulihkan kendaraan, antrean FIFO dan counter ID dari lane_state; kendaraan completed tidak dibawa."""
+        with self.lock:
+            self.vehicles = {}
+            self.index.clear()
+            for state in sorted(vehicles.values(), key=lambda state: state['vehicle_id']):
+                if state['status'] == "completed":
+                    continue
+                vehicle = VehicleData.from_state(state)
+                self.vehicles[vehicle.vehicle_id] = vehicle
+                if vehicle.status == "counted_and_waiting":
+                    self.index.enqueue_waiting(vehicle.vehicle_id)
+                elif vehicle.status == "detected":
+                    self.index.schedule_expiry(vehicle.created_time + self.ghost_retention_seconds, vehicle, 'ghost')
+            if queue_state:
+                self.vehicle_counter = queue_state['vehicle_counter']
+                current = queue_state['current_processing_vehicle']
+                self.current_processing_vehicle = current if current in self.vehicles else None
+                self.processing_start_time = queue_state['processing_start_time'] if self.current_processing_vehicle else None
+
+    def finalize_vehicle_from_overhead(self, vehicle_id):
+        with self.lock:
+            if vehicle_id in self.vehicles:
+                if self.vehicles[vehicle_id].axle_count == 0:
+                    self.log.info("GHOST DETECTED: kendaraan tanpa gandar, ID akan di-reuse", vehicle_id=vehicle_id)
+                    del self.vehicles[vehicle_id]
+                    self.vehicle_counter -= 1
+                    self.record_transition('removed', removed=vehicle_id)
+                    self.log.info("Counter ID direset", counter=self.vehicle_counter, next_id=f"V{(self.vehicle_counter + 1):04d}")
+                    return
+
+                if self.vehicles[vehicle_id].status == "detected":
+                    self.vehicles[vehicle_id].status = "counted_and_waiting"
+                    self.index.enqueue_waiting(vehicle_id)
+                    self.record_transition('finalized', self.vehicles[vehicle_id])
+                    self.log.info("ANTREAN: kendaraan masuk antrean", vehicle_id=vehicle_id, axle_count=self.vehicles[vehicle_id].axle_count)
+        
+    def create_new_vehicle(self):
+        with self.lock:
+            self.vehicle_counter += 1
+            vehicle_id = f"V{self.vehicle_counter:04d}"
+            vehicle = VehicleData(vehicle_id, self.clock, self.max_transaction_time)
+            self.vehicles[vehicle_id] = vehicle
+            # Kendaraan yang tetap tanpa gandar dibuang sebagai ghost setelah tenggat ini.
+            self.index.schedule_expiry(vehicle.created_time + self.ghost_retention_seconds, vehicle, 'ghost')
+            self.record_transition('created', vehicle)
+            self.log.info("Kendaraan baru dibuat", vehicle_id=vehicle_id)
+            return vehicle_id
+    
+    def get_vehicle(self, vehicle_id):
+        with self.lock:
+            return self.vehicles.get(vehicle_id)
+    
+    def update_vehicle_axle_count(self, vehicle_id, axle_count):
+        with self.lock:
+            if vehicle_id in self.vehicles:
+                vehicle = self.vehicles[vehicle_id]
+                if vehicle.axle_count != axle_count:
+                    vehicle.axle_count = axle_count
+                    self.log.info("Update jumlah gandar", vehicle_id=vehicle_id, axle_count=axle_count)
+                self.classify_vehicle(vehicle_id)
+                self.record_transition('updated', vehicle)
+    
+    def update_vehicle_tire_config(self, vehicle_id, new_tire_config):
+        with self.lock:
+            if vehicle_id not in self.vehicles:
+                return
+            
+            vehicle = self.vehicles[vehicle_id]
+
+            if vehicle.config_locked:
+                return
+
+            if new_tire_config and new_tire_config != vehicle.tire_config:
+                self.log.info("KOREKSI konfigurasi ban", vehicle_id=vehicle_id, old=vehicle.tire_config, new=new_tire_config)
+                vehicle.tire_config = new_tire_config
+                self.record_transition('updated', vehicle)
+
+            if self.processing_start_time and (self.clock.time() - self.processing_start_time > self.LEARNING_WINDOW_SECONDS):
+                self.log.info("Jendela pembelajaran selesai, konfigurasi ban dikunci", vehicle_id=vehicle_id, tire_config=vehicle.tire_config)
+                
+                vehicle.config_locked = True
+                
+                self.classify_vehicle(vehicle_id)
+                self.record_transition('updated', vehicle)
+    
+    def set_current_processing_vehicle(self, vehicle_id):
+        with self.lock:
+            if vehicle_id in self.vehicles:
+                vehicle = self.vehicles[vehicle_id]
+                
+                if vehicle.axle_count == 1:
+                    self.log.info("KOREKSI OTOMATIS: gandar hanya 1, diubah menjadi 2", vehicle_id=vehicle_id)
+                    vehicle.axle_count = 2
+                    self.classify_vehicle(vehicle_id)
+                
+                self.index.discard_waiting(vehicle_id)
+                self.current_processing_vehicle = vehicle_id
+                self.processing_start_time = self.clock.time()
+                
+                vehicle.status = "in_transaction"
+                vehicle.transaction_start_time = self.processing_start_time
+                vehicle.has_entered_transaction_zone = True
+                self.record_transition('in_transaction', vehicle)
+                
+                self.log.info("Kendaraan diambil alih frontal (in_transaction)", vehicle_id=vehicle_id)
+                
+                if vehicle.is_classified:
+                    analysis_data = {
+                        'vehicle_id': vehicle.vehicle_id,
+                        'classification': vehicle.classification,
+                        'axle_count': vehicle.axle_count,
+                        'detection_time': datetime.fromtimestamp(self.clock.time(), tz=self.indonesia_tz).strftime("%H:%M:%S")
+                    }
+                    self.emit('update_analysis_panel', analysis_data)
+
+    def complete_current_vehicle(self):
+        if self.current_processing_vehicle:
+            vehicle_id_completed = self.current_processing_vehicle
+            vehicle_data = self.vehicles.get(vehicle_id_completed)
+            
+            if not vehicle_data:
+                self.current_processing_vehicle = None
+                self.processing_start_time = None
+                return False
+
+            is_timeout = vehicle_id_completed in self.timeout_vehicles
+            if (not is_timeout and vehicle_data.transaction_start_time and 
+                self.clock.time() - vehicle_data.transaction_start_time > vehicle_data.max_transaction_time):
+                is_timeout = True
+                self.timeout_vehicles.add(vehicle_id_completed)
+                self.log.warning("⚠️ Kendaraan ditandai TIMEOUT saat penyelesaian", rate_limit=False, vehicle_id=vehicle_id_completed)
+            
+            processing_duration = self.clock.time() - self.processing_start_time if self.processing_start_time else None
+            
+            if self.save_transaction:
+                entry_time_aware = datetime.fromtimestamp(vehicle_data.transaction_start_time, tz=self.indonesia_tz) if vehicle_data.transaction_start_time else None
+                exit_time_aware = datetime.fromtimestamp(self.clock.time(), tz=self.indonesia_tz)
+                self.save_transaction(
+                    vehicle_data=vehicle_data,
+                    processing_duration=processing_duration,
+                    entry_time=entry_time_aware,
+                    exit_time=exit_time_aware,
+                    is_timeout=is_timeout
+                )
+
+            vehicle_data.status = "completed"
+            with self.lock:
+                self.index.schedule_expiry(vehicle_data.created_time + self.completed_retention_seconds, vehicle_data, 'completed')
+                self.current_processing_vehicle = None
+                self.processing_start_time = None
+                self.record_transition('completed', vehicle_data)
+            self.log.info("✅ Transaksi SELESAI", rate_limit=False, vehicle_id=vehicle_id_completed)
+            
+            # Di luar vehicle_queue.lock: urutan lock yang berlaku adalah garis → antrean.
+            self.line_detector.finalize_vehicle(vehicle_id_completed)
+            self.emit('clear_analysis_panel')
+            return True
+        return False
+
+    def classify_vehicle(self, vehicle_id):
+        if vehicle_id not in self.vehicles: 
+            return
+        vehicle = self.vehicles[vehicle_id]
+        
+        classification_made = False
+        if vehicle.axle_count >= 3:
+            if vehicle.axle_count == 3: vehicle.classification = "Golongan 3"
+            elif vehicle.axle_count == 4: vehicle.classification = "Golongan 4"
+            elif vehicle.axle_count >= 5: vehicle.classification = "Golongan 5"
+            classification_made = True
+        elif vehicle.axle_count == 2 and vehicle.tire_config:
+            if vehicle.tire_config == "single_tire": vehicle.classification = "Golongan 1"
+            elif vehicle.tire_config == "double_tire": vehicle.classification = "Golongan 2"
+            classification_made = True
+        
+        if classification_made:
+            vehicle.is_classified = True
+            self.log.info("Kendaraan TERKLASIFIKASI", rate_limit=False, vehicle_id=vehicle_id, classification=vehicle.classification)
+            
+            if self.current_processing_vehicle == vehicle_id:
+                analysis_data = {
+                    'vehicle_id': vehicle.vehicle_id,
+                    'classification': vehicle.classification,
+                    'axle_count': vehicle.axle_count,
+                    'detection_time': datetime.fromtimestamp(self.clock.time(), tz=self.indonesia_tz).strftime("%H:%M:%S")
+                }
+                self.emit('update_analysis_panel', analysis_data)
+    
+    def get_current_vehicle_data(self):
+        with self.lock:
+            if self.current_processing_vehicle:
+                return self.vehicles.get(self.current_processing_vehicle)
+            return None
+    
+    def is_expired(self, vehicle, reason):
+        # ID bisa di-reuse setelah ghost dihapus, jadi yang dicek adalah objeknya, bukan hanya ID-nya.
+        if self.vehicles.get(vehicle.vehicle_id) is not vehicle:
+            return False
+        if reason == 'ghost':
+            return vehicle.status == "detected" and vehicle.axle_count == 0
+        return vehicle.status == "completed"
+
+    def next_expiry(self):
+        with self.lock:
+            return self.index.next_deadline()
+
+    def cleanup_old_vehicles(self, current_time=None):
+        """Buang kendaraan yang deadline-nya lewat; dipanggil oleh ExpiryScheduler."""
+        evicted = []
+        with self.lock:
+            current_time = self.clock.time() if current_time is None else current_time
+            for vehicle, reason in self.index.pop_due(current_time):
+                if self.is_expired(vehicle, reason):
+                    del self.vehicles[vehicle.vehicle_id]
+                    evicted.append(vehicle.vehicle_id)
+                    self.record_transition('removed', removed=vehicle.vehicle_id)
+                    self.log.info("Kendaraan dihapus dari memori", vehicle_id=vehicle.vehicle_id, reason=reason)
+        return evicted
+
+class LineCrossingDetector:
+    def __init__(self, clock, settings, metrics, frame_width=640, frame_height=480, log=None):
+        self.clock = clock
+        self.log = log or get_logger()
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        coords = settings['line_coords']
+        self.line_x1, self.line_y1, self.line_x2, self.line_y2 = coords[0], coords[1], coords[2], coords[3]
+        self.line = LineGeometry(coords, tolerance=15)
+        self.journal = None  # LaneJournal (lane_state.py) bila state_persistence aktif.
+        self.tracked_axles = {}
+        self.axle_id_counter = 0
+        self.current_vehicle_axles = {}
+        self.current_vehicle_id = None
+        self.history_frames = 5
+        self.max_match_distance = 80
+        self.axle_timeout = 5
+        self.axle_expiry = ExpiryHeap()
+        self.last_vehicle_time = self.clock.time()
+        self.vehicle_timeout = 1.0
+        self.lock = TimedLock('line_detector', metrics)
+        self.vehicle_body_touching_line = False
+        self.last_body_detection_time = self.clock.time()
+        self.body_timeout = settings['body_timeout']
+
+    def line_state(self):
+        return {
+            'current_vehicle_id': self.current_vehicle_id,
+            'axle_id_counter': self.axle_id_counter,
+            'current_vehicle_axles': {vehicle_id: list(axle_ids) for vehicle_id, axle_ids in self.current_vehicle_axles.items()},
+            'tracked_axles': {axle_id: {'positions': list(axle['positions']), 'crossed': axle['crossed'],
+                                        'last_seen': axle['last_seen'], 'vehicle_id': axle['vehicle_id']}
+                              for axle_id, axle in self.tracked_axles.items()},
+            'vehicle_body_touching_line': self.vehicle_body_touching_line,
+            'last_body_detection_time': self.last_body_detection_time,
+            'last_vehicle_time': self.last_vehicle_time,
+        }
+
+    def record_transition(self, event):
+        """Catat state garis ke journal state lajur; dipanggil sambil memegang self.lock."""
+        if self.journal is not None:
+            self.journal.record(event, line=self.line_state())
+
+    def restore_state(self, state):
+        with self.lock:
+            self.current_vehicle_id = state['current_vehicle_id']
+            self.axle_id_counter = state['axle_id_counter']
+            self.current_vehicle_axles = {vehicle_id: list(axle_ids) for vehicle_id, axle_ids in state['current_vehicle_axles'].items()}
+            self.tracked_axles = {}
+            self.axle_expiry.clear()
+            # JSON menyimpan id gandar sebagai string dan posisi sebagai list.
+            for axle_id, axle in state['tracked_axles'].items():
+                axle_id = int(axle_id)
+                positions = deque((tuple(point) for point in axle['positions']), maxlen=self.history_frames)
+                self.tracked_axles[axle_id] = {'positions': positions, 'crossed': axle['crossed'],
+                                               'last_seen': axle['last_seen'], 'vehicle_id': axle['vehicle_id']}
+                self.axle_expiry.schedule(axle['last_seen'] + self.axle_timeout, axle_id)
+            self.vehicle_body_touching_line = state['vehicle_body_touching_line']
+            self.last_body_detection_time = state['last_body_detection_time']
+            self.last_vehicle_time = state['last_vehicle_time']
+
+    def finalize_vehicle(self, vehicle_id):
+        with self.lock:
+            if self.current_vehicle_id == vehicle_id:
+                self.log.info("Kendaraan difinalisasi oleh sistem, siap untuk ID baru", vehicle_id=vehicle_id)
+                self.current_vehicle_id = None
+                self.reset_tracking_system()
+
+    def reset_tracking_system(self):
+        self.log.info("🔄 RESET SISTEM TRACKING - Siap untuk kendaraan baru")
+        self.tracked_axles.clear()
+        self.axle_expiry.clear()
+        self.current_vehicle_axles.clear()
+        self.vehicle_body_touching_line = False
+        self.last_body_detection_time = self.clock.time()
+        self.record_transition('line_reset')
+
+    def detect_vehicle_bodies_and_axles(self, detections):
+        return detections.of_classes([1, 2, 3]).xyxy, detections.of_classes([0])
+
+    def update_vehicle_body_status(self, vehicle_bodies):
+        current_time = self.clock.time()
+        body_touching_now = self.line.any_touching(vehicle_bodies)
+        
+        if body_touching_now:
+            if not self.vehicle_body_touching_line:
+                self.log.info("🚗 BODY KENDARAAN MULAI MENYENTUH GARIS - Sistem aktif")
+            self.vehicle_body_touching_line = True
+            self.last_body_detection_time = current_time
+        elif self.vehicle_body_touching_line and (current_time - self.last_body_detection_time > self.body_timeout):
+            self.log.info("🚗 BODY KENDARAAN SUDAH TIDAK MENYENTUH GARIS - Sistem akan reset")
+            self.vehicle_body_touching_line = False
+            return True
+        return False
+
+    def update_axle_tracking(self, detections, vehicle_queue):
+        with self.lock:
+            current_time = self.clock.time()
+            vehicle_bodies, axle_detections = self.detect_vehicle_bodies_and_axles(detections)
+            should_reset = self.update_vehicle_body_status(vehicle_bodies)
+            
+            if should_reset and self.current_vehicle_id:
+                self.log.info("🔄 AUTO RESET: kendaraan selesai (body tidak menyentuh garis)", vehicle_id=self.current_vehicle_id)
+                vehicle_queue.finalize_vehicle_from_overhead(self.current_vehicle_id)
+                self.current_vehicle_id = None
+                self.reset_tracking_system()
+                return
+            
+            if not self.vehicle_body_touching_line: return
+            if len(axle_detections): self.last_vehicle_time = current_time
+            
+            if self.current_vehicle_id and (current_time - self.last_vehicle_time > self.vehicle_timeout):
+                self.log.info("TIMEOUT AXLE: kendaraan diserahkan ke antrean", vehicle_id=self.current_vehicle_id)
+                vehicle_queue.finalize_vehicle_from_overhead(self.current_vehicle_id)
+                self.current_vehicle_id = None
+                self.reset_tracking_system()
+                return
+
+            centers = axle_detections.centers
+            axle_ids = list(self.tracked_axles.keys())
+            track_points = np.array([self.tracked_axles[aid]['positions'][-1] for aid in axle_ids], dtype=np.float32).reshape(-1, 2)
+            matches, unmatched = match_by_distance(track_points, centers, self.max_match_distance)
+
+            if matches:
+                self.check_line_crossings([(axle_ids[t], centers[d]) for t, d in matches], vehicle_queue)
+                for t, d in matches:
+                    axle_data = self.tracked_axles[axle_ids[t]]
+                    axle_data['positions'].append((float(centers[d][0]), float(centers[d][1])))
+                    axle_data['last_seen'] = current_time
+
+            for d in unmatched:
+                if self.current_vehicle_id is None: self.start_new_vehicle(vehicle_queue)
+                if self.current_vehicle_id:
+                    self.axle_id_counter += 1
+                    new_axle_id = self.axle_id_counter
+                    positions = deque([(float(centers[d][0]), float(centers[d][1]))], maxlen=self.history_frames)
+                    self.tracked_axles[new_axle_id] = {'positions': positions, 'crossed': False, 'last_seen': current_time, 'vehicle_id': self.current_vehicle_id}
+                    self.axle_expiry.schedule(current_time + self.axle_timeout, new_axle_id)
+                    self.current_vehicle_axles[self.current_vehicle_id].append(new_axle_id)
+
+    def start_new_vehicle(self, vehicle_queue):
+        self.current_vehicle_id = vehicle_queue.create_new_vehicle()
+        self.current_vehicle_axles[self.current_vehicle_id] = []
+        self.record_transition('line_vehicle_started')
+        self.log.info("Memulai tracking kendaraan baru", vehicle_id=self.current_vehicle_id)
+
+    def check_line_crossings(self, matched_pairs, vehicle_queue):
+        """Uji lintasan garis untuk semua pasangan (axle_id, posisi baru) sekaligus."""
+        candidates = [(axle_id, point) for axle_id, point in matched_pairs
+                      if not self.tracked_axles[axle_id]['crossed'] and len(self.tracked_axles[axle_id]['positions']) >= 2]
+        if not candidates: return
+
+        previous_points = np.array([self.tracked_axles[axle_id]['positions'][-2] for axle_id, _ in candidates], dtype=np.float32)
+        new_points = np.array([point for _, point in candidates], dtype=np.float32)
+        crossed = self.line.crossing_mask(previous_points, new_points)
+
+        for (axle_id, _), has_crossed in zip(candidates, crossed):
+            if not has_crossed: continue
+            axle_data = self.tracked_axles[axle_id]
+            axle_data['crossed'] = True
+            vehicle_id = axle_data['vehicle_id']
+            self.record_transition('axle_crossed')
+            self.log.info("✅ Gandar MELINTASI GARIS DIAGONAL", vehicle_id=vehicle_id, axle_id=axle_id)
+            if vehicle_id:
+                count = self.get_crossed_axles_count_for_vehicle(vehicle_id)
+                vehicle_queue.update_vehicle_axle_count(vehicle_id, count)
+
+    def get_crossed_axles_count_for_vehicle(self, vehicle_id):
+        if vehicle_id not in self.current_vehicle_axles: return 0
+        return sum(1 for axle_id in self.current_vehicle_axles[vehicle_id] 
+                if self.tracked_axles.get(axle_id, {}).get('crossed', False))
+
+    def next_axle_expiry(self):
+        with self.lock:
+            return self.axle_expiry.next_deadline()
+
+    def cleanup_old_axles(self, current_time=None):
+        """Buang track gandar yang tidak terlihat selama axle_timeout; dipanggil oleh ExpiryScheduler."""
+        evicted = []
+        with self.lock:
+            current_time = self.clock.time() if current_time is None else current_time
+            for axle_id in self.axle_expiry.pop_due(current_time):
+                axle_data = self.tracked_axles.get(axle_id)
+                if axle_data is None:
+                    continue
+                # last_seen diperbarui tiap frame tanpa menyentuh heap; jadwalkan ulang bila masih aktif.
+                deadline = axle_data['last_seen'] + self.axle_timeout
+                if deadline > current_time:
+                    self.axle_expiry.schedule(deadline, axle_id)
+                    continue
+                del self.tracked_axles[axle_id]
+                evicted.append(axle_id)
+        return evicted
+    
+    def force_vehicle_separation(self, vehicle_queue):
+        with self.lock:
+            if self.current_vehicle_id:
+                vehicle_id_to_finalize = self.current_vehicle_id
+                self.log.warning("🚨 TRIGGER EKSTERNAL: memaksa finalisasi", rate_limit=False, vehicle_id=vehicle_id_to_finalize)
+
+                vehicle_queue.finalize_vehicle_from_overhead(self.current_vehicle_id)
+                self.current_vehicle_id = None
+                self.reset_tracking_system()
+                self.log.warning("🚨 TRIGGER EKSTERNAL: sistem deteksi garis berhasil direset", rate_limit=False)
+            else:
+                self.log.info("TRIGGER EKSTERNAL: diterima, tetapi tidak ada kendaraan aktif. Diabaikan.")
+
+class FrontalVehicleManager:
+    def __init__(self, vehicle_queue, transaction_area, clock, metrics, log=None):
+        self.clock = clock
+        self.log = log or get_logger()
+        self.vehicle_queue = vehicle_queue
+        self.transaction_area = transaction_area
+        self.zone = ZoneGeometry(transaction_area)
+        self.lock = TimedLock('frontal_manager', metrics)
+        self.zone_occupied = False
+        self.zone_clear_confirmation_time = None
+        self.zone_clear_delay = 0.5
+
+    def get_next_vehicle_for_processing(self):
+        with self.vehicle_queue.lock:
+            return self.vehicle_queue.index.first_waiting()
+
+    def update_status_based_on_zone(self, detections):
+        with self.lock:
+            current_time = self.clock.time()
+            vehicle_is_in_transaction_zone = self.zone.any_in_zone(detections.xyxy)
+
+            if vehicle_is_in_transaction_zone:
+                if not self.zone_occupied:
+                    self.zone_occupied = True
+                    self.log.info("🏁 ZONA TRANSAKSI TERISI")
+                self.zone_clear_confirmation_time = None
+            else:
+                if self.zone_occupied:
+                    if self.zone_clear_confirmation_time is None:
+                        self.zone_clear_confirmation_time = current_time
+                    elif current_time - self.zone_clear_confirmation_time > self.zone_clear_delay:
+                        self.zone_occupied = False
+                        self.log.info("✅ ZONA TRANSAKSI KOSONG")
+
+            current_vehicle_id = self.vehicle_queue.current_processing_vehicle
+            
+            if not current_vehicle_id and self.zone_occupied:
+                next_vehicle_id = self.get_next_vehicle_for_processing()
+                if next_vehicle_id:
+                    self.log.info("🆕 Zona terisi, mengambil kendaraan dari antrean (FIFO)", vehicle_id=next_vehicle_id)
+                    self.vehicle_queue.set_current_processing_vehicle(next_vehicle_id)
+
+            elif current_vehicle_id:
+                vehicle = self.vehicle_queue.get_vehicle(current_vehicle_id)
+                if not vehicle: return
+
+                if not self.zone_occupied and vehicle.has_entered_transaction_zone:
+                    self.log.info("🏁 Kendaraan dianggap telah KELUAR ZONA TRANSAKSI", vehicle_id=current_vehicle_id)
+                    self.vehicle_queue.complete_current_vehicle()
+                
+                elif (vehicle.transaction_start_time and 
+                      current_time - vehicle.transaction_start_time > vehicle.max_transaction_time):
+                    if not self.zone_occupied:
+                        self.log.warning("⚠️ TIMEOUT & ZONA KOSONG: kendaraan dipaksa selesai", rate_limit=False, vehicle_id=current_vehicle_id)
+                        self.vehicle_queue.complete_current_vehicle()
+                    else:
+                        if not vehicle.timeout_extended:
+                            self.log.warning("⏰ TIMEOUT tapi zona masih terisi, waktu diperpanjang", vehicle_id=current_vehicle_id)
+                            vehicle.max_transaction_time = 60
+                            vehicle.timeout_extended = True
+                            self.vehicle_queue.record_transition('updated', vehicle)
+
+
+class Lane:
+    """
+    Satu lajur tol: kamera overhead dan frontal, antrean kendaraan, detektor
+    garis dan zona transaksi. Semua dependensi diberikan lewat konstruktor
+    sehingga beberapa lajur bisa berjalan di satu proses maupun di proses
+    worker (lane_worker.py).
+
+    - models : {'overhead': ..., 'frontal': ...}, YOLO atau ServiceModel; boleh
+               masih kosong saat lajur dibuat asal diisi sebelum start()
+    - frames : tujuan frame ter-encode, punya publish(camera, jpeg, metadata)
+               dan has_viewers(camera) (FrameBroadcaster atau proxy worker)
+    - emit   : emit(event, data=None) untuk event Socket.IO lajur ini
+    - save_transaction : fungsi dari transaction_store.transaction_sink (Firestore dan/atau
+                         store SQLite lokal) atau None
+    """
+    def __init__(self, lane_config, clock, metrics, models, frames, emit, save_transaction=None,
+                 skip_encode_without_viewers=True):
+        self.lane_id = lane_config['id']
+        self.name = lane_config['name']
+        self.clock = clock
+        self.metrics = metrics
+        self.models = models
+        self.frames = frames
+        self.emit = emit
+        self.skip_encode_without_viewers = skip_encode_without_viewers
+        self.rtsp_urls = lane_config.get('rtsp_urls', {})
+        self.transaction_area = lane_config['transaction_area']
+        self.line_coords = lane_config['line_crossing_detector']['line_coords']
+        self.replay_config = lane_config.get('replay', {})
+        self.replay_enabled = self.replay_config.get('enabled', False)
+        self.motion_gate_config = lane_config.get('motion_gate', {})
+        self.capture_config = lane_config.get('capture_workers', {})
+        # Overhead: YOLO tiap k frame, frame di antaranya memakai box hasil BoxPropagator.
+        self.detection_interval_config = lane_config.get('detection_interval', {})
+        roi_config = lane_config.get('inference_roi', {})
+        self.inference_roi = {camera: InferenceROI.from_config(roi_config.get(camera)) for camera in CAMERAS}
+
+        # Log lajur ini hanya masuk antrean (logs.py); aman dipanggil sambil memegang lock.
+        self.log = get_logger(lane=self.lane_id)
+
+        self.vehicle_queue = VehicleQueue(clock, lane_config['vehicle_queue'], metrics, emit, save_transaction,
+                                          log=self.log)
+        self.line_detector = LineCrossingDetector(clock, lane_config['line_crossing_detector'], metrics,
+                                                  frame_width=640, frame_height=480, log=self.log)
+        self.vehicle_queue.line_detector = self.line_detector
+        self.frontal_manager = FrontalVehicleManager(self.vehicle_queue, self.transaction_area, clock, metrics,
+                                                     log=self.log)
+        # Layer overlay statis disiapkan sekali per konfigurasi lajur.
+        self.line_overlay = LineOverlay(self.line_coords)
+        self.zone_overlay = ZoneOverlay(self.transaction_area)
+
+        # Snapshot + journal state (lane_state.py): restart lajur melanjutkan antrean dan counter ID yang sama.
+        self.journal = create_lane_journal(lane_config, metrics)
+        if self.journal is not None:
+            self.restore_state(self.journal.load())
+            self.vehicle_queue.journal = self.journal
+            self.line_detector.journal = self.journal
+
+        self.video_streams = {}
+        self.replay_streams = {}
+        self.tasks_started = False
+        self._register_gauges()
+
+    def _register_gauges(self):
+        self.metrics.register_gauge('vehicle_queue.waiting', lambda: self.vehicle_queue.index.waiting_count())
+        self.metrics.register_gauge('vehicle_queue.size', lambda: len(self.vehicle_queue.vehicles))
+        self.metrics.register_gauge('vehicle_queue.expiry_entries', lambda: len(self.vehicle_queue.index.expiry))
+        self.metrics.register_gauge('line_detector.axle_expiry_entries', lambda: len(self.line_detector.axle_expiry))
+        self.metrics.register_gauge('line_detector.tracked_axles', lambda: len(self.line_detector.tracked_axles))
+        for camera in CAMERAS:
+            self.metrics.register_gauge(
+                f'{camera}.stream_stale',
+                lambda camera=camera: int(self.video_streams[camera].is_stale()) if camera in self.video_streams else None)
+
+    def register_expiry(self, scheduler):
+        scheduler.register(f'{self.lane_id}.vehicles', self.vehicle_queue.next_expiry,
+                           self.vehicle_queue.cleanup_old_vehicles, metrics=self.metrics, label='vehicles')
+        scheduler.register(f'{self.lane_id}.axle_tracks', self.line_detector.next_axle_expiry,
+                           self.line_detector.cleanup_old_axles, metrics=self.metrics, label='axle_tracks')
+
+    def restore_state(self, state):
+        if not state:
+            return
+        try:
+            self.vehicle_queue.restore_state(state['vehicles'], state['queue'])
+            if state['line']:
+                self.line_detector.restore_state(state['line'])
+        except (KeyError, TypeError, ValueError) as e:
+            self.log.error("❌ State lajur tersimpan tidak valid, lajur mulai dari kosong", rate_limit=False, error=e)
+            self.vehicle_queue.restore_state({}, None)
+            return
+        self.log.info("♻️ Lajur melanjutkan state sebelum restart", rate_limit=False,
+                      vehicles=len(self.vehicle_queue.vehicles), counter=self.vehicle_queue.vehicle_counter,
+                      processing=self.vehicle_queue.current_processing_vehicle)
+
+    def capture_state(self):
+        """(seq, state) untuk snapshot lane_state; lock diambil dengan urutan frontal → garis → antrean."""
+        with self.frontal_manager.lock, self.line_detector.lock, self.vehicle_queue.lock:
+            return self.journal.last_seq, {
+                'vehicles': {vehicle_id: vehicle.to_state() for vehicle_id, vehicle in self.vehicle_queue.vehicles.items()},
+                'queue': self.vehicle_queue.queue_state(),
+                'line': self.line_detector.line_state(),
+            }
+
+    def record_reset(self, event):
+        """Dipanggil sambil memegang line_detector.lock dan vehicle_queue.lock setelah reset."""
+        if self.journal is not None:
+            self.journal.record(event, clear=True, queue=self.vehicle_queue.queue_state(),
+                                line=self.line_detector.line_state())
+
+    def start(self, start_task):
+        """Jalankan kedua loop kamera lajur ini lewat start_task(target) (thread/greenlet)."""
+        if self.tasks_started:
+            return
+        self.tasks_started = True
+        if self.journal is not None:
+            self.journal.start(self.capture_state)
+        start_task(self.run_overhead)
+        start_task(self.run_frontal)
+
+    def create_motion_gate(self, camera_name):
+        if not self.motion_gate_config.get('enabled', False):
+            return AlwaysInferGate()
+        margin = self.motion_gate_config.get('roi_margin', 100)
+        if camera_name == 'overhead':
+            roi = roi_around_line(self.line_coords, margin)
+        else:
+            roi = roi_around_area(self.transaction_area, margin)
+        return MotionGate(
+            roi, self.clock,
+            pixel_threshold=self.motion_gate_config.get('pixel_threshold', 25),
+            min_changed_ratio=self.motion_gate_config.get('min_changed_ratio', 0.005),
+            heartbeat_seconds=self.motion_gate_config.get('heartbeat_seconds', 1.0),
+            hold_seconds=self.motion_gate_config.get('hold_seconds', 2.0),
+            metrics=self.metrics, name=camera_name
+        )
+
+    def prepare_replay_streams(self):
+        # Kedua sumber replay didaftarkan bersamaan agar jam replay langsung sinkron.
+        if not self.replay_streams:
+            for name in CAMERAS:
+                self.replay_streams[name] = ReplayVideoStream(self.replay_config[name], self.clock, name,
+                                                              metrics=self.metrics, clock_name=f'{self.lane_id}.{name}')
+
+    def open_video_stream(self, camera_name):
+        """Membuka stream RTSP, atau file rekaman bila mode replay aktif."""
+        if not self.replay_enabled and self.capture_config.get('enabled', False):
+            # Decode di proses sendiri: crash decoder tidak ikut mematikan lajur/server.
+            vs = CaptureProcess(self.rtsp_urls[camera_name], camera_name, clock=self.clock, metrics=self.metrics,
+                                ring_slots=self.capture_config.get('ring_slots', 4),
+                                restart_delay=self.capture_config.get('restart_delay', 2.0)).start()
+            self.video_streams[camera_name] = vs
+            return vs
+        if not self.replay_enabled:
+            vs = OptimizedVideoStream(src=self.rtsp_urls[camera_name], clock=self.clock, metrics=self.metrics, name=camera_name).start()
+            self.video_streams[camera_name] = vs
+            return vs
+
+        self.prepare_replay_streams()
+        self.video_streams[camera_name] = self.replay_streams[camera_name]
+        return self.replay_streams[camera_name].start()
+
+    def report_replay_finished(self, camera_name, vs):
+        self.log.info("🎞️ Replay selesai", rate_limit=False, camera=camera_name, summary=vs.summary())
+
+    def should_encode(self, camera_name):
+        if not self.skip_encode_without_viewers or self.frames.has_viewers(camera_name):
+            return True
+        self.metrics.increment(f'{camera_name}.encode_skipped')
+        return False
+
+    def reset_classification(self):
+        """Reset manual untuk lajur ini (soft reset)."""
+        self.log.warning("Sistem direset secara manual", rate_limit=False, reset_type="soft")
+
+        if self.vehicle_queue.current_processing_vehicle:
+            with self.frontal_manager.lock:
+                self.vehicle_queue.complete_current_vehicle()
+
+        # Urutan lock garis → antrean; keduanya dipegang agar reset tercatat utuh di journal state.
+        with self.line_detector.lock, self.vehicle_queue.lock:
+            self.vehicle_queue.vehicles.clear()
+            self.vehicle_queue.index.clear()
+            self.vehicle_queue.current_processing_vehicle = None
+
+            self.line_detector.reset_tracking_system()
+            self.line_detector.current_vehicle_id = None
+            self.record_reset('reset')
+
+    def hard_reset(self):
+        """Reset total (Hard Reset) yang mengembalikan semua counter lajur ini ke 0."""
+        self.log.warning("🚨 HARD RESET DARI CLIENT! Mereset semua ID dan state.", rate_limit=False, reset_type="hard")
+
+        with self.line_detector.lock, self.vehicle_queue.lock:
+            self.vehicle_queue.vehicles.clear()
+            self.vehicle_queue.index.clear()
+            self.vehicle_queue.current_processing_vehicle = None
+            self.vehicle_queue.vehicle_counter = 0
+            self.log.info("Antrian kendaraan dan counter ID direset ke 0.")
+
+            self.line_detector.reset_tracking_system()
+            self.line_detector.current_vehicle_id = None
+            self.line_detector.axle_id_counter = 0
+            self.log.info("Sistem deteksi garis dan counter axle direset.")
+            self.record_reset('hard_reset')
+
+    def obs_trigger(self, data=None):
+        self.log.info("✅ EVENT DITERIMA: 'obs_trigger'", rate_limit=False, data=data)
+        self.line_detector.force_vehicle_separation(self.vehicle_queue)
+
+    def run_command(self, name, data=None):
+        """Menjalankan perintah dashboard (nama event dari LANE_COMMANDS) pada lajur ini."""
+        if name == 'reset_classification':
+            self.reset_classification()
+        elif name == 'hard_reset_system':
+            self.hard_reset()
+        elif name == 'obs_trigger':
+            self.obs_trigger(data)
+
+    def metrics_snapshot(self):
+        return self.metrics.snapshot()
+
+    def run_overhead(self):
+        vs = self.open_video_stream('overhead')
+        self.log.info("Stream video dimulai", camera='overhead')
+    
+        pacer = FramePacer(target_fps=30, clock=self.clock, metrics=self.metrics, name='overhead')
+        last_seq = -1
+        small_frame = np.empty((480, 640, 3), dtype=np.uint8)
+        motion_gate = self.create_motion_gate('overhead')
+        detect_schedule = DetectionSchedule.from_config(self.detection_interval_config)
+        propagator = BoxPropagator(max_match_distance=self.line_detector.max_match_distance)
+        class_names = None
+    
+        while True:
+            frame_start = time.perf_counter()
+            with self.metrics.stage('overhead', 'frame_wait'):
+                packet = vs.read_next(last_seq, timeout=1.0)
+            if packet is None or vs.is_stale():
+                if vs.finished:
+                    self.report_replay_finished('overhead', vs)
+                    break
+                if packet is not None:
+                    last_seq = packet.seq
+                    vs.release(packet.image)
+                self.frames.publish('overhead', placeholder_frame_jpeg(), {
+                    'connection_status': 'stale' if packet is not None else 'disconnected',
+                    'detected_axles': 0,
+                    'system_status': 'STANDBY'
+                })
+                pacer.reset()
+                continue
+            last_seq = packet.seq
+            frame = packet.image
+
+            try:
+                with self.metrics.stage('overhead', 'resize'):
+                    cv2.resize(frame, (640, 480), dst=small_frame, interpolation=cv2.INTER_LINEAR)
+            except cv2.error:
+                continue
+            finally:
+                vs.release(frame) 
+
+            self.metrics.observe('overhead.frame_age_seconds', self.clock.time() - packet.timestamp)
+            # Selama kendaraan masih aktif di garis, detektor selalu dijalankan.
+            lane_active = self.line_detector.vehicle_body_touching_line or self.line_detector.current_vehicle_id is not None
+            with self.metrics.stage('overhead', 'motion_gate'):
+                run_inference = motion_gate.should_infer(small_frame, force=lane_active)
+            results = []
+            if not run_inference:
+                detections = Detections.empty()
+                propagator.reset()
+                detect_schedule.reset()
+            elif detect_schedule.should_detect():
+                with self.metrics.stage('overhead', 'inference'):
+                    results = run_detector(self.models['overhead'], small_frame, self.inference_roi['overhead'])
+                detections = Detections.from_results(results)
+                detect_schedule.detected(detections)
+                if detect_schedule.every > 1:
+                    propagator.correct(detections, packet.timestamp)
+                if results:
+                    class_names = results[0].names
+            else:
+                # Uji lintasan garis di bawah tetap berjalan pada posisi hasil interpolasi.
+                with self.metrics.stage('overhead', 'interpolate'):
+                    detections = propagator.predict(packet.timestamp)
+                detect_schedule.interpolated()
+                self.metrics.increment('overhead.frames_interpolated')
+            with self.metrics.stage('overhead', 'tracking'):
+                self.line_detector.update_axle_tracking(detections, self.vehicle_queue)
+        
+            # Tanpa penonton, frame tidak perlu digambar maupun di-encode.
+            if not self.should_encode('overhead'):
+                self.metrics.observe_stage('overhead', 'frame_total', time.perf_counter() - frame_start)
+                pacer.wait()
+                continue
+
+            with self.metrics.stage('overhead', 'plot'):
+                draw_boxes(small_frame, detections, class_names)
+                self.line_overlay.apply(small_frame, self.line_detector.vehicle_body_touching_line)
+                overhead_vehicle_id = self.line_detector.current_vehicle_id
+                if overhead_vehicle_id:
+                    cv2.putText(small_frame, f'Current Overhead Vehicle: {overhead_vehicle_id}', (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+
+            with self.metrics.stage('overhead', 'encode'):
+                ret, buffer = cv2.imencode('.jpg', small_frame, [cv2.IMWRITE_JPEG_QUALITY, 75])
+            if not ret: continue
+        
+            data_to_emit = {
+                # Gambar tampak membeku hanya ditandai di dashboard; deteksi tetap berjalan.
+                'connection_status': 'stale' if vs.frozen else 'connected',
+                'vehicle_id': "---", 
+                'axle_count': 0, 
+                'classification': "--", 
+                'detection_time': "--:--:--"
+            }
+        
+            current_vehicle = self.vehicle_queue.get_current_vehicle_data()
+            vehicle_to_display = current_vehicle
+            if not vehicle_to_display:
+                last_overhead_id = self.line_detector.current_vehicle_id
+                vehicle_to_display = self.vehicle_queue.get_vehicle(last_overhead_id)
+
+            if vehicle_to_display:
+                data_to_emit.update({
+                    'vehicle_id': vehicle_to_display.vehicle_id, 
+                    'axle_count': vehicle_to_display.axle_count,
+                    'classification': vehicle_to_display.classification, 
+                    'detection_time': vehicle_to_display.detection_time
+                })
+        
+            data_to_emit['detected_axles'] = int(np.count_nonzero(detections.cls == 0))
+            data_to_emit['system_status'] = 'AKTIF' if self.line_detector.vehicle_body_touching_line else 'STANDBY'
+        
+            with self.metrics.stage('overhead', 'emit'):
+                self.frames.publish('overhead', buffer.tobytes(), data_to_emit)
+            self.metrics.observe_stage('overhead', 'frame_total', time.perf_counter() - frame_start)
+            self.metrics.increment('overhead.frames_emitted')
+        
+            pacer.wait()
+
+    def run_frontal(self):
+        vs = self.open_video_stream('frontal')
+        self.log.info("Stream video dimulai", camera='frontal')
+
+        pacer = FramePacer(target_fps=30, clock=self.clock, metrics=self.metrics, name='frontal')
+        last_seq = -1
+        small_frame = np.empty((480, 640, 3), dtype=np.uint8)
+        motion_gate = self.create_motion_gate('frontal')
+        class_names = None
+    
+        while True:
+            frame_start = time.perf_counter()
+            with self.metrics.stage('frontal', 'frame_wait'):
+                packet = vs.read_next(last_seq, timeout=1.0)
+            if packet is None or vs.is_stale():
+                if vs.finished:
+                    self.report_replay_finished('frontal', vs)
+                    break
+                if packet is not None:
+                    last_seq = packet.seq
+                    vs.release(packet.image)
+                self.frames.publish('frontal', placeholder_frame_jpeg(), {
+                    'connection_status': 'stale' if packet is not None else 'disconnected',
+                    'tire_config': None
+                })
+                pacer.reset()
+                continue
+            last_seq = packet.seq
+            frame = packet.image
+
+            try:
+                with self.metrics.stage('frontal', 'resize'):
+                    cv2.resize(frame, (640, 480), dst=small_frame, interpolation=cv2.INTER_LINEAR)
+            except cv2.error:
+                continue
+            finally:
+                vs.release(frame)
+
+            self.metrics.observe('frontal.frame_age_seconds', self.clock.time() - packet.timestamp)
+            zone_active = self.frontal_manager.zone_occupied or self.vehicle_queue.current_processing_vehicle is not None
+            with self.metrics.stage('frontal', 'motion_gate'):
+                run_inference = motion_gate.should_infer(small_frame, force=zone_active)
+            results = []
+            # Frame yang dilewati motion gate tidak dicatat sebagai sampel inferensi 0 detik.
+            if run_inference:
+                with self.metrics.stage('frontal', 'inference'):
+                    results = run_detector(self.models['frontal'], small_frame, self.inference_roi['frontal'])
+
+            tracking_start = time.perf_counter()
+            detections = Detections.from_results(results)
+            if results:
+                class_names = results[0].names
+            self.frontal_manager.update_status_based_on_zone(detections)
+            tire_config, is_bus = detect_tire_config_from_detections(detections)
+
+            if self.vehicle_queue.current_processing_vehicle:
+                proc_id = self.vehicle_queue.current_processing_vehicle
+                vehicle = self.vehicle_queue.get_vehicle(proc_id)
+                if vehicle:
+                    if is_bus:
+                        vehicle.bus_detection_count += 1
+                    if vehicle.bus_detection_count > 5 and not vehicle.is_classified:
+                        with self.vehicle_queue.lock:
+                            vehicle.classification = "Golongan 1"
+                            vehicle.is_classified = True
+                            self.vehicle_queue.record_transition('updated', vehicle)
+                            self.emit('update_analysis_panel', {
+                                'vehicle_id': vehicle.vehicle_id,
+                                'classification': vehicle.classification,
+                                'axle_count': vehicle.axle_count,
+                                'detection_time': datetime.fromtimestamp(self.clock.time(), tz=self.vehicle_queue.indonesia_tz).strftime("%H:%M:%S")
+                            })
+
+                    if tire_config and not vehicle.config_locked:
+                        self.vehicle_queue.update_vehicle_tire_config(proc_id, tire_config)
+
+                    elif not vehicle.config_locked:
+                        self.vehicle_queue.update_vehicle_tire_config(proc_id, vehicle.tire_config)
+            self.metrics.observe_stage('frontal', 'tracking', time.perf_counter() - tracking_start)
+
+            if not self.should_encode('frontal'):
+                self.metrics.observe_stage('frontal', 'frame_total', time.perf_counter() - frame_start)
+                pacer.wait()
+                continue
+
+            with self.metrics.stage('frontal', 'plot'):
+                draw_boxes(small_frame, detections, class_names)
+                self.zone_overlay.apply(small_frame)
+
+            with self.metrics.stage('frontal', 'encode'):
+                ret, buffer = cv2.imencode('.jpg', small_frame, [cv2.IMWRITE_JPEG_QUALITY, 75])
+            if not ret: continue
+        
+            data_to_emit = {
+                # Gambar tampak membeku hanya ditandai di dashboard; deteksi tetap berjalan.
+                'connection_status': 'stale' if vs.frozen else 'connected',
+                'tire_config': tire_config,
+                'vehicle_id': "---", 
+                'classification': "--", 
+                'detection_time': "--:--:--", 
+                'status': 'idle'
+            }
+        
+            current_vehicle = self.vehicle_queue.get_current_vehicle_data()
+            if current_vehicle:
+                data_to_emit.update({
+                    'vehicle_id': current_vehicle.vehicle_id, 
+                    'classification': current_vehicle.classification,
+                    'detection_time': current_vehicle.detection_time, 
+                    'status': current_vehicle.status 
+                })
+        
+
+            with self.metrics.stage('frontal', 'emit'):
+                self.frames.publish('frontal', buffer.tobytes(), data_to_emit)
+            self.metrics.observe_stage('frontal', 'frame_total', time.perf_counter() - frame_start)
+            self.metrics.increment('frontal.frames_emitted')
+            pacer.wait()
@@ -0,0 +1,210 @@
+"""
+State lajur yang tahan crash: snapshot berkala + journal append-only.
+
+- {directory}/lane_{id}.snapshot.json : state lengkap (kendaraan, counter ID,
+  kendaraan yang sedang diproses, state garis) beserta seq event terakhir
+  yang sudah tercakup. Ditulis atomik (file sementara + fsync + rename).
+- {directory}/lane_{id}.journal.jsonl : satu baris per transisi state
+  (created, updated, finalized, in_transaction, completed, removed, line,
+  reset, hard_reset) dengan seq naik. Dikosongkan setiap snapshot baru.
+
+Saat start, load() membaca snapshot lalu memutar ulang event journal dengan
+seq > seq snapshot. Pemanggil record() hanya memasukkan event ke antrean
+(dipanggil sambil memegang lock lajur); thread writer yang menulis ke disk.
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+from logs import get_logger
+
+log = get_logger()
+
+
+def _apply(state, event):
+    """Terapkan satu event journal ke state hasil snapshot."""
+    if event.get('clear'):
+        state['vehicles'] = {}
+    vehicle = event.get('vehicle')
+    if vehicle is not None:
+        state['vehicles'][vehicle['vehicle_id']] = vehicle
+    removed = event.get('removed')
+    if removed is not None:
+        state['vehicles'].pop(removed, None)
+    if event.get('queue') is not None:
+        state['queue'] = event['queue']
+    if event.get('line') is not None:
+        state['line'] = event['line']
+
+
+class LaneJournal:
+    def __init__(self, directory, lane_id, snapshot_interval=5.0, fsync_interval=1.0, metrics=None):
+        self.directory = directory
+        self.lane_id = lane_id
+        self.snapshot_path = os.path.join(directory, f'lane_{lane_id}.snapshot.json')
+        self.journal_path = os.path.join(directory, f'lane_{lane_id}.journal.jsonl')
+        self.snapshot_interval = snapshot_interval
+        self.fsync_interval = fsync_interval
+        self.metrics = metrics
+        self.queue = queue.Queue()
+        self.seq_lock = threading.Lock()
+        self.last_seq = 0
+        self.capture = None
+        self.stopped = threading.Event()
+        self.thread = None
+        os.makedirs(directory, exist_ok=True)
+
+    def load(self):
+        """State tersimpan {'vehicles', 'queue', 'line'} atau None bila belum ada; seq dilanjutkan dari sini."""
+        start = time.perf_counter()
+        state, snapshot_seq = None, 0
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                snapshot_seq = snapshot['seq']
+                state = snapshot['state']
+            except (OSError, ValueError, KeyError) as e:
+                log.error("❌ Snapshot state lajur tidak dapat dibaca, diabaikan", rate_limit=False,
+                          lane=self.lane_id, error=e)
+
+        replayed = 0
+        last_seq = snapshot_seq
+        if os.path.exists(self.journal_path):
+            good_end = 0
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    # Baris terakhir bisa terpotong bila proses mati saat menulis.
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        break
+                    good_end += len(line)
+                    if event['seq'] <= snapshot_seq:
+                        continue
+                    if state is None:
+                        state = {'vehicles': {}, 'queue': None, 'line': None}
+                    _apply(state, event)
+                    last_seq = event['seq']
+                    replayed += 1
+            # Potong sisa yang rusak sebelum writer membuka journal dengan mode append;
+            # tanpa ini event berikutnya tersambung ke baris terpotong dan ikut hilang.
+            discarded = os.path.getsize(self.journal_path) - good_end
+            if discarded:
+                os.truncate(self.journal_path, good_end)
+                log.warning("⚠️ Ekor journal state yang rusak dibuang", rate_limit=False, lane=self.lane_id,
+                            discarded_bytes=discarded)
+
+        self.last_seq = last_seq
+        seconds = time.perf_counter() - start
+        if self.metrics:
+            self.metrics.set_gauge('state.restore_seconds', round(seconds, 4))
+            self.metrics.set_gauge('state.replayed_events', replayed)
+        if state is not None:
+            log.info("♻️ State lajur dipulihkan", rate_limit=False, lane=self.lane_id, vehicles=len(state['vehicles']),
+                     replayed_events=replayed, ms=round(seconds * 1000, 1))
+        return state
+
+    def record(self, event, vehicle=None, removed=None, clear=False, queue=None, line=None):
+        """Catat transisi state. Dipanggil sambil memegang lock yang melindungi perubahan itu."""
+        item = {'event': event}
+        if vehicle is not None:
+            item['vehicle'] = vehicle
+        if removed is not None:
+            item['removed'] = removed
+        if clear:
+            item['clear'] = True
+        if queue is not None:
+            item['queue'] = queue
+        if line is not None:
+            item['line'] = line
+        # seq dan urutan antrean harus sama agar snapshot bisa memotong journal tepat di seq-nya.
+        with self.seq_lock:
+            self.last_seq += 1
+            item['seq'] = self.last_seq
+            self.queue.put_nowait(item)
+
+    def start(self, capture):
+        """
+        capture() -> (seq, state): diambil sambil memegang semua lock lajur, sehingga
+        state mencakup tepat event dengan seq <= seq.
+        """
+        self.capture = capture
+        self.thread = threading.Thread(target=self._run, daemon=True, name=f'lane-journal-{self.lane_id}')
+        self.thread.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self, timeout=5.0):
+        if self.stopped.is_set():
+            return
+        self.stopped.set()
+        if self.thread:
+            self.thread.join(timeout)
+
+    def _run(self):
+        journal = open(self.journal_path, 'a', encoding='utf-8')
+        covered_seq = 0
+        next_snapshot = time.monotonic() + self.snapshot_interval
+        next_fsync = time.monotonic() + self.fsync_interval
+        dirty = False
+        while True:
+            stopping = self.stopped.is_set()
+            items = []
+            try:
+                items.append(self.queue.get(timeout=0.2))
+                while True:
+                    items.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            lines = [json.dumps(item) + '\n' for item in items if item['seq'] > covered_seq]
+            if lines:
+                journal.writelines(lines)
+                journal.flush()
+                dirty = True
+
+            now = time.monotonic()
+            if dirty and now >= next_fsync:
+                os.fsync(journal.fileno())
+                dirty = False
+                next_fsync = now + self.fsync_interval
+            if now >= next_snapshot or stopping:
+                covered_seq = self._write_snapshot()
+                # Semua event <= covered_seq ada di snapshot; journal dimulai ulang dari kosong.
+                journal.close()
+                journal = open(self.journal_path, 'w', encoding='utf-8')
+                dirty = False
+                next_snapshot = time.monotonic() + self.snapshot_interval
+            if stopping:
+                break
+        journal.close()
+
+    def _write_snapshot(self):
+        start = time.perf_counter()
+        seq, state = self.capture()
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'seq': seq, 'saved_at': time.time(), 'state': state}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        if self.metrics:
+            self.metrics.observe('state.snapshot_seconds', time.perf_counter() - start)
+            self.metrics.increment('state.snapshots')
+        return seq
+
+
+def create_lane_journal(lane_config, metrics=None):
+    """LaneJournal sesuai "state_persistence" lajur; None bila nonaktif atau lajur sedang replay."""
+    settings = lane_config.get('state_persistence', {})
+    if not settings.get('enabled', False) or lane_config.get('replay', {}).get('enabled', False):
+        return None
+    return LaneJournal(settings.get('directory', 'lane_state'), lane_config['id'],
+                       snapshot_interval=settings.get('snapshot_interval', 5.0),
+                       fsync_interval=settings.get('fsync_interval', 1.0),
+                       metrics=metrics)
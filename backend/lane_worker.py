@@ -0,0 +1,344 @@
+"""
+Mode worker multi-lajur (config "lane_workers": N > 0): lajur dibagi round-robin
+ke N proses terpisah sehingga decode video, inferensi dan GIL satu kelompok
+lajur tidak menahan lajur lain. Tiap worker memuat model sendiri (dibagi antar
+lajurnya lewat InferenceService), Firestore writer dan scheduler kedaluwarsa.
+
+Proses web hanya melayani Flask/Socket.IO dan hanya membaca: JPEG dan metadata
+tiap kamera ditulis worker ke SharedRing milik proses web. Notifikasi frame
+lewat antrean `frames` tersendiri (boleh dibuang), sedangkan antrean `events`
+membawa event analisis, status ready dan snapshot metrik. Perintah
+dashboard (reset, obs_trigger) dikirim lewat antrean per worker. Worker yang
+mati dinyalakan ulang tanpa mengganggu lajur lain.
+"""
+import atexit
+import functools
+import json
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+
+from clock import create_clock
+from expiry import ExpiryScheduler
+from lane import CAMERAS, Lane, lane_warmup_rois
+from logs import get_logger, register_log_gauges, setup_logging
+from metrics import LaneMetrics, merge_snapshots
+from shm_ring import SharedRing
+
+METRICS_PUSH_INTERVAL = 1.0
+VIEWER_SYNC_INTERVAL = 0.2
+# Event analisis yang belum terkirim ke proses web; lebih dari ini dibuang (dan dihitung).
+EMIT_BUFFER_SIZE = 10000
+WORKER_RESTART_DELAY = 5.0
+FRAME_RING_SLOTS = 4
+# JPEG 640x480 kualitas 75 biasanya < 100 KB; sisa slot untuk metadata JSON.
+FRAME_RING_SLOT_BYTES = 1024 * 1024
+
+log = get_logger()
+
+
+class WorkerFrameSink:
+    """
+    Pengganti FrameBroadcaster di dalam worker. JPEG dan metadata ditulis ke
+    SharedRing kamera itu, lalu proses web diberi notifikasi tanpa menunggu;
+    bila antrean penuh, notifikasi dibuang (proses web selalu membaca frame
+    terbaru). has_viewers() membaca flag bersama yang diperbarui proses web.
+    """
+    def __init__(self, frames, lane_id, rings, viewer_flags, flag_offset, metrics):
+        self.frames = frames
+        self.lane_id = lane_id
+        self.rings = rings
+        self.viewer_flags = viewer_flags
+        self.flag_offset = flag_offset
+        self.metrics = metrics
+
+    def publish(self, camera, jpeg_bytes, metadata):
+        try:
+            seq = self.rings[camera].write(jpeg_bytes, json.dumps(metadata).encode(), time.time())
+        except ValueError:
+            self.metrics.increment(f'{camera}.frames_dropped_ipc')
+            return
+        try:
+            self.frames.put_nowait((self.lane_id, camera, seq))
+        except queue.Full:
+            self.metrics.increment(f'{camera}.frames_dropped_ipc')
+
+    def has_viewers(self, camera):
+        return bool(self.viewer_flags[self.flag_offset + CAMERAS.index(camera)])
+
+
+class EventForwarder:
+    """
+    emit() lajur dipanggil sambil memegang vehicle_queue.lock, jadi tidak boleh
+    menunggu antrean antar-proses. Event masuk buffer lokal tanpa blokir; thread
+    forwarder yang menunggu bila proses web lambat mengosongkan `events`.
+    """
+    def __init__(self, events, metrics, buffer_size=EMIT_BUFFER_SIZE):
+        self.events = events
+        self.metrics = metrics
+        self.buffer = queue.Queue(maxsize=buffer_size)
+
+    def emitter(self, lane_id):
+        return functools.partial(self.emit, lane_id)
+
+    def emit(self, lane_id, event, data=None):
+        try:
+            self.buffer.put_nowait(('emit', lane_id, event, data))
+        except queue.Full:
+            self.metrics.increment('worker.emit_dropped')
+            log.warning("⚠️ Buffer event ke proses web penuh, event dibuang", lane=lane_id, event=event)
+
+    def run(self):
+        while True:
+            self.events.put(self.buffer.get())
+
+
+def _push_metrics(events, worker_index, worker_metrics, lanes):
+    while True:
+        time.sleep(METRICS_PUSH_INTERVAL)
+        try:
+            events.put_nowait(('worker_metrics', worker_index, worker_metrics.snapshot()))
+            for lane_id, lane in lanes.items():
+                events.put_nowait(('lane_metrics', lane_id, lane.metrics_snapshot()))
+        except queue.Full:
+            pass
+
+
+def run_worker(worker_index, lane_entries, config, events, frames, commands, viewer_flags, ring_names):
+    """
+    Entry point proses worker. lane_entries: [(indeks_lajur_global, lane_config), ...];
+    indeks global menentukan posisi flag penonton lajur itu di viewer_flags.
+    ring_names: {(lane_id, kamera): nama SharedRing} yang dibuat proses web.
+    """
+    os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = 'rtsp_transport;tcp'
+    setup_logging(config.get('logging'))
+    from firestore_manager import create_firestore_manager
+    from model_backends import load_lane_models
+    from transaction_store import create_transaction_store, transaction_sink
+
+    clock = create_clock(config.get('replay', {}))
+    worker_metrics = LaneMetrics()
+    register_log_gauges(worker_metrics)
+    try:
+        models, inference_service = load_lane_models(
+            config, worker_metrics, lane_warmup_rois([lane_config for _, lane_config in lane_entries]))
+    except Exception as e:
+        log.error("❌ Worker gagal memuat model", rate_limit=False, worker=worker_index, error=e)
+        return
+
+    # Tiap worker punya spool sendiri agar dua proses tidak menulis file yang sama.
+    spool_path = config.get('firestore_writer', {}).get('spool_path', 'transaction_spool.jsonl')
+    spool_stem, spool_ext = os.path.splitext(spool_path)
+    firestore_manager = create_firestore_manager(config, metrics=worker_metrics,
+                                                 spool_path=f'{spool_stem}.worker{worker_index}{spool_ext}')
+    worker_metrics.register_gauge('firestore.pending',
+                                  lambda: firestore_manager.writer.pending() if firestore_manager else None)
+    # Semua worker menulis ke file SQLite yang sama; proses web membacanya untuk endpoint laporan.
+    transaction_store = create_transaction_store(config, metrics=worker_metrics)
+
+    scheduler = ExpiryScheduler(clock, metrics=worker_metrics)
+    forwarder = EventForwarder(events, worker_metrics)
+    worker_metrics.register_gauge('worker.emit_buffered', forwarder.buffer.qsize)
+    skip_encode = config.get('broadcast', {}).get('skip_encode_without_viewers', True)
+    lanes = {}
+    for lane_index, lane_config in lane_entries:
+        lane_id = lane_config['id']
+        metrics = LaneMetrics()
+        save_transaction = transaction_sink(lane_id, firestore_manager, transaction_store)
+        rings = {camera: SharedRing.attach(ring_names[(lane_id, camera)], FRAME_RING_SLOTS, FRAME_RING_SLOT_BYTES)
+                 for camera in CAMERAS}
+        lane = Lane(lane_config, clock, metrics, models,
+                    WorkerFrameSink(frames, lane_id, rings, viewer_flags, lane_index * len(CAMERAS), metrics),
+                    forwarder.emitter(lane_id), save_transaction, skip_encode)
+        lane.register_expiry(scheduler)
+        lanes[lane_id] = lane
+
+    def start_task(target):
+        threading.Thread(target=target, daemon=True).start()
+
+    # Semua sumber replay didaftarkan dulu agar jam replay worker ini langsung sinkron.
+    for lane in lanes.values():
+        if lane.replay_enabled:
+            lane.prepare_replay_streams()
+    for lane in lanes.values():
+        lane.start(start_task)
+    start_task(scheduler.run)
+    start_task(forwarder.run)
+    start_task(functools.partial(_push_metrics, events, worker_index, worker_metrics, lanes))
+    log.info("👷 Worker menjalankan lajur", rate_limit=False, worker=worker_index, pid=os.getpid(), lanes=','.join(lanes))
+    events.put(('ready', worker_index))
+
+    while True:
+        command = commands.get()
+        if command is None:
+            break
+        lane_id, name, data = command
+        lane = lanes.get(lane_id)
+        if lane is not None:
+            lane.run_command(name, data)
+
+    scheduler.stop()
+    for lane in lanes.values():
+        for vs in lane.video_streams.values():
+            vs.stop()
+    if inference_service:
+        inference_service.stop()
+
+
+class LaneWorkerPool:
+    """
+    Sisi proses web dari mode worker: membuat SharedRing frame tiap lajur/kamera,
+    menjalankan (dan menyalakan ulang) proses worker, meneruskan frame/event
+    dari worker ke on_frame/on_emit, menyalin status penonton ke flag bersama
+    dan mengirim perintah ke worker pemilik lajur.
+    """
+    def __init__(self, lane_configs, config, worker_count, on_frame, on_emit, has_viewers, on_ready=None,
+                 queue_size=256):
+        self.context = mp.get_context('spawn')
+        self.config = config
+        self.on_frame = on_frame
+        self.on_emit = on_emit
+        self.has_viewers = has_viewers
+        self.on_ready = on_ready
+        self.lane_ids = [lane_config['id'] for lane_config in lane_configs]
+        self.events = self.context.Queue(maxsize=queue_size)
+        # Notifikasi frame punya antrean sendiri agar tidak pernah menyesaki event analisis.
+        self.frames = self.context.Queue(maxsize=queue_size)
+        self.viewer_flags = self.context.Array('b', len(self.lane_ids) * len(CAMERAS), lock=False)
+        self.commands = [self.context.Queue() for _ in range(worker_count)]
+        self.assignments = [[] for _ in range(worker_count)]
+        self.worker_of = {}
+        for lane_index, lane_config in enumerate(lane_configs):
+            worker_index = lane_index % worker_count
+            self.assignments[worker_index].append((lane_index, lane_config))
+            self.worker_of[lane_config['id']] = worker_index
+        self.rings = {}
+        self.delivered = {}
+        self.processes = [None] * worker_count
+        self.died_at = {}
+        self.stopped = False
+        self.lane_snapshots = {}
+        self.worker_snapshots = {}
+        # Worker yang sudah memuat model dan menjalankan lajurnya (dikosongkan lagi saat worker mati).
+        self.ready_workers = set()
+
+    def start(self, start_task):
+        ring_prefix = f'avc_{os.getpid()}'
+        for lane_index, lane_id in enumerate(self.lane_ids):
+            for camera in CAMERAS:
+                self.rings[(lane_id, camera)] = SharedRing.create(f'{ring_prefix}_l{lane_index}_{camera}',
+                                                                  FRAME_RING_SLOTS, FRAME_RING_SLOT_BYTES)
+                self.delivered[(lane_id, camera)] = 0
+        for worker_index in range(len(self.assignments)):
+            self._spawn(worker_index)
+        atexit.register(self.stop)
+        start_task(self._pump_events)
+        start_task(self._pump_frames)
+        start_task(self._monitor)
+        return self
+
+    def _spawn(self, worker_index):
+        lane_entries = self.assignments[worker_index]
+        ring_names = {key: ring.name for key, ring in self.rings.items()}
+        # Bukan daemon: worker sendiri menjalankan proses capture per kamera.
+        process = self.context.Process(
+            target=run_worker,
+            args=(worker_index, lane_entries, self.config, self.events, self.frames, self.commands[worker_index],
+                  self.viewer_flags, ring_names),
+            name=f'lane-worker-{worker_index}')
+        process.start()
+        self.processes[worker_index] = process
+        self.died_at.pop(worker_index, None)
+        log.info("👷 Worker dimulai", rate_limit=False, worker=worker_index,
+                 lanes=','.join(lane_config['id'] for _, lane_config in lane_entries))
+
+    def _pump_events(self):
+        while not self.stopped:
+            event = self.events.get()
+            kind = event[0]
+            if kind == 'emit':
+                _, lane_id, name, data = event
+                self.on_emit(lane_id, name, data)
+            elif kind == 'lane_metrics':
+                self.lane_snapshots[event[1]] = event[2]
+            elif kind == 'worker_metrics':
+                self.worker_snapshots[event[1]] = event[2]
+            elif kind == 'ready':
+                self.ready_workers.add(event[1])
+                if self.on_ready:
+                    self.on_ready(event[1])
+
+    def _pump_frames(self):
+        while not self.stopped:
+            lane_id, camera, _ = self.frames.get()
+            self._deliver_frame(lane_id, camera)
+
+    def _deliver_frame(self, lane_id, camera):
+        # Selalu ambil frame terbaru di ring; notifikasi lama untuk frame yang sudah lewat diabaikan.
+        key = (lane_id, camera)
+        slot = self.rings[key].read()
+        if slot is None or slot.seq <= self.delivered[key]:
+            return
+        self.delivered[key] = slot.seq
+        self.on_frame(lane_id, camera, slot.data, json.loads(slot.meta))
+
+    def _monitor(self):
+        while not self.stopped:
+            for lane_index, lane_id in enumerate(self.lane_ids):
+                for camera_index, camera in enumerate(CAMERAS):
+                    self.viewer_flags[lane_index * len(CAMERAS) + camera_index] = int(self.has_viewers(lane_id, camera))
+            for worker_index, process in enumerate(self.processes):
+                if process.is_alive() or self.stopped:
+                    continue
+                now = time.monotonic()
+                if worker_index not in self.died_at:
+                    self.died_at[worker_index] = now
+                    log.error("❌ Worker berhenti, akan dinyalakan ulang", rate_limit=False, worker=worker_index,
+                              exitcode=process.exitcode, restart_in=WORKER_RESTART_DELAY)
+                    self.worker_snapshots.pop(worker_index, None)
+                    self.ready_workers.discard(worker_index)
+                elif now - self.died_at[worker_index] >= WORKER_RESTART_DELAY:
+                    self._spawn(worker_index)
+            time.sleep(VIEWER_SYNC_INTERVAL)
+
+    def all_ready(self):
+        return len(self.ready_workers) == len(self.processes)
+
+    def send_command(self, lane_id, name, data=None):
+        self.commands[self.worker_of[lane_id]].put((lane_id, name, data))
+
+    def stop(self):
+        if self.stopped:
+            return
+        self.stopped = True
+        for commands in self.commands:
+            commands.put(None)
+        for process in self.processes:
+            if process is None:
+                continue
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        for ring in self.rings.values():
+            ring.close()
+
+
+class RemoteLane:
+    """
+    Proxy di proses web untuk lajur yang berjalan di worker. `metrics` adalah
+    metrik sisi web lajur itu (broadcaster, MJPEG, snapshot); snapshot-nya
+    digabung dengan snapshot terakhir yang dikirim worker.
+    """
+    def __init__(self, pool, lane_config, metrics):
+        self.pool = pool
+        self.lane_id = lane_config['id']
+        self.name = lane_config['name']
+        self.metrics = metrics
+
+    def run_command(self, name, data=None):
+        self.pool.send_command(self.lane_id, name, data)
+
+    def metrics_snapshot(self):
+        return merge_snapshots(self.pool.lane_snapshots.get(self.lane_id), self.metrics.snapshot())
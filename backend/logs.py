@@ -0,0 +1,181 @@
+"""
+Logging terstruktur tanpa I/O di jalur panas. Pemanggil (loop kamera, kode
+yang memegang vehicle_queue.lock / line_detector.lock) hanya memasukkan
+LogRecord ke antrean; format dan tulis ke konsol/vehicle_detection.log
+dilakukan thread QueueListener.
+
+    log = get_logger(lane='1')
+    log.info("Kendaraan terklasifikasi", vehicle_id='V0001', classification='Golongan 2')
+    # 2025-07-12 01:33:22,536 - vehicle_detection - INFO - Kendaraan terklasifikasi | lane=1 | vehicle_id=V0001 | ...
+
+Pesan yang sama (teks + konteks terikat) dibatasi `burst` kali per `interval`
+detik; jumlah yang ditekan dilaporkan sebagai suppressed=N pada pesan
+berikutnya yang lolos. rate_limit=False untuk pesan yang tidak boleh hilang.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+LOGGER_NAME = 'vehicle_detection'
+FILE_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class ContextFormatter(logging.Formatter):
+    """Menambahkan konteks key=value (extra 'context') di belakang pesan, dipisah ' | '."""
+    def formatMessage(self, record):
+        context = getattr(record, 'context', None)
+        if context:
+            record.message = record.message + ''.join(f' | {key}={value}' for key, value in context.items())
+        return super().formatMessage(record)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler yang tidak pernah memblokir: bila antrean penuh, record dibuang
+    dan dihitung. Format pesan ditunda ke thread listener (prepare() bawaan
+    memformat di thread pemanggil).
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RateLimiter:
+    """Token bucket per kunci pesan: `burst` pesan, diisi ulang penuh tiap `interval` detik."""
+    def __init__(self, burst=10, interval=5.0):
+        self.burst = burst
+        self.interval = interval
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def allow(self, key, now=None):
+        """Mengembalikan (boleh_dicatat, jumlah pesan yang ditekan sejak pesan terakhir yang lolos)."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = [float(self.burst), now, 0]
+            tokens, last, suppressed = bucket
+            tokens = min(float(self.burst), tokens + (now - last) * self.burst / self.interval)
+            if tokens < 1.0:
+                bucket[:] = [tokens, now, suppressed + 1]
+                return False, 0
+            bucket[:] = [tokens - 1.0, now, 0]
+            return True, suppressed
+
+
+class ContextLogger:
+    """Logger dengan konteks terikat (mis. lane, camera); field tambahan per panggilan sebagai kwargs."""
+    def __init__(self, logger, context=None, limiter=None):
+        self.logger = logger
+        self.context = dict(context or {})
+        self.limiter = limiter
+        self.context_key = tuple(self.context.items())
+
+    def bind(self, **context):
+        return ContextLogger(self.logger, {**self.context, **context}, self.limiter)
+
+    def _log(self, level, msg, fields, rate_limit=True, exc_info=None):
+        if not self.logger.isEnabledFor(level):
+            return
+        suppressed = 0
+        if rate_limit and self.limiter is not None:
+            allowed, suppressed = self.limiter.allow((msg, self.context_key))
+            if not allowed:
+                return
+        context = {**self.context, **fields} if fields else self.context
+        if suppressed:
+            context = {**context, 'suppressed': suppressed}
+        self.logger.log(level, msg, exc_info=exc_info, extra={'context': context})
+
+    def debug(self, msg, rate_limit=True, **fields):
+        self._log(logging.DEBUG, msg, fields, rate_limit)
+
+    def info(self, msg, rate_limit=True, **fields):
+        self._log(logging.INFO, msg, fields, rate_limit)
+
+    def warning(self, msg, rate_limit=True, **fields):
+        self._log(logging.WARNING, msg, fields, rate_limit)
+
+    def error(self, msg, rate_limit=True, **fields):
+        self._log(logging.ERROR, msg, fields, rate_limit)
+
+    def exception(self, msg, rate_limit=True, **fields):
+        self._log(logging.ERROR, msg, fields, rate_limit, exc_info=True)
+
+
+_limiter = RateLimiter()
+_settings = None
+_handler = None
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(settings=None):
+    """
+    Pasang QueueHandler + QueueListener (konsol dan file) sekali per proses,
+    sesuai config "logging": level, file, console, queue_size, rate_limit {burst, interval}.
+    """
+    global _settings, _handler, _listener
+    settings = settings or {}
+    with _setup_lock:
+        if _listener is not None:
+            return
+        _settings = settings
+        rate_limit = settings.get('rate_limit', {})
+        _limiter.burst = rate_limit.get('burst', _limiter.burst)
+        _limiter.interval = rate_limit.get('interval', _limiter.interval)
+
+        handlers = []
+        if settings.get('console', True):
+            console = logging.StreamHandler(sys.stdout)
+            console.setFormatter(ContextFormatter(CONSOLE_FORMAT))
+            handlers.append(console)
+        if settings.get('file', 'vehicle_detection.log'):
+            file_handler = logging.FileHandler(settings.get('file', 'vehicle_detection.log'), encoding='utf-8')
+            file_handler.setFormatter(ContextFormatter(FILE_FORMAT))
+            handlers.append(file_handler)
+
+        _handler = DroppingQueueHandler(queue.Queue(maxsize=settings.get('queue_size', 10000)))
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.setLevel(settings.get('level', 'INFO'))
+        logger.addHandler(_handler)
+        logger.propagate = False
+        _listener = logging.handlers.QueueListener(_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def logging_settings():
+    """Pengaturan yang dipakai setup_logging di proses ini, untuk diteruskan ke proses anak."""
+    return _settings
+
+
+def register_log_gauges(metrics):
+    metrics.register_gauge('logging.queued', lambda: log_stats()['queued'])
+    metrics.register_gauge('logging.dropped', lambda: log_stats()['dropped'])
+
+
+def get_logger(**context):
+    return ContextLogger(logging.getLogger(LOGGER_NAME), context, _limiter)
+
+
+def log_stats():
+    """Untuk gauge /metrics: panjang antrean log dan record yang dibuang karena antrean penuh."""
+    if _handler is None:
+        return {'queued': 0, 'dropped': 0}
+    return {'queued': _handler.queue.qsize(), 'dropped': _handler.dropped}
@@ -0,0 +1,238 @@
+import time
+from collections import deque
+from threading import Lock
+
+from logs import get_logger
+
+log = get_logger()
+
+
+class RollingHistogram:
+    """Menyimpan N sampel terakhir; persentil dihitung hanya saat diminta."""
+    def __init__(self, window=1000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def snapshot(self):
+        samples = sorted(self.samples)
+        if not samples:
+            return {'count': self.count, 'p50': None, 'p95': None, 'p99': None, 'max': None, 'mean': None}
+
+        def percentile(q):
+            return samples[min(len(samples) - 1, int(round(q * (len(samples) - 1))))]
+
+        return {
+            'count': self.count,
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'max': samples[-1],
+            'mean': sum(samples) / len(samples),
+        }
+
+
+class _StageTimer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class LaneMetrics:
+    """
+    Registry metrik untuk satu lajur: histogram per tahap pemrosesan tiap kamera,
+    waktu tunggu lock, counter (frame drop/duplikat, dsb) dan gauge.
+    Semua durasi dalam detik.
+    """
+    def __init__(self, window=1000):
+        self.window = window
+        self.started_at = time.time()
+        self.stages = {}
+        self.lock_waits = {}
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.gauge_callbacks = {}
+        self.registry_lock = Lock()
+
+    def _histogram(self, table, key):
+        histogram = table.get(key)
+        if histogram is None:
+            with self.registry_lock:
+                histogram = table.setdefault(key, RollingHistogram(self.window))
+        return histogram
+
+    def stage(self, camera, stage_name):
+        return _StageTimer(self._histogram(self.stages, (camera, stage_name)))
+
+    def observe_stage(self, camera, stage_name, seconds):
+        self._histogram(self.stages, (camera, stage_name)).observe(seconds)
+
+    def observe_lock_wait(self, lock_name, seconds):
+        self._histogram(self.lock_waits, lock_name).observe(seconds)
+
+    def observe(self, name, value):
+        self._histogram(self.histograms, name).observe(value)
+
+    def increment(self, name, amount=1):
+        with self.registry_lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    def register_gauge(self, name, callback):
+        """Gauge yang nilainya baru dihitung saat endpoint metrik dibaca."""
+        self.gauge_callbacks[name] = callback
+
+    def snapshot(self):
+        stages = {}
+        for (camera, stage_name), histogram in list(self.stages.items()):
+            stages.setdefault(camera, {})[stage_name] = histogram.snapshot()
+
+        gauges = dict(self.gauges)
+        for name, callback in list(self.gauge_callbacks.items()):
+            try:
+                gauges[name] = callback()
+            except Exception as e:
+                gauges[name] = None
+                log.error("❌ Gagal membaca gauge", gauge=name, error=e)
+
+        with self.registry_lock:
+            counters = dict(self.counters)
+
+        return {
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'stages': stages,
+            'lock_wait': {name: h.snapshot() for name, h in list(self.lock_waits.items())},
+            'histograms': {name: h.snapshot() for name, h in list(self.histograms.items())},
+            'counters': counters,
+            'gauges': gauges,
+        }
+
+    def to_prometheus(self, prefix='avc'):
+        return prometheus_text([({}, self.snapshot())], prefix)
+
+
+def merge_snapshots(base, extra):
+    """
+    Gabungkan dua snapshot LaneMetrics (mis. snapshot dari proses worker lajur
+    dan metrik broadcaster di proses web). Counter dijumlahkan; histogram,
+    tahap dan gauge dari `extra` menimpa yang bernama sama.
+    """
+    if not base:
+        return extra
+    merged = {
+        'uptime_seconds': base.get('uptime_seconds'),
+        'stages': {camera: dict(stages) for camera, stages in base.get('stages', {}).items()},
+        'lock_wait': {**base.get('lock_wait', {}), **extra.get('lock_wait', {})},
+        'histograms': {**base.get('histograms', {}), **extra.get('histograms', {})},
+        'counters': dict(base.get('counters', {})),
+        'gauges': {**base.get('gauges', {}), **extra.get('gauges', {})},
+    }
+    for camera, stages in extra.get('stages', {}).items():
+        merged['stages'].setdefault(camera, {}).update(stages)
+    for name, value in extra.get('counters', {}).items():
+        merged['counters'][name] = merged['counters'].get(name, 0) + value
+    return merged
+
+
+def prometheus_text(labelled_snapshots, prefix='avc'):
+    """
+    Format eksposisi Prometheus untuk satu atau beberapa snapshot LaneMetrics,
+    mis. [({'lane': '1'}, snapshot1), ({'lane': '2'}, snapshot2)]. Baris TYPE
+    ditulis sekali per metrik walaupun metriknya muncul di beberapa lajur.
+    Counter/gauge yang namanya sudah dipakai metrik bertipe lain diberi akhiran
+    tipenya (mis. _gauge), tidak digabung ke family yang sama.
+    """
+    labelled_snapshots = list(labelled_snapshots)
+    families = {}
+
+    def family(metric, metric_type):
+        existing = families.get(metric)
+        if existing is not None and existing[0] != metric_type:
+            metric = f'{metric}_{metric_type}'
+        return metric, families.setdefault(metric, (metric_type, []))[1]
+
+    def label_set(labels):
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{k}="{v}"' for k, v in labels.items()) + '}'
+
+    def summary(metric, labels, data):
+        metric, lines = family(metric, 'summary')
+        for key, quantile in (('p50', '0.5'), ('p95', '0.95'), ('p99', '0.99')):
+            if data[key] is not None:
+                lines.append(f'{metric}{label_set({**labels, "quantile": quantile})} {data[key]:.6f}')
+        lines.append(f'{metric}_count{label_set(labels)} {data["count"]}')
+
+    for base_labels, snapshot in labelled_snapshots:
+        for camera, stages in snapshot['stages'].items():
+            for stage_name, data in stages.items():
+                summary(f'{prefix}_stage_seconds', {**base_labels, 'camera': camera, 'stage': stage_name}, data)
+
+        for lock_name, data in snapshot['lock_wait'].items():
+            summary(f'{prefix}_lock_wait_seconds', {**base_labels, 'lock': lock_name}, data)
+
+        for name, data in snapshot['histograms'].items():
+            summary(f'{prefix}_{name.replace(".", "_")}', dict(base_labels), data)
+
+    # Semua summary didaftarkan dulu agar akhiran tipe tidak bergantung pada urutan lajur.
+    for base_labels, snapshot in labelled_snapshots:
+        for name, value in snapshot['counters'].items():
+            metric, lines = family(f'{prefix}_{name.replace(".", "_")}_total', 'counter')
+            lines.append(f'{metric}{label_set(base_labels)} {value}')
+
+        for name, value in snapshot['gauges'].items():
+            if isinstance(value, (int, float)):
+                metric, lines = family(f'{prefix}_{name.replace(".", "_")}', 'gauge')
+                lines.append(f'{metric}{label_set(base_labels)} {value}')
+
+    lines = []
+    for metric, (metric_type, samples) in families.items():
+        lines.append(f'# TYPE {metric} {metric_type}')
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+
+class TimedLock:
+    """Pengganti threading.Lock yang mencatat lama menunggu lock ke LaneMetrics."""
+    def __init__(self, name, metrics):
+        self.name = name
+        self.metrics = metrics
+        self._lock = Lock()
+
+    def acquire(self, blocking=True, timeout=-1):
+        start = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        self.metrics.observe_lock_wait(self.name, time.perf_counter() - start)
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
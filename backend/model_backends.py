@@ -0,0 +1,161 @@
+import os
+import time
+
+import cv2
+import numpy as np
+
+from logs import get_logger
+
+log = get_logger()
+
+BACKENDS = ('torch', 'onnxruntime', 'openvino')
+
+
+def exported_model_path(pt_path, backend, int8=False):
+    """
+    Lokasi model hasil export_models.py untuk file .pt tertentu, mengikuti
+    penamaan Ultralytics (models/best-overhead.onnx,
+    models/best-overhead_openvino_model/, models/best-overhead_int8_openvino_model/).
+    """
+    stem, _ = os.path.splitext(pt_path)
+    if backend == 'torch':
+        return pt_path
+    if backend == 'onnxruntime':
+        return f"{stem}.int8.onnx" if int8 else f"{stem}.onnx"
+    if backend == 'openvino':
+        return f"{stem}_int8_openvino_model" if int8 else f"{stem}_openvino_model"
+    raise ValueError(f"Backend inferensi tidak dikenal: '{backend}' (pilihan: {', '.join(BACKENDS)})")
+
+
+def load_detector(pt_path, backend='torch', device='cpu', int8=False, path=None):
+    """
+    Memuat detektor YOLO dengan backend yang dipilih. Model hasil ekspor tetap
+    dibungkus ultralytics.YOLO sehingga run_detector dan Detections.from_results
+    bekerja sama persis untuk semua backend.
+    """
+    from ultralytics import YOLO
+
+    if backend == 'torch':
+        model = YOLO(pt_path).to(device)
+        model.fuse()
+        return model
+
+    model_path = path or exported_model_path(pt_path, backend, int8)
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(
+            f"Model '{model_path}' untuk backend {backend} belum ada. "
+            f"Jalankan: python export_models.py --backend {backend}{' --int8' if int8 else ''}")
+    return YOLO(model_path, task='detect')
+
+
+def read_calibration_frames(video_path, count, roi=None, frame_size=(640, 480)):
+    """
+    Ambil `count` frame yang tersebar merata dari rekaman, di-resize seperti
+    loop kamera dan (opsional) di-crop ke ROI inferensi.
+    """
+    capture = cv2.VideoCapture(video_path)
+    total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or count
+    step = max(1, total // count)
+    frames = []
+    index = 0
+    while len(frames) < count:
+        grabbed = capture.grab()
+        if not grabbed:
+            break
+        if index % step == 0:
+            _, frame = capture.retrieve()
+            frame = cv2.resize(frame, frame_size, interpolation=cv2.INTER_LINEAR)
+            if roi is not None:
+                frame = frame[roi.y1:roi.y2, roi.x1:roi.x2]
+            frames.append(np.ascontiguousarray(frame))
+        index += 1
+    capture.release()
+    return frames
+
+
+def letterbox_tensor(frame, imgsz):
+    """Pra-proses setara Ultralytics (letterbox, BGR->RGB, 0..1, NCHW) untuk kalibrasi ONNX Runtime."""
+    height, width = frame.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top, left = (imgsz - new_h) // 2, (imgsz - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = resized
+    tensor = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return np.ascontiguousarray(tensor[None])
+
+
+def warm_up(model, rois=(), runs=1, frame_shape=(480, 640, 3)):
+    """
+    Inferensi pada frame hitam agar inisialisasi predictor, alokasi CUDA dan
+    pemilihan kernel tidak dibayar kendaraan pertama. Dijalankan untuk frame
+    penuh dan tiap bentuk crop ROI yang dipakai lajur (imgsz bisa berbeda).
+    """
+    from inference import run_detector
+
+    frame = np.zeros(frame_shape, dtype=np.uint8)
+    shapes = {}
+    for roi in (None, *rois):
+        key = None if roi is None else (roi.x2 - roi.x1, roi.y2 - roi.y1, roi.imgsz)
+        shapes.setdefault(key, roi)
+    for roi in shapes.values():
+        for _ in range(runs):
+            run_detector(model, frame, roi)
+
+
+def load_lane_models(config, metrics=None, warmup_rois=None):
+    """
+    Memuat model overhead dan frontal sekali per proses sesuai inference_backend,
+    lalu (bila inference_service.enabled) membungkusnya dengan InferenceService
+    sehingga semua lajur di proses ini berbagi bobot dan di-batch bersama.
+    Kedua model dimuat, di-fuse dan di-warm-up (config "startup") secara paralel.
+    warmup_rois: {'overhead': [InferenceROI, ...], 'frontal': [...]} dari lajur-lajur.
+    Mengembalikan ({'overhead': ..., 'frontal': ...}, service atau None).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    import torch
+    from inference_service import InferenceService
+
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    log.info("Menggunakan device inferensi", rate_limit=False, device=device)
+
+    backend_config = config.get('inference_backend', {})
+    backend_name = backend_config.get('type', 'torch')
+    backend_int8 = backend_config.get('int8', False)
+    startup_config = config.get('startup', {})
+    warmup_runs = startup_config.get('warmup_runs', 2)
+    warmup_rois = warmup_rois or {}
+    model_paths = config['model_paths']
+
+    def load(camera):
+        start = time.perf_counter()
+        model = load_detector(model_paths[camera], backend_name, device, int8=backend_int8)
+        loaded = time.perf_counter()
+        if warmup_runs > 0:
+            warm_up(model, [roi for roi in warmup_rois.get(camera, ()) if roi is not None], warmup_runs)
+        done = time.perf_counter()
+        if metrics:
+            metrics.set_gauge(f'startup.{camera}_model_load_seconds', round(loaded - start, 3))
+            metrics.set_gauge(f'startup.{camera}_model_warmup_seconds', round(done - loaded, 3))
+        log.info("🧠 Model dimuat", rate_limit=False, camera=camera, load_seconds=round(loaded - start, 2),
+                 warmup_seconds=round(done - loaded, 2))
+        return model
+
+    cameras = ('overhead', 'frontal')
+    workers = len(cameras) if startup_config.get('parallel_model_loading', True) else 1
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='model-loader') as executor:
+        models = dict(zip(cameras, executor.map(load, cameras)))
+    log.info("Model overhead dan frontal berhasil dimuat", rate_limit=False, overhead=model_paths['overhead'],
+             frontal=model_paths['frontal'], backend=backend_name + (' (INT8)' if backend_int8 else ''))
+
+    service_config = config.get('inference_service', {})
+    if not service_config.get('enabled', True):
+        return models, None
+    service = InferenceService(
+        max_batch=service_config.get('max_batch', 8),
+        max_wait=service_config.get('max_wait_ms', 4) / 1000.0,
+        metrics=metrics
+    )
+    return {camera: service.register_model(camera, model) for camera, model in models.items()}, service
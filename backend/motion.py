@@ -0,0 +1,79 @@
+import cv2
+import numpy as np
+
+
+def roi_around_line(line_coords, margin, frame_width=640, frame_height=480):
+    x1, y1, x2, y2 = line_coords
+    return clip_roi((min(x1, x2) - margin, min(y1, y2) - margin,
+                     max(x1, x2) + margin, max(y1, y2) + margin), frame_width, frame_height)
+
+
+def roi_around_area(area, margin, frame_width=640, frame_height=480):
+    return clip_roi((area['x1'] - margin, area['y1'] - margin,
+                     area['x2'] + margin, area['y2'] + margin), frame_width, frame_height)
+
+
+def clip_roi(roi, frame_width, frame_height):
+    x1, y1, x2, y2 = roi
+    return (int(max(0, x1)), int(max(0, y1)), int(min(frame_width, x2)), int(min(frame_height, y2)))
+
+
+class MotionGate:
+    """
+    Gerbang murah sebelum YOLO: membandingkan ROI (diperkecil, grayscale) dengan
+    frame sebelumnya. Detektor dijalankan penuh selama ada gerakan (ditambah
+    `hold_seconds` setelahnya) dan hanya sesekali (`heartbeat_seconds`) saat lajur sepi.
+    """
+    def __init__(self, roi, clock, scale=0.25, pixel_threshold=25, min_changed_ratio=0.005,
+                 heartbeat_seconds=1.0, hold_seconds=2.0, metrics=None, name='camera'):
+        self.x1, self.y1, self.x2, self.y2 = roi
+        self.clock = clock
+        self.size = (max(1, int((self.x2 - self.x1) * scale)), max(1, int((self.y2 - self.y1) * scale)))
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_pixels = max(1, int(self.size[0] * self.size[1] * min_changed_ratio))
+        self.heartbeat_seconds = heartbeat_seconds
+        self.hold_seconds = hold_seconds
+        self.metrics = metrics
+        self.name = name
+        self.small = np.empty((self.size[1], self.size[0], 3), dtype=np.uint8)
+        self.gray = np.empty((self.size[1], self.size[0]), dtype=np.uint8)
+        self.previous_gray = None
+        self.diff = np.empty_like(self.gray)
+        self.last_motion_time = None
+        self.last_inference_time = None
+
+    def detect_motion(self, frame):
+        roi = frame[self.y1:self.y2, self.x1:self.x2]
+        cv2.resize(roi, self.size, dst=self.small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        if self.previous_gray is None:
+            self.previous_gray = self.gray.copy()
+            return True
+        cv2.absdiff(self.gray, self.previous_gray, dst=self.diff)
+        self.gray, self.previous_gray = self.previous_gray, self.gray
+        changed = cv2.countNonZero(cv2.threshold(self.diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)[1])
+        return changed >= self.min_changed_pixels
+
+    def should_infer(self, frame, force=False):
+        now = self.clock.time()
+        motion = self.detect_motion(frame)
+        if motion:
+            self.last_motion_time = now
+
+        run = (force or motion
+               or (self.last_motion_time is not None and now - self.last_motion_time <= self.hold_seconds)
+               or self.last_inference_time is None
+               or now - self.last_inference_time >= self.heartbeat_seconds)
+
+        if run:
+            self.last_inference_time = now
+        if self.metrics:
+            self.metrics.set_gauge(f'{self.name}.motion_active', int(motion))
+            self.metrics.increment(f'{self.name}.inference_run' if run else f'{self.name}.inference_skipped')
+        return run
+
+
+class AlwaysInferGate:
+    """Dipakai bila motion gate dimatikan di config.json."""
+    def should_infer(self, frame, force=False):
+        return True
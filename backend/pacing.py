@@ -0,0 +1,46 @@
+class FramePacer:
+    """
+    Penjadwal berbasis deadline untuk loop kamera. Setiap frame punya deadline
+    `interval` setelah deadline sebelumnya; loop hanya tidur selama sisa waktu
+    hingga deadline itu. Bila pemrosesan sudah melewati deadline, loop langsung
+    lanjut (secepat mungkin) dan keterlambatannya dilaporkan.
+    """
+    def __init__(self, target_fps, clock, metrics=None, name='camera', max_lag_frames=2):
+        self.interval = 1.0 / target_fps
+        self.clock = clock
+        self.metrics = metrics
+        self.name = name
+        # Tertinggal lebih dari ini: jadwal digeser, bukan dikejar dengan burst frame.
+        self.max_lag = self.interval * max_lag_frames
+        self.next_deadline = None
+        self.lag = 0.0
+
+    def reset(self):
+        self.next_deadline = None
+        self.lag = 0.0
+
+    def wait(self):
+        if self.clock.is_max_speed:
+            return 0.0
+
+        now = self.clock.time()
+        if self.next_deadline is None:
+            self.next_deadline = now
+
+        self.next_deadline += self.interval
+        remaining = self.next_deadline - now
+
+        if remaining > 0:
+            self.lag = 0.0
+            self.clock.sleep(remaining)
+        else:
+            self.lag = -remaining
+            if self.lag > self.max_lag:
+                self.next_deadline = now
+            if self.metrics:
+                self.metrics.increment(f'{self.name}.frames_late')
+
+        if self.metrics:
+            self.metrics.set_gauge(f'{self.name}.pacing_lag_current_seconds', round(self.lag, 4))
+            self.metrics.observe(f'{self.name}.pacing_lag_seconds', self.lag)
+        return self.lag
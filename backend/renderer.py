@@ -0,0 +1,79 @@
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+# Palet kelas yang sama dengan ultralytics.utils.plotting.colors, agar tampilan dashboard tidak berubah.
+_PALETTE_HEX = ('FF3838', 'FF9D97', 'FF701F', 'FFB21D', 'CFD231', '48F90A', '92CC17', '3DDB86', '1A9334', '00D4BB',
+                '2C99A8', '00C2FF', '344593', '6473FF', '0018EC', '8438FF', '520085', 'CB38FF', 'FF95C8', 'FF37C7')
+PALETTE = tuple((int(h[4:6], 16), int(h[2:4], 16), int(h[0:2], 16)) for h in _PALETTE_HEX)
+
+
+def class_color(class_id):
+    return PALETTE[int(class_id) % len(PALETTE)]
+
+
+def draw_boxes(frame, detections, names=None, line_width=2, font_scale=0.6):
+    """
+    Box dan label "kelas conf" langsung dari array Detections, pengganti
+    results[0].plot()/Annotator. Dipakai untuk hasil YOLO maupun box interpolasi.
+    """
+    if not len(detections):
+        return frame
+    boxes = detections.xyxy.astype(np.int32)
+    # Urutan terbalik seperti Annotator: box dengan confidence tertinggi digambar paling atas.
+    for (x1, y1, x2, y2), conf, class_id in zip(boxes[::-1], detections.conf[::-1], detections.cls[::-1]):
+        color = class_color(class_id)
+        cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), color, line_width)
+        label = f"{names[int(class_id)] if names else int(class_id)} {float(conf):.2f}"
+        (text_w, text_h), _ = cv2.getTextSize(label, FONT, font_scale, 1)
+        outside = y1 - text_h - 3 >= 0
+        label_y2 = y1 - text_h - 3 if outside else y1 + text_h + 3
+        cv2.rectangle(frame, (int(x1), int(y1)), (int(x1) + text_w, int(label_y2)), color, -1)
+        cv2.putText(frame, label, (int(x1), int(y1 - 2 if outside else y1 + text_h + 2)), FONT, font_scale,
+                    (255, 255, 255), 1)
+    return frame
+
+
+class LineOverlay:
+    """
+    Garis hitung gandar, titik ujung dan teks status. Koordinat, warna dan teks
+    untuk tiap status (AKTIF/STANDBY) disiapkan sekali per konfigurasi lajur;
+    primitif ini sendiri lebih murah digambar langsung daripada ditempel dari
+    layer ter-cache.
+    """
+    def __init__(self, line_coords):
+        x1, y1, x2, y2 = (int(v) for v in line_coords[:4])
+        self.start, self.end = (x1, y1), (x2, y2)
+        self.styles = {True: ((0, 255, 0), 4, 'Status: AKTIF'), False: ((0, 0, 255), 3, 'Status: STANDBY')}
+
+    def apply(self, frame, active):
+        color, thickness, status_text = self.styles[bool(active)]
+        cv2.line(frame, self.start, self.end, color, thickness)
+        cv2.circle(frame, self.start, 5, color, -1)
+        cv2.circle(frame, self.end, 5, color, -1)
+        cv2.putText(frame, status_text, (10, 60), FONT, 0.6, color, 2)
+        return frame
+
+
+class ZoneOverlay:
+    """
+    Zona transaksi semi-transparan. Blok warna isi disiapkan sekali dan blend
+    hanya dilakukan di dalam ROI zona, bukan copy + addWeighted satu frame penuh.
+    """
+    def __init__(self, area, color=(0, 255, 0), alpha=0.2, label='ZONA TRANSAKSI', frame_shape=(480, 640, 3)):
+        height, width = frame_shape[:2]
+        x1, y1 = max(area['x1'], 0), max(area['y1'], 0)
+        x2, y2 = min(area['x2'] + 1, width), min(area['y2'] + 1, height)
+        self.roi = (slice(y1, y2), slice(x1, x2))
+        self.fill = np.full((max(y2 - y1, 0), max(x2 - x1, 0), 3), color, dtype=np.uint8)
+        self.alpha = alpha
+        self.label = label
+        self.label_origin = (area['x1'] + 10, area['y1'] + 30)
+
+    def apply(self, frame):
+        if self.fill.size:
+            zone = frame[self.roi]
+            cv2.addWeighted(self.fill, self.alpha, zone, 1 - self.alpha, 0, dst=zone)
+        cv2.putText(frame, self.label, self.label_origin, FONT, 0.5, (255, 255, 255), 2)
+        return frame
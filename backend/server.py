@@ -1,28 +1,18 @@
-import cv2, base64, os, threading, time, json
-import torch
-import numpy as np
-from collections import deque
-from flask import Flask
-from flask_socketio import SocketIO, emit
-from ultralytics import YOLO
-import queue
-from threading import Lock
-from datetime import datetime
-import firebase_admin
-from firebase_admin import credentials, firestore
-import pytz
-
-def create_placeholder_frame(width=640, height=480):
-    frame = np.zeros((height, width, 3), dtype=np.uint8)
-    text = "STREAM TERPUTUS"
-    text_size = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1, 2)[0]
-    text_x = (width - text_size[0]) // 2
-    text_y = (height + text_size[1]) // 2
-    cv2.putText(frame, text, (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-    _, buffer = cv2.imencode('.jpg', frame)
-    return base64.b64encode(buffer).decode('utf-8')
-
-PLACEHOLDER_FRAME_B64 = create_placeholder_frame()
+import os, json, math, time, functools
+# Titik nol pengukuran cold start (/ready dan gauge startup.*_seconds).
+STARTED_AT = time.monotonic()
+from flask import Flask, Response, abort, jsonify, request
+from flask_socketio import SocketIO
+from datetime import datetime, timezone
+from clock import create_clock
+from metrics import LaneMetrics, prometheus_text
+from broadcaster import FrameBroadcaster
+from expiry import ExpiryScheduler
+from lane import CAMERAS, LANE_COMMANDS, Lane, lane_configs, lane_warmup_rois
+from lane_worker import LaneWorkerPool, RemoteLane
+from startup import StartupTracker
+from transaction_store import create_transaction_store, day_range, transaction_sink
+from logs import get_logger, register_log_gauges, setup_logging
 
 try:
     with open('config.json', 'r') as f:
@@ -37,798 +27,403 @@ except json.JSONDecodeError:
 
 os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = 'rtsp_transport;tcp'
 
+REPLAY_CONFIG = config.get('replay', {})
+REPLAY_ENABLED = REPLAY_CONFIG.get('enabled', False)
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'secret!key'
 socketio = SocketIO(app, cors_allowed_origins="*")
 
-device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-print(f"==========================================")
-print(f"Menggunakan device: {device}")
-print(f"==========================================")
-
-try:
-    model_overhead_path = config['model_paths']['overhead']
-    model_frontal_path = config['model_paths']['frontal']
-
-    model_overhead = YOLO(model_overhead_path).to(device)
-    model_frontal = YOLO(model_frontal_path).to(device)
-
-    model_overhead.fuse()
-    model_frontal.fuse()
-
-    print(f"Model '{model_overhead_path}' dan '{model_frontal_path}' berhasil dimuat ke device.")
-except Exception as e:
-    print(f"Gagal memuat model: {e}")
-    exit()
+# Metrik tingkat proses (inferensi, Firestore, scheduler kedaluwarsa); metrik per lajur ada di Lane.metrics.
+server_metrics = LaneMetrics()
+register_log_gauges(server_metrics)
+log = get_logger()
+
+# 'binary': JPEG mentah sebagai attachment biner Socket.IO ({kamera}_frame) dan
+# metadata terpisah ({kamera}_stream). 'base64': format lama, JPEG base64 di dalam JSON.
+FRAME_TRANSPORT = config.get('frame_transport', 'binary')
+
+BROADCAST_CONFIG = config.get('broadcast', {})
+# Tanpa penonton, JPEG tidak di-encode sama sekali.
+SKIP_ENCODE_WITHOUT_VIEWERS = BROADCAST_CONFIG.get('skip_encode_without_viewers', True)
+
+# Tanpa "lanes" di config.json hanya ada satu lajur (id '1') dari kunci tingkat atas.
+LANE_CONFIGS = lane_configs(config)
+DEFAULT_LANE_ID = LANE_CONFIGS[0]['id']
+# 0: semua lajur di proses server ini; N: lajur dibagi ke N proses worker (lane_worker.py).
+LANE_WORKERS = min(config.get('lane_workers', 0), len(LANE_CONFIGS))
+
+# Server langsung melayani HTTP/Socket.IO; model (atau worker lajur) disiapkan di latar belakang.
+startup = StartupTracker(STARTED_AT, ['lane_workers' if LANE_WORKERS > 0 else 'models'], metrics=server_metrics)
+
+# Diisi oleh main(); modul ini juga di-import ulang oleh proses worker (spawn).
+lanes = {}
+broadcasters = {}
+worker_pool = None
+expiry_scheduler = None
+inference_service = None
+firestore_manager = None
+# Diisi load_models() di latar belakang; lajur lokal memegang dict yang sama.
+models = {}
+# Salinan lokal transaksi (SQLite) untuk endpoint /transactions; pada mode worker hanya dibaca di sini.
+transaction_store = None
+
+def lane_namespace(lane_id):
+    return f'/lanes/{lane_id}'
+
+def namespaces_of(lane_id):
+    # Namespace default '/' tetap melayani dashboard lama dan diarahkan ke lajur pertama.
+    return ['/', lane_namespace(lane_id)] if lane_id == DEFAULT_LANE_ID else [lane_namespace(lane_id)]
+
+def emit_to_lane(lane_id, event, data=None):
+    if event == 'update_analysis_panel':
+        startup.note_classification()
+    for namespace in namespaces_of(lane_id):
+        if data is None:
+            socketio.emit(event, namespace=namespace)
+        else:
+            socketio.emit(event, data, namespace=namespace)
+
+def create_broadcaster(metrics):
+    return FrameBroadcaster(
+        socketio, CAMERAS,
+        transport=FRAME_TRANSPORT,
+        default_max_fps=BROADCAST_CONFIG.get('default_max_fps', 15),
+        max_fps_limit=BROADCAST_CONFIG.get('max_fps_limit', 30),
+        ack_timeout=BROADCAST_CONFIG.get('ack_timeout', 2.0),
+        snapshot_hold=BROADCAST_CONFIG.get('snapshot_hold', 5.0),
+        metrics=metrics
+    )
+
+def load_models():
+    """Memuat dan warm-up model lajur lokal (berjalan di latar belakang), lalu menandai startup siap."""
+    global inference_service
+    from model_backends import load_lane_models
+
+    startup.begin('models')
+    try:
+        loaded, inference_service = load_lane_models(config, server_metrics, lane_warmup_rois(LANE_CONFIGS))
+    except Exception as e:
+        # Server tetap hidup agar /ready bisa melaporkan penyebabnya.
+        startup.fail('models', f"Gagal memuat model: {e}")
+        return
+    models.update(loaded)
+    startup.done('models')
+
+def build_local_lanes():
+    """
+    Semua lajur di proses ini: clock, model, Firestore writer dan scheduler kedaluwarsa
+    dipakai bersama. Lajur dibuat langsung dengan dict `models` yang diisi load_models().
+    """
+    global expiry_scheduler, firestore_manager, transaction_store
+    from firestore_manager import create_firestore_manager
+
+    clock = create_clock(REPLAY_CONFIG)
+    firestore_manager = create_firestore_manager(config, metrics=server_metrics)
+    server_metrics.register_gauge('firestore.pending', lambda: firestore_manager.writer.pending() if firestore_manager else None)
+    transaction_store = create_transaction_store(config, metrics=server_metrics)
+    expiry_scheduler = ExpiryScheduler(clock, metrics=server_metrics)
+
+    for lane_config in LANE_CONFIGS:
+        lane_id = lane_config['id']
+        metrics = LaneMetrics()
+        broadcasters[lane_id] = create_broadcaster(metrics)
+        save_transaction = transaction_sink(lane_id, firestore_manager, transaction_store)
+        lane = Lane(lane_config, clock, metrics, models, broadcasters[lane_id],
+                    functools.partial(emit_to_lane, lane_id), save_transaction, SKIP_ENCODE_WITHOUT_VIEWERS)
+        lane.register_expiry(expiry_scheduler)
+        lanes[lane_id] = lane
+
+def on_worker_ready(worker_index):
+    log.info("👷 Worker siap", rate_limit=False, worker=worker_index)
+    if worker_pool.all_ready() and not startup.ready:
+        startup.done('lane_workers')
+
+def build_worker_lanes():
+    """Lajur berjalan di proses worker; proses ini hanya meneruskan frame dan event ke client."""
+    global worker_pool, transaction_store
+    transaction_store = create_transaction_store(config, writer=False)
+    worker_pool = LaneWorkerPool(
+        LANE_CONFIGS, config, LANE_WORKERS,
+        on_frame=lambda lane_id, camera, jpeg_bytes, metadata: broadcasters[lane_id].publish(camera, jpeg_bytes, metadata),
+        on_emit=emit_to_lane,
+        has_viewers=lambda lane_id, camera: broadcasters[lane_id].has_viewers(camera),
+        on_ready=on_worker_ready
+    )
+    for lane_config in LANE_CONFIGS:
+        lane_id = lane_config['id']
+        metrics = LaneMetrics()
+        broadcasters[lane_id] = create_broadcaster(metrics)
+        lanes[lane_id] = RemoteLane(worker_pool, lane_config, metrics)
+
+def start_stream_tasks():
+    if not hasattr(start_stream_tasks, 'tasks_started'):
+        for broadcaster in broadcasters.values():
+            broadcaster.start()
+        if worker_pool:
+            startup.begin('lane_workers')
+            worker_pool.start(socketio.start_background_task)
+        else:
+            # Loop kamera baru berjalan setelah model siap; sampai saat itu dashboard menerima stream kosong.
+            startup.when_ready(start_local_lanes)
+        start_stream_tasks.tasks_started = True
+
+def start_local_lanes():
+    # Semua sumber replay didaftarkan dulu agar jam replay langsung sinkron antar lajur.
+    for lane in lanes.values():
+        if lane.replay_enabled:
+            lane.prepare_replay_streams()
+    for lane in lanes.values():
+        lane.start(socketio.start_background_task)
+    socketio.start_background_task(target=expiry_scheduler.run)
+
+def lane_broadcaster(lane_id, camera_name):
+    broadcaster = broadcasters.get(lane_id or DEFAULT_LANE_ID)
+    if broadcaster is None or camera_name not in broadcaster.cameras:
+        abort(404)
+    return broadcaster
+
+@app.route('/lanes')
+def lanes_endpoint():
+    """Daftar lajur beserta namespace Socket.IO dan URL stream-nya."""
+    return jsonify([{
+        'id': lane_id,
+        'name': lane.name,
+        'default': lane_id == DEFAULT_LANE_ID,
+        'namespace': lane_namespace(lane_id),
+        'worker': worker_pool.worker_of[lane_id] if worker_pool else None,
+        'streams': {camera: f'/lanes/{lane_id}/stream/{camera}.mjpg' for camera in CAMERAS},
+        'snapshots': {camera: f'/lanes/{lane_id}/snapshot/{camera}.jpg' for camera in CAMERAS},
+    } for lane_id, lane in lanes.items()])
+
+@app.route('/ready')
+def ready_endpoint():
+    """Readiness: 200 bila model/worker lajur siap memproses kendaraan, 503 selama startup atau bila gagal."""
+    status = startup.snapshot()
+    if worker_pool:
+        status['workers'] = {str(index): index in worker_pool.ready_workers for index in range(LANE_WORKERS)}
+        status['ready'] = status['ready'] and worker_pool.all_ready()
+    return jsonify(status), 200 if status['ready'] else 503
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """
+    Metrik performa server dan tiap lajur; ?lane=<id> untuk satu lajur saja,
+    ?format=prometheus untuk scraper Prometheus (label lane/worker).
+    """
+    lane_id = request.args.get('lane')
+    if lane_id is not None and lane_id not in lanes:
+        abort(404)
+    lane_snapshots = {id_: lanes[id_].metrics_snapshot() for id_ in ([lane_id] if lane_id else lanes)}
+    worker_snapshots = worker_pool.worker_snapshots if worker_pool else {}
+
+    if request.args.get('format') == 'prometheus':
+        labelled = [({'lane': id_}, snapshot) for id_, snapshot in lane_snapshots.items()]
+        if lane_id is None:
+            labelled.insert(0, ({}, server_metrics.snapshot()))
+            labelled += [({'worker': str(index)}, snapshot) for index, snapshot in sorted(worker_snapshots.items())]
+        return Response(prometheus_text(labelled), mimetype='text/plain; version=0.0.4')
+
+    if lane_id is not None:
+        return jsonify(lane_snapshots[lane_id])
+    return jsonify({
+        'server': server_metrics.snapshot(),
+        'workers': {str(index): snapshot for index, snapshot in worker_snapshots.items()},
+        'lanes': lane_snapshots,
+    })
+
+MAX_REPORT_DAYS = 366
+MAX_TRANSACTIONS_LIMIT = 1000
+
+def report_range():
+    """
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD (zona Asia/Makassar, inklusif; default hari ini)
+    menjadi rentang epoch [awal, akhir). 400 bila format tanggal salah, to < from,
+    atau rentang lebih dari MAX_REPORT_DAYS hari.
+    """
+    import pytz
+
+    tz = pytz.timezone('Asia/Makassar')
+    today = datetime.now(tz).date()
+    try:
+        first_day = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if 'from' in request.args else today
+        last_day = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if 'to' in request.args else first_day
+    except ValueError:
+        abort(400, description="Format tanggal harus YYYY-MM-DD")
+    if last_day < first_day:
+        abort(400, description="Tanggal 'to' tidak boleh sebelum 'from'")
+    if (last_day - first_day).days >= MAX_REPORT_DAYS:
+        abort(400, description=f"Rentang laporan maksimal {MAX_REPORT_DAYS} hari")
+    start, end = day_range(first_day, last_day, tz)
+    return start, end, tz
+
+def report_response(data, started):
+    data['query_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return jsonify(data)
+
+def require_transaction_store():
+    if transaction_store is None:
+        abort(404, description="transaction_store tidak aktif")
+    return transaction_store
+
+@app.route('/transactions/summary')
+def transactions_summary_endpoint():
+    """Jumlah transaksi per golongan dan status, rata-rata processing_duration_seconds; ?from, ?to, ?lane."""
+    store = require_transaction_store()
+    started = time.perf_counter()
+    start, end, _ = report_range()
+    lane_id = request.args.get('lane')
+    return report_response({'from': start, 'to': end, 'lane': lane_id, **store.summary(start, end, lane_id)}, started)
+
+@app.route('/transactions/hourly')
+def transactions_hourly_endpoint():
+    """Throughput per jam (jam lokal) beserta rata-rata durasi proses; ?from, ?to, ?lane."""
+    store = require_transaction_store()
+    started = time.perf_counter()
+    start, end, tz = report_range()
+    lane_id = request.args.get('lane')
+    return report_response({'from': start, 'to': end, 'lane': lane_id,
+                            'hours': store.hourly(start, end, lane_id, tz)}, started)
+
+@app.route('/transactions')
+def transactions_endpoint():
+    """Daftar transaksi terbaru; ?from, ?to, ?lane, ?classification, ?status, ?limit (maks. 1000)."""
+    store = require_transaction_store()
+    started = time.perf_counter()
+    start, end, _ = report_range()
+    # SQLite memperlakukan LIMIT negatif sebagai tanpa batas, jadi batas bawah juga dijaga.
+    limit = max(1, min(request.args.get('limit', 100, type=int), MAX_TRANSACTIONS_LIMIT))
+    rows = store.transactions(start, end, request.args.get('lane'), request.args.get('classification'),
+                              request.args.get('status'), limit)
+    return report_response({'from': start, 'to': end, 'transactions': rows}, started)
+
+def mjpeg_frames(lane_id, camera_name, max_fps):
+    broadcaster = broadcasters[lane_id]
+    metrics = lanes[lane_id].metrics
+    min_interval = 1.0 / max_fps
+    version = 0
+    broadcaster.open_http_stream(camera_name)
+    try:
+        while True:
+            frame = broadcaster.wait_for_frame(camera_name, version, timeout=5.0)
+            if frame is None:
+                continue
+            version = frame.version
+            yield (b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: ' +
+                   str(len(frame.jpeg)).encode() + b'\r\n\r\n' + frame.jpeg + b'\r\n')
+            metrics.increment(f'{camera_name}.mjpeg_frames_served')
+            # Penonton lambat otomatis melompat ke frame terbaru pada iterasi berikutnya.
+            time.sleep(min_interval)
+    finally:
+        broadcaster.close_http_stream(camera_name)
+
+@app.route('/stream/<camera_name>.mjpg')
+@app.route('/lanes/<lane_id>/stream/<camera_name>.mjpg')
+def mjpeg_endpoint(camera_name, lane_id=None):
+    """Stream MJPEG (multipart/x-mixed-replace) untuk NVR/alat monitoring; ?fps=N membatasi laju."""
+    broadcaster = lane_broadcaster(lane_id, camera_name)
+    start_stream_tasks()
+    max_fps = request.args.get('fps', broadcaster.default_max_fps, type=float)
+    # ?fps=nan lolos dari min() dan perbandingan <= 0, lalu membuat time.sleep(nan) gagal.
+    if not math.isfinite(max_fps) or max_fps <= 0:
+        max_fps = broadcaster.default_max_fps
+    max_fps = min(max_fps, broadcaster.max_fps_limit)
+    return Response(mjpeg_frames(lane_id or DEFAULT_LANE_ID, camera_name, max_fps),
+                    mimetype='multipart/x-mixed-replace; boundary=frame', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/snapshot/<camera_name>.jpg')
+@app.route('/lanes/<lane_id>/snapshot/<camera_name>.jpg')
+def snapshot_endpoint(camera_name, lane_id=None):
+    """Frame ter-encode terakhir; mendukung If-None-Match (ETag) sehingga poll berulang cukup dijawab 304."""
+    broadcaster = lane_broadcaster(lane_id, camera_name)
+    start_stream_tasks()
+    was_watched = broadcaster.has_viewers(camera_name)
+    broadcaster.note_snapshot(camera_name)
+    frame = broadcaster.latest_frame(camera_name)
+    if frame is None or not was_watched:
+        # Encode mungkin sedang dilewati (tanpa penonton): tunggu frame segar sebentar.
+        fresh = broadcaster.wait_for_frame(camera_name, frame.version if frame else 0, timeout=1.0)
+        frame = fresh or frame
+    if frame is None:
+        return Response('Frame belum tersedia', status=503, headers={'Retry-After': '1'})
+
+    response = Response(frame.jpeg, mimetype='image/jpeg')
+    response.set_etag(frame.etag)
+    response.last_modified = datetime.fromtimestamp(frame.timestamp, tz=timezone.utc)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Frame-Timestamp'] = f'{frame.timestamp:.3f}'
+    response = response.make_conditional(request)
+    lanes[lane_id or DEFAULT_LANE_ID].metrics.increment(
+        f'{camera_name}.snapshots_not_modified' if response.status_code == 304 else f'{camera_name}.snapshots_served')
+    return response
+
+def register_lane_namespace(namespace, lane_id):
+    """Handler Socket.IO satu namespace; semua event di namespace ini ditujukan ke lajur lane_id."""
+    broadcaster = broadcasters[lane_id]
+
+    def handle_connect(auth=None):
+        log.info("Client terhubung, memulai semua stream video", lane=lane_id, namespace=namespace)
+        # Client lama (tanpa subscribe_stream) tetap menerima kedua kamera.
+        broadcaster.subscribe(request.sid, namespace=namespace)
+        start_stream_tasks()
+
+    def handle_disconnect(reason=None):
+        broadcaster.remove_client(request.sid)
+
+    def handle_subscribe_stream(data=None):
+        """
+        data: {'cameras': ['overhead', 'frontal'], 'max_fps': 10, 'ack': true}
+        Dengan ack, client memanggil callback setelah frame ditampilkan; frame
+        berikutnya baru dikirim setelah itu (client lambat melompat ke frame terbaru).
+        """
+        data = data or {}
+        broadcaster.unsubscribe(request.sid)
+        subscribed = broadcaster.subscribe(request.sid, data.get('cameras'), data.get('max_fps'),
+                                           bool(data.get('ack')), namespace=namespace)
+        return {'cameras': subscribed}
+
+    def handle_unsubscribe_stream(data=None):
+        broadcaster.unsubscribe(request.sid, (data or {}).get('cameras'))
+
+    def lane_command(event):
+        def handle_command(data=None):
+            lanes[lane_id].run_command(event, data)
+        return handle_command
+
+    socketio.on_event('connect', handle_connect, namespace=namespace)
+    socketio.on_event('disconnect', handle_disconnect, namespace=namespace)
+    socketio.on_event('subscribe_stream', handle_subscribe_stream, namespace=namespace)
+    socketio.on_event('unsubscribe_stream', handle_unsubscribe_stream, namespace=namespace)
+    for event in LANE_COMMANDS:
+        socketio.on_event(event, lane_command(event), namespace=namespace)
+
+def main():
+    setup_logging(config.get('logging'))
+    if LANE_WORKERS > 0:
+        build_worker_lanes()
+    else:
+        build_local_lanes()
+    for lane_id in lanes:
+        for namespace in namespaces_of(lane_id):
+            register_lane_namespace(namespace, lane_id)
 
-class FirestoreManager:
-    def __init__(self, credentials_path):
-        try:
-            cred = credentials.Certificate(credentials_path)
-            firebase_admin.initialize_app(cred)
-            self.db = firestore.client()
-            self.indonesia_tz = pytz.timezone('Asia/Makassar')
-            print("✅ Firestore berhasil diinisialisasi")
-        except Exception as e:
-            print(f"❌ Gagal inisialisasi Firestore: {e}")
-            self.db = None
-
-    def save_vehicle_transaction(self, vehicle_data, processing_duration, entry_time, exit_time, is_timeout=False):
-        if not self.db:
-            print("Firestore client not available. Cannot save transaction.")
-            return
-
-        try:
-            doc_ref = self.db.collection('transactions').document()
-            doc_ref.set({
-                'vehicle_id': vehicle_data.vehicle_id,
-                'classification': vehicle_data.classification,
-                'axle_count': vehicle_data.axle_count,
-                'tire_config': vehicle_data.tire_config,
-                'entry_time': entry_time,
-                'exit_time': exit_time,
-                'processing_duration_seconds': round(processing_duration, 2) if processing_duration else None,
-                'status': 'timeout' if is_timeout else 'completed'
-            })
-            status_text = "TIMEOUT" if is_timeout else "SELESAI"
-            print(f"📝 Transaksi {vehicle_data.vehicle_id} ({status_text}) disimpan ke Firestore")
-        except Exception as e:
-            print(f"❌ Gagal menyimpan transaksi ke Firestore: {e}")
-
-try:
-    firestore_key_path = config['firestore_key_path']
-    firestore_manager = FirestoreManager(firestore_key_path)
-except Exception as e:
-    print(f"❌ Gagal inisialisasi Firestore: {e}")
-    firestore_manager = None
-
-RTSP_URL_OVERHEAD = config['rtsp_urls']['overhead']
-RTSP_URL_FRONTAL = config['rtsp_urls']['frontal']
-TRANSACTION_AREA = config['transaction_area']
-
-class VehicleData:
-    def __init__(self, vehicle_id):
-        self.vehicle_id = vehicle_id
-        self.axle_count = 0
-        self.tire_config = None
-        self.classification = "--"
-        self.detection_time = time.strftime("%H:%M:%S")
-        self.is_classified = False
-        self.created_time = time.time()
-        self.last_seen_frontal = None
-        self.status = "detected" # Status awal
-        self.config_locked = False
-        self.has_entered_transaction_zone = False
-        self.transaction_start_time = None
-        self.max_transaction_time = config['vehicle_queue']['max_transaction_time']
-        self.timeout_extended = False
-        self.processing_attempts = 0
-        self.bus_detection_count = 0
-        self.truck_detection_count = 0
-
-class VehicleQueue:
-    def __init__(self):
-        self.vehicles = {}
-        self.vehicle_counter = 0
-        self.current_processing_vehicle = None
-        self.processing_start_time = None
-        self.LEARNING_WINDOW_SECONDS = config['vehicle_queue']['learning_window_seconds']
-        self.lock = Lock()
-        self.timeout_vehicles = set()
-        self.indonesia_tz = pytz.timezone('Asia/Makassar')
-
-    def finalize_vehicle_from_overhead(self, vehicle_id):
-        with self.lock:
-            if vehicle_id in self.vehicles:
-                if self.vehicles[vehicle_id].axle_count == 0:
-                    print(f"GHOST DETECTED: {vehicle_id} memiliki 0 gandar. ID akan di-reuse.")
-                    del self.vehicles[vehicle_id]
-                    self.vehicle_counter -= 1
-                    print(f"Counter direset ke: {self.vehicle_counter}. ID berikutnya akan menjadi V{(self.vehicle_counter + 1):04d}.")
-                    return
-
-                if self.vehicles[vehicle_id].status == "detected":
-                    self.vehicles[vehicle_id].status = "counted_and_waiting"
-                    print(f"ANTREAN: {vehicle_id} (gandar: {self.vehicles[vehicle_id].axle_count}) masuk antrean.")
-        
-    def create_new_vehicle(self):
-        with self.lock:
-            self.vehicle_counter += 1
-            vehicle_id = f"V{self.vehicle_counter:04d}"
-            self.vehicles[vehicle_id] = VehicleData(vehicle_id)
-            print(f"Kendaraan baru dibuat dengan ID: {vehicle_id}")
-            return vehicle_id
-    
-    def get_vehicle(self, vehicle_id):
-        with self.lock:
-            return self.vehicles.get(vehicle_id)
-    
-    def update_vehicle_axle_count(self, vehicle_id, axle_count):
-        with self.lock:
-            if vehicle_id in self.vehicles:
-                vehicle = self.vehicles[vehicle_id]
-                if vehicle.axle_count != axle_count:
-                    vehicle.axle_count = axle_count
-                    print(f"Update axle count untuk {vehicle_id}: {axle_count}")
-                self.classify_vehicle(vehicle_id)
-    
-    def update_vehicle_tire_config(self, vehicle_id, new_tire_config):
-        with self.lock:
-            if vehicle_id not in self.vehicles:
-                return
-            
-            vehicle = self.vehicles[vehicle_id]
-
-            if vehicle.config_locked:
-                return
-
-            if new_tire_config and new_tire_config != vehicle.tire_config:
-                print(f"KOREKSI Konfigurasi Ban untuk {vehicle_id}: dari '{vehicle.tire_config}' menjadi '{new_tire_config}'")
-                vehicle.tire_config = new_tire_config
-
-            if self.processing_start_time and (time.time() - self.processing_start_time > self.LEARNING_WINDOW_SECONDS):
-                print(f"--- Jendela pembelajaran untuk {vehicle_id} selesai. Konfigurasi final '{vehicle.tire_config}' dikunci. ---")
-                
-                vehicle.config_locked = True
-                
-                self.classify_vehicle(vehicle_id)
-    
-    def set_current_processing_vehicle(self, vehicle_id):
-        with self.lock:
-            if vehicle_id in self.vehicles:
-                vehicle = self.vehicles[vehicle_id]
-                
-                if vehicle.axle_count == 1:
-                    print(f"KOREKSI OTOMATIS: Gandar untuk {vehicle_id} hanya 1, diubah menjadi 2.")
-                    vehicle.axle_count = 2
-                    self.classify_vehicle(vehicle_id)
-                
-                self.current_processing_vehicle = vehicle_id
-                self.processing_start_time = time.time()
-                
-                vehicle.status = "in_transaction"
-                vehicle.transaction_start_time = self.processing_start_time
-                vehicle.has_entered_transaction_zone = True
-                
-                print(f"Kendaraan {vehicle_id} diambil alih oleh frontal dan berstatus 'in_transaction'.")
-                
-                if vehicle.is_classified:
-                    analysis_data = {
-                        'vehicle_id': vehicle.vehicle_id,
-                        'classification': vehicle.classification,
-                        'axle_count': vehicle.axle_count,
-                        'detection_time': datetime.now(self.indonesia_tz).strftime("%H:%M:%S")
-                    }
-                    socketio.emit('update_analysis_panel', analysis_data)
-
-    def complete_current_vehicle(self):
-        if self.current_processing_vehicle:
-            vehicle_id_completed = self.current_processing_vehicle
-            vehicle_data = self.vehicles.get(vehicle_id_completed)
-            
-            if not vehicle_data:
-                self.current_processing_vehicle = None
-                self.processing_start_time = None
-                return False
-
-            is_timeout = vehicle_id_completed in self.timeout_vehicles
-            if (not is_timeout and vehicle_data.transaction_start_time and 
-                time.time() - vehicle_data.transaction_start_time > vehicle_data.max_transaction_time):
-                is_timeout = True
-                self.timeout_vehicles.add(vehicle_id_completed)
-                print(f"⚠️ {vehicle_id_completed} ditandai sebagai TIMEOUT saat penyelesaian")
-            
-            processing_duration = time.time() - self.processing_start_time if self.processing_start_time else None
-            
-            if firestore_manager:
-                entry_time_aware = datetime.fromtimestamp(vehicle_data.transaction_start_time, tz=self.indonesia_tz) if vehicle_data.transaction_start_time else None
-                exit_time_aware = datetime.now(self.indonesia_tz)
-                firestore_manager.save_vehicle_transaction(
-                    vehicle_data=vehicle_data,
-                    processing_duration=processing_duration,
-                    entry_time=entry_time_aware,
-                    exit_time=exit_time_aware,
-                    is_timeout=is_timeout
-                )
-
-            vehicle_data.status = "completed"
-            print(f"✅ Transaksi {vehicle_id_completed} SELESAI")
-            
-            line_detector.finalize_vehicle(vehicle_id_completed)
-            self.current_processing_vehicle = None
-            self.processing_start_time = None
-            socketio.emit('clear_analysis_panel')
-            return True
-        return False
-
-    def classify_vehicle(self, vehicle_id):
-        if vehicle_id not in self.vehicles: 
-            return
-        vehicle = self.vehicles[vehicle_id]
-        
-        classification_made = False
-        if vehicle.axle_count >= 3:
-            if vehicle.axle_count == 3: vehicle.classification = "Golongan 3"
-            elif vehicle.axle_count == 4: vehicle.classification = "Golongan 4"
-            elif vehicle.axle_count >= 5: vehicle.classification = "Golongan 5"
-            classification_made = True
-        elif vehicle.axle_count == 2 and vehicle.tire_config:
-            if vehicle.tire_config == "single_tire": vehicle.classification = "Golongan 1"
-            elif vehicle.tire_config == "double_tire": vehicle.classification = "Golongan 2"
-            classification_made = True
-        
-        if classification_made:
-            vehicle.is_classified = True
-            print(f"Kendaraan {vehicle_id} TERKLASIFIKASI: {vehicle.classification}")
-            
-            if self.current_processing_vehicle == vehicle_id:
-                analysis_data = {
-                    'vehicle_id': vehicle.vehicle_id,
-                    'classification': vehicle.classification,
-                    'axle_count': vehicle.axle_count,
-                    'detection_time': datetime.now(self.indonesia_tz).strftime("%H:%M:%S")
-                }
-                socketio.emit('update_analysis_panel', analysis_data)
-    
-    def get_current_vehicle_data(self):
-        with self.lock:
-            if self.current_processing_vehicle:
-                return self.vehicles.get(self.current_processing_vehicle)
-            return None
-    
-    def cleanup_old_vehicles(self):
-        with self.lock:
-            current_time = time.time()
-            to_remove = [
-                vid for vid, vdata in self.vehicles.items() 
-                if (vdata.status == "completed" and current_time - vdata.created_time > 60) or \
-                   (vdata.status == "detected" and vdata.axle_count == 0 and current_time - vdata.created_time > 20)
-            ]
-            for vehicle_id in to_remove:
-                if vehicle_id in self.vehicles:
-                    del self.vehicles[vehicle_id]
-                    print(f"Kendaraan {vehicle_id} dihapus dari memori")
-
-class LineCrossingDetector:
-    def __init__(self, frame_width=640, frame_height=480):
-        self.frame_width = frame_width
-        self.frame_height = frame_height
-        coords = config['line_crossing_detector']['line_coords']
-        self.line_x1, self.line_y1, self.line_x2, self.line_y2 = coords[0], coords[1], coords[2], coords[3]
-        self.tracked_axles = {}
-        self.axle_id_counter = 0
-        self.current_vehicle_axles = {}
-        self.current_vehicle_id = None
-        self.history_frames = 5
-        self.last_vehicle_time = time.time()
-        self.vehicle_timeout = 1.0
-        self.lock = Lock()
-        self.vehicle_body_touching_line = False
-        self.last_body_detection_time = time.time()
-        self.body_timeout = config['line_crossing_detector']['body_timeout']
-
-    def point_to_line_distance(self, px, py):
-        x1, y1, x2, y2 = self.line_x1, self.line_y1, self.line_x2, self.line_y2
-        a, b, c = y2 - y1, x1 - x2, x2 * y1 - x1 * y2
-        return abs(a * px + b * py + c) / np.sqrt(a * a + b * b)
-
-    def is_point_crossing_line(self, px1, py1, px2, py2):
-        x1, y1, x2, y2 = self.line_x1, self.line_y1, self.line_x2, self.line_y2
-        side = lambda px, py: (x2 - x1) * (py - y1) - (y2 - y1) * (px - x1)
-        return (side(px1, py1) > 0) != (side(px2, py2) > 0)
-
-    def is_box_touching_line(self, box, tolerance=15):
-        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-        corners = [(x1, y1), (x2, y1), (x1, y2), (x2, y2)]
-        for corner_x, corner_y in corners:
-            if self.point_to_line_distance(corner_x, corner_y) <= tolerance:
-                return True
-        line_x_min, line_x_max = min(self.line_x1, self.line_x2), max(self.line_x1, self.line_x2)
-        line_y_min, line_y_max = min(self.line_y1, self.line_y2), max(self.line_y1, self.line_y2)
-        if x1 <= line_x_max and x2 >= line_x_min and y1 <= line_y_max and y2 >= line_y_min:
-            return True
-        return False
-
-    def finalize_vehicle(self, vehicle_id):
-        with self.lock:
-            if self.current_vehicle_id == vehicle_id:
-                print(f"--- Kendaraan {vehicle_id} difinalisasi oleh sistem. Siap untuk ID baru. ---")
-                self.current_vehicle_id = None
-                self.reset_tracking_system()
-
-    def reset_tracking_system(self):
-        print("🔄 RESET SISTEM TRACKING - Siap untuk kendaraan baru")
-        self.tracked_axles.clear()
-        self.current_vehicle_axles.clear()
-        self.vehicle_body_touching_line = False
-        self.last_body_detection_time = time.time()
-
-    def get_axle_center(self, box):
-        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-        return (x1 + x2) / 2, (y1 + y2) / 2
-
-    def detect_vehicle_bodies_and_axles(self, results):
-        vehicle_bodies, axles = [], []
-        if not results or not results[0].boxes: return vehicle_bodies, axles
-        for box in results[0].boxes:
-            class_id = int(box.cls)
-            if class_id in [1, 2, 3]: vehicle_bodies.append(box)
-            elif class_id == 0: axles.append(box)
-        return vehicle_bodies, axles
-
-    def update_vehicle_body_status(self, vehicle_bodies):
-        current_time = time.time()
-        body_touching_now = any(self.is_box_touching_line(body_box) for body_box in vehicle_bodies)
-        
-        if body_touching_now:
-            if not self.vehicle_body_touching_line:
-                print("🚗 BODY KENDARAAN MULAI MENYENTUH GARIS - Sistem aktif")
-            self.vehicle_body_touching_line = True
-            self.last_body_detection_time = current_time
-        elif self.vehicle_body_touching_line and (current_time - self.last_body_detection_time > self.body_timeout):
-            print("🚗 BODY KENDARAAN SUDAH TIDAK MENYENTUH GARIS - Sistem akan reset")
-            self.vehicle_body_touching_line = False
-            return True
-        return False
-
-    def update_axle_tracking(self, results, vehicle_queue):
-        with self.lock:
-            current_time = time.time()
-            vehicle_bodies, axle_detections = self.detect_vehicle_bodies_and_axles(results)
-            should_reset = self.update_vehicle_body_status(vehicle_bodies)
-            
-            if should_reset and self.current_vehicle_id:
-                print(f"🔄 AUTO RESET: Kendaraan {self.current_vehicle_id} selesai (body tidak menyentuh garis)")
-                vehicle_queue.finalize_vehicle_from_overhead(self.current_vehicle_id)
-                self.current_vehicle_id = None
-                self.reset_tracking_system()
-                return
-            
-            if not self.vehicle_body_touching_line: return
-            if axle_detections: self.last_vehicle_time = current_time
-            
-            if self.current_vehicle_id and (current_time - self.last_vehicle_time > self.vehicle_timeout):
-                print(f"--- TIMEOUT AXLE: {self.current_vehicle_id}. Diserahkan ke antrean. ---")
-                vehicle_queue.finalize_vehicle_from_overhead(self.current_vehicle_id)
-                self.current_vehicle_id = None
-                self.reset_tracking_system()
-                return
-
-            for detection in axle_detections:
-                center_x, center_y = self.get_axle_center(detection)
-                matched_id = self.find_closest_axle(center_x, center_y)
-                
-                if matched_id is not None:
-                    self.check_line_crossing(matched_id, center_x, center_y, vehicle_queue)
-                    self.tracked_axles[matched_id]['positions'].append((center_x, center_y))
-                    self.tracked_axles[matched_id]['last_seen'] = current_time
-                    if len(self.tracked_axles[matched_id]['positions']) > self.history_frames:
-                        self.tracked_axles[matched_id]['positions'].pop(0)
-                else:
-                    if self.current_vehicle_id is None: self.start_new_vehicle(vehicle_queue)
-                    if self.current_vehicle_id:
-                        self.axle_id_counter += 1
-                        new_axle_id = self.axle_id_counter
-                        self.tracked_axles[new_axle_id] = {'positions': [(center_x, center_y)], 'crossed': False, 'last_seen': current_time, 'vehicle_id': self.current_vehicle_id}
-                        self.current_vehicle_axles[self.current_vehicle_id].append(new_axle_id)
-                        self.check_line_crossing(new_axle_id, center_x, center_y, vehicle_queue)
-            
-            self.cleanup_old_axles(current_time)
-
-    def start_new_vehicle(self, vehicle_queue):
-        self.current_vehicle_id = vehicle_queue.create_new_vehicle()
-        self.current_vehicle_axles[self.current_vehicle_id] = []
-        print(f"--- Memulai tracking untuk kendaraan baru: {self.current_vehicle_id} ---")
-
-    def find_closest_axle(self, center_x, center_y, max_distance=80):
-        min_dist = float('inf')
-        closest_id = None
-        for axle_id, data in self.tracked_axles.items():
-            if data['positions']:
-                dist = np.linalg.norm(np.array(data['positions'][-1]) - np.array((center_x, center_y)))
-                if dist < min_dist and dist < max_distance:
-                    min_dist, closest_id = dist, axle_id
-        return closest_id
-
-    def check_line_crossing(self, axle_id, new_x, new_y, vehicle_queue):
-        axle_data = self.tracked_axles.get(axle_id)
-        if not axle_data or axle_data.get('crossed', False) or len(axle_data['positions']) < 2: return
-        
-        prev_x, prev_y = axle_data['positions'][-2]
-        if self.is_point_crossing_line(prev_x, prev_y, new_x, new_y):
-            axle_data['crossed'] = True
-            vehicle_id = axle_data['vehicle_id']
-            print(f"✅ Axle {axle_id} (Kendaraan {vehicle_id}) MELINTASI GARIS DIAGONAL!")
-            if vehicle_id:
-                count = self.get_crossed_axles_count_for_vehicle(vehicle_id)
-                vehicle_queue.update_vehicle_axle_count(vehicle_id, count)
-
-    def get_crossed_axles_count_for_vehicle(self, vehicle_id):
-        if vehicle_id not in self.current_vehicle_axles: return 0
-        return sum(1 for axle_id in self.current_vehicle_axles[vehicle_id] 
-                if self.tracked_axles.get(axle_id, {}).get('crossed', False))
-
-    def cleanup_old_axles(self, current_time, timeout=5):
-        to_remove = [aid for aid, data in self.tracked_axles.items() if current_time - data['last_seen'] > timeout]
-        for aid in to_remove:
-            if aid in self.tracked_axles: del self.tracked_axles[aid]
-    
-    def draw_line_and_info(self, frame):
-        with self.lock:
-            line_color = (0, 255, 0) if self.vehicle_body_touching_line else (0, 0, 255)
-            line_thickness = 4 if self.vehicle_body_touching_line else 3
-            cv2.line(frame, (self.line_x1, self.line_y1), (self.line_x2, self.line_y2), line_color, line_thickness)
-            cv2.circle(frame, (self.line_x1, self.line_y1), 5, line_color, -1)
-            cv2.circle(frame, (self.line_x2, self.line_y2), 5, line_color, -1)
-            status_text = "AKTIF" if self.vehicle_body_touching_line else "STANDBY"
-            cv2.putText(frame, f'Status: {status_text}', (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, line_color, 2)
-            if self.current_vehicle_id:
-                cv2.putText(frame, f'Current Overhead Vehicle: {self.current_vehicle_id}', (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-            return frame
-        
-    def force_vehicle_separation(self):
-        with self.lock:
-            if self.current_vehicle_id:
-                vehicle_id_to_finalize = self.current_vehicle_id
-                print(f"🚨 TRIGGER EKSTERNAL: Memaksa finalisasi untuk {vehicle_id_to_finalize}.")
-
-                vehicle_queue.finalize_vehicle_from_overhead(self.current_vehicle_id)
-                self.current_vehicle_id = None
-                self.reset_tracking_system()
-                print(f"🚨 TRIGGER EKSTERNAL: Sistem deteksi garis berhasil direset.")
-            else:
-                print("TRIGGER EKSTERNAL: Diterima, tetapi tidak ada kendaraan aktif. Diabaikan.")
-
-class FrontalVehicleManager:
-    def __init__(self, vehicle_queue, transaction_area):
-        self.vehicle_queue = vehicle_queue
-        self.transaction_area = transaction_area
-        self.lock = Lock()
-        self.zone_occupied = False
-        self.zone_clear_confirmation_time = None
-        self.zone_clear_delay = 0.5
-
-    def is_box_in_area(self, box, area):
-        x1, y1, x2, y2 = box
-        return not (x2 < area['x1'] or x1 > area['x2'] or 
-                    y2 < area['y1'] or y1 > area['y2'])
-
-    def get_next_vehicle_for_processing(self):
-        with self.vehicle_queue.lock:
-            sorted_vehicles = sorted(self.vehicle_queue.vehicles.items(), 
-                                     key=lambda item: int(item[0].replace('V', '')))
-            
-            for vehicle_id, vehicle_data in sorted_vehicles:
-                if vehicle_data.status == "counted_and_waiting":
-                    return vehicle_id
-            
-            return None
-
-    def update_status_based_on_zone(self, detections):
-        with self.lock:
-            current_time = time.time()
-            vehicle_is_in_transaction_zone = False
-
-            if detections and detections[0].boxes:
-                for box in detections[0].boxes:
-                    if self.is_box_in_area(box.xyxy[0], self.transaction_area):
-                        vehicle_is_in_transaction_zone = True
-                        break
-
-            if vehicle_is_in_transaction_zone:
-                if not self.zone_occupied:
-                    self.zone_occupied = True
-                    print(f"🏁 ZONA TRANSAKSI TERISI")
-                self.zone_clear_confirmation_time = None
-            else:
-                if self.zone_occupied:
-                    if self.zone_clear_confirmation_time is None:
-                        self.zone_clear_confirmation_time = current_time
-                    elif current_time - self.zone_clear_confirmation_time > self.zone_clear_delay:
-                        self.zone_occupied = False
-                        print(f"✅ ZONA TRANSAKSI KOSONG")
-
-            current_vehicle_id = self.vehicle_queue.current_processing_vehicle
-            
-            if not current_vehicle_id and self.zone_occupied:
-                next_vehicle_id = self.get_next_vehicle_for_processing()
-                if next_vehicle_id:
-                    print(f"🆕 Zona terisi, mengambil {next_vehicle_id} dari antrean sesuai urutan FIFO.")
-                    self.vehicle_queue.set_current_processing_vehicle(next_vehicle_id)
-
-            elif current_vehicle_id:
-                vehicle = self.vehicle_queue.get_vehicle(current_vehicle_id)
-                if not vehicle: return
-
-                if not self.zone_occupied and vehicle.has_entered_transaction_zone:
-                    print(f"🏁 {current_vehicle_id} dianggap telah KELUAR ZONA TRANSAKSI.")
-                    self.vehicle_queue.complete_current_vehicle()
-                
-                elif (vehicle.transaction_start_time and 
-                      current_time - vehicle.transaction_start_time > vehicle.max_transaction_time):
-                    if not self.zone_occupied:
-                        print(f"⚠️ TIMEOUT & ZONA KOSONG: {current_vehicle_id} dipaksa selesai.")
-                        self.vehicle_queue.complete_current_vehicle()
-                    else:
-                        if not vehicle.timeout_extended:
-                            print(f"⏰ TIMEOUT untuk {current_vehicle_id} tapi zona masih terisi. Waktu diperpanjang.")
-                            vehicle.max_transaction_time = 60
-                            vehicle.timeout_extended = True
-
-# Instance global
-line_detector = LineCrossingDetector(frame_width=640, frame_height=480)
-vehicle_queue = VehicleQueue()
-frontal_manager = FrontalVehicleManager(vehicle_queue, TRANSACTION_AREA)
-
-class OptimizedVideoStream:
-    def __init__(self, src=0):
-        self.stream = cv2.VideoCapture(src, cv2.CAP_FFMPEG)
-        self.stream.set(cv2.CAP_PROP_BUFFERSIZE, 2)
-        self.stream.set(cv2.CAP_PROP_FPS, 25)
-        self.grabbed, self.frame = self.stream.read()
-        self.stopped = False
-        self.lock = Lock()
-
-    def start(self):
-        threading.Thread(target=self.update, daemon=True).start()
-        return self
-
-    def update(self):
-        while not self.stopped:
-            grabbed, frame = self.stream.read()
-            with self.lock:
-                if grabbed: self.frame = frame
-            time.sleep(0.02)
-
-    def read(self):
-        with self.lock:
-            return self.frame.copy() if self.frame is not None else None
-
-    def stop(self):
-        self.stopped = True
-        self.stream.release()
-
-def detect_tire_config_from_detections(results):
-    if not results or not results[0].boxes: return None, False
-    is_bus = False
-    tire_config = None
-    for box in results[0].boxes:
-        class_id = int(box.cls)
-        if class_id == 0: # bus class
-            is_bus = True
-        elif class_id == 3: 
-            tire_config = "single_tire"
-        elif class_id == 2: 
-            tire_config = "double_tire"
-    return tire_config, is_bus
-
-def generate_overhead_stream():
-    vs = OptimizedVideoStream(src=RTSP_URL_OVERHEAD).start()
-    print(f"Stream overhead dimulai...")
-    
-    target_fps = 30
-    
-    while True:
-        frame = vs.read()
-        if frame is None:
-            socketio.emit('overhead_stream', {
-                'image_data': PLACEHOLDER_FRAME_B64,
-                'connection_status': 'disconnected',
-                'detected_axles': 0,
-                'system_status': 'STANDBY'
-            })
-            time.sleep(1)
-            continue
-
-        try:
-            small_frame = cv2.resize(frame, (640, 480), interpolation=cv2.INTER_LINEAR)
-        except cv2.error:
-            continue 
-
-        results = list(model_overhead(small_frame, stream=True, verbose=False, conf=0.5))
-        line_detector.update_axle_tracking(results, vehicle_queue)
-        
-        rendered_frame = results[0].plot() if results else small_frame
-        rendered_frame = line_detector.draw_line_and_info(rendered_frame)
-
-        ret, buffer = cv2.imencode('.jpg', rendered_frame, [cv2.IMWRITE_JPEG_QUALITY, 75])
-        if not ret: continue
-        
-        frame_base64 = base64.b64encode(buffer.tobytes()).decode('utf-8')
-        
-        data_to_emit = {
-            'image_data': frame_base64,
-            'connection_status': 'connected',
-            'vehicle_id': "---", 
-            'axle_count': 0, 
-            'classification': "--", 
-            'detection_time': "--:--:--"
-        }
-        
-        current_vehicle = vehicle_queue.get_current_vehicle_data()
-        vehicle_to_display = current_vehicle
-        if not vehicle_to_display:
-            last_overhead_id = line_detector.current_vehicle_id
-            vehicle_to_display = vehicle_queue.get_vehicle(last_overhead_id)
-
-        if vehicle_to_display:
-            data_to_emit.update({
-                'vehicle_id': vehicle_to_display.vehicle_id, 
-                'axle_count': vehicle_to_display.axle_count,
-                'classification': vehicle_to_display.classification, 
-                'detection_time': vehicle_to_display.detection_time
-            })
-        
-        axle_count_detected = 0
-        if results and results[0].boxes is not None:
-            for box in results[0].boxes:
-                if int(box.cls) == 0:
-                    axle_count_detected += 1
-        
-        data_to_emit['detected_axles'] = axle_count_detected
-        data_to_emit['system_status'] = 'AKTIF' if line_detector.vehicle_body_touching_line else 'STANDBY'
-        
-        socketio.emit('overhead_stream', data_to_emit)
-        
-        time.sleep(1.0 / target_fps)
-
-def generate_frontal_stream():
-    vs = OptimizedVideoStream(src=RTSP_URL_FRONTAL).start()
-    print(f"Stream frontal dimulai...")
-
-    target_fps = 30
-    
-    while True:
-        frame = vs.read()
-        if frame is None:
-            socketio.emit('frontal_stream', {
-                'image_data': PLACEHOLDER_FRAME_B64,
-                'connection_status': 'disconnected',
-                'tire_config': None
-            })
-            time.sleep(1)
-            continue
-
-        try:
-            small_frame = cv2.resize(frame, (640, 480), interpolation=cv2.INTER_LINEAR)
-        except cv2.error:
-            continue
-
-        results = list(model_frontal(small_frame, stream=True, verbose=False, conf=0.5))
-        
-        frontal_manager.update_status_based_on_zone(results)
-        tire_config, is_bus = detect_tire_config_from_detections(results)
-        
-        if vehicle_queue.current_processing_vehicle:
-            proc_id = vehicle_queue.current_processing_vehicle
-            vehicle = vehicle_queue.get_vehicle(proc_id)
-            if vehicle:
-                if is_bus:
-                    vehicle.bus_detection_count += 1
-                if vehicle.bus_detection_count > 5 and not vehicle.is_classified:
-                    with vehicle_queue.lock:
-                        vehicle.classification = "Golongan 1"
-                        vehicle.is_classified = True
-                        socketio.emit('update_analysis_panel', {
-                            'vehicle_id': vehicle.vehicle_id,
-                            'classification': vehicle.classification,
-                            'axle_count': vehicle.axle_count,
-                            'detection_time': datetime.now(vehicle_queue.indonesia_tz).strftime("%H:%M:%S")
-                        })
-
-                if tire_config and not vehicle.config_locked:
-                    vehicle_queue.update_vehicle_tire_config(proc_id, tire_config)
-
-                elif not vehicle.config_locked:
-                    vehicle_queue.update_vehicle_tire_config(proc_id, vehicle.tire_config)
-
-        rendered_frame = results[0].plot() if results else small_frame
-        overlay = rendered_frame.copy()
-        cv2.rectangle(overlay, (TRANSACTION_AREA['x1'], TRANSACTION_AREA['y1']), (TRANSACTION_AREA['x2'], TRANSACTION_AREA['y2']), (0, 255, 0), -1)
-        alpha = 0.2  
-        rendered_frame = cv2.addWeighted(overlay, alpha, rendered_frame, 1 - alpha, 0)
-        cv2.putText(rendered_frame, 'ZONA TRANSAKSI', (TRANSACTION_AREA['x1'] + 10, TRANSACTION_AREA['y1'] + 30), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
-
-        ret, buffer = cv2.imencode('.jpg', rendered_frame, [cv2.IMWRITE_JPEG_QUALITY, 75])
-        if not ret: continue
-        
-        frame_base64 = base64.b64encode(buffer.tobytes()).decode('utf-8')
-        
-        data_to_emit = {
-            'image_data': frame_base64,
-            'connection_status': 'connected',
-            'tire_config': tire_config,
-            'vehicle_id': "---", 
-            'classification': "--", 
-            'detection_time': "--:--:--", 
-            'status': 'idle'
-        }
-        
-        current_vehicle = vehicle_queue.get_current_vehicle_data()
-        if current_vehicle:
-            data_to_emit.update({
-                'vehicle_id': current_vehicle.vehicle_id, 
-                'classification': current_vehicle.classification,
-                'detection_time': current_vehicle.detection_time, 
-                'status': current_vehicle.status 
-            })
-        
-
-        socketio.emit('frontal_stream', data_to_emit)
-        time.sleep(1.0 / target_fps)
-
-@socketio.on('connect')
-def handle_connect():
-    print('Client terhubung! Memulai semua stream video.')
-    if not hasattr(handle_connect, 'tasks_started'):
-        socketio.start_background_task(target=generate_overhead_stream)
-        socketio.start_background_task(target=generate_frontal_stream)
-        socketio.start_background_task(target=lambda: vehicle_queue.cleanup_old_vehicles())
-        handle_connect.tasks_started = True
-
-@socketio.on('reset_classification')
-def handle_reset():
-    """Reset manual untuk sistem (soft reset)."""
-    global vehicle_queue, line_detector
-    print("Sistem direset secara manual (Soft Reset)")
-    
-    if vehicle_queue.current_processing_vehicle:
-        with frontal_manager.lock:
-            vehicle_queue.complete_current_vehicle()
-    
-    with vehicle_queue.lock:
-        vehicle_queue.vehicles.clear()
-        vehicle_queue.current_processing_vehicle = None
-        
-    with line_detector.lock:
-        line_detector.reset_tracking_system()
-        line_detector.current_vehicle_id = None
-
-@socketio.on('hard_reset_system')
-def handle_hard_reset():
-    """Reset total (Hard Reset) yang mengembalikan semua counter ke 0."""
-    global vehicle_queue, line_detector
-    print("🚨 HARD RESET DARI CLIENT! Mereset semua ID dan state.")
-
-    with vehicle_queue.lock:
-        vehicle_queue.vehicles.clear()
-        vehicle_queue.current_processing_vehicle = None
-        vehicle_queue.vehicle_counter = 0
-        print("Antrian kendaraan dan counter ID direset ke 0.")
-
-    with line_detector.lock:
-        line_detector.reset_tracking_system()
-        line_detector.current_vehicle_id = None
-        line_detector.axle_id_counter = 0
-        print("Sistem deteksi garis dan counter axle direset.")
-
-@socketio.on('obs_trigger')
-def handle_obs_trigger(data):
-    print(f"✅ EVENT DITERIMA: 'obs_trigger' dengan data: {data}")
-    line_detector.force_vehicle_separation()
-
-if __name__ == '__main__':
     server_host = config['server']['host']
     server_port = config['server']['port']
     print(f"Menjalankan server dengan sistem antrian kendaraan di http://{server_host}:{server_port}")
-    socketio.run(app, debug=True, host=server_host, port=server_port, allow_unsafe_werkzeug=True)
\ No newline at end of file
+    print(f"🛣️ {len(lanes)} lajur: {', '.join(f'{lane.name} ({lane_namespace(lane_id)})' for lane_id, lane in lanes.items())}"
+          + (f", dijalankan oleh {LANE_WORKERS} proses worker" if worker_pool else ""))
+    # Reloader debug menjalankan modul dua kali; dimatikan saat replay/worker agar stream tidak ganda.
+    debug = not REPLAY_ENABLED and not worker_pool
+    # Proses induk reloader hanya mengawasi file: jangan ikut memuat model.
+    serving_process = not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+    if serving_process and not worker_pool:
+        socketio.start_background_task(target=load_models)
+    if serving_process and (worker_pool or (REPLAY_ENABLED and REPLAY_CONFIG.get('autostart', True))):
+        # Worker perlu waktu memuat model, jadi langsung dimulai; replay tidak perlu menunggu
+        # dashboard terhubung untuk mengukur throughput.
+        start_stream_tasks()
+    print(f"⏱️ Server HTTP/Socket.IO siap dalam {startup.mark('http_ready'):.2f} detik; model dimuat di latar belakang (cek /ready)")
+    socketio.run(app, debug=debug, host=server_host, port=server_port, allow_unsafe_werkzeug=True)
+
+if __name__ == '__main__':
+    main()
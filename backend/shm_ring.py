@@ -0,0 +1,124 @@
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+RingSlot = namedtuple('RingSlot', ['seq', 'data', 'meta', 'timestamp'])
+
+_HEAD_BYTES = 8
+_SLOT_HEADER_BYTES = 32
+
+
+class SharedRing:
+    """
+    Ring buffer satu penulis di atas multiprocessing.shared_memory, untuk
+    menukar frame (mentah atau JPEG) antar proses tanpa pickle.
+
+    Layout: [head_seq] lalu `slots` slot berisi header
+    [seq, panjang data, panjang meta, timestamp] diikuti data dan meta.
+    Penulis mengosongkan seq slot sebelum menyalin dan mengisinya lagi setelah
+    selesai; pembaca memeriksa seq sebelum dan sesudah menyalin, sehingga slot
+    yang sedang ditimpa dikenali dan dilewati (pembaca cukup ambil yang terbaru).
+    """
+    def __init__(self, shm, slots, slot_size, owner):
+        self.shm = shm
+        self.name = shm.name
+        self.slots = slots
+        self.slot_size = slot_size
+        self.owner = owner
+        self.head = np.ndarray((1,), dtype=np.uint64, buffer=shm.buf, offset=0)
+        self.headers = []
+        self.timestamps = []
+        self.regions = []
+        for slot in range(slots):
+            offset = _HEAD_BYTES + slot * (_SLOT_HEADER_BYTES + slot_size)
+            self.headers.append(np.ndarray((3,), dtype=np.uint64, buffer=shm.buf, offset=offset))
+            self.timestamps.append(np.ndarray((1,), dtype=np.float64, buffer=shm.buf, offset=offset + 24))
+            self.regions.append(np.ndarray((slot_size,), dtype=np.uint8, buffer=shm.buf,
+                                           offset=offset + _SLOT_HEADER_BYTES))
+
+    @staticmethod
+    def _size(slots, slot_size):
+        return _HEAD_BYTES + slots * (_SLOT_HEADER_BYTES + slot_size)
+
+    @classmethod
+    def create(cls, name, slots, slot_size):
+        try:
+            # Sisa proses sebelumnya yang mati tanpa sempat unlink.
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        shm = shared_memory.SharedMemory(name=name, create=True, size=cls._size(slots, slot_size))
+        ring = cls(shm, slots, slot_size, owner=True)
+        for header in ring.headers:
+            header[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name, slots, slot_size):
+        return cls(shared_memory.SharedMemory(name=name), slots, slot_size, owner=False)
+
+    def latest_seq(self):
+        return int(self.head[0])
+
+    def write(self, data, meta=b'', timestamp=0.0):
+        """Tulis satu entri (bytes atau ndarray uint8 kontigu); mengembalikan seq-nya."""
+        payload = np.frombuffer(data, dtype=np.uint8) if isinstance(data, (bytes, bytearray, memoryview)) \
+            else data.reshape(-1)
+        length, meta_length = payload.size, len(meta)
+        if length + meta_length > self.slot_size:
+            raise ValueError(f"Entri {length + meta_length} byte melebihi slot {self.slot_size} byte")
+
+        seq = self.latest_seq() + 1
+        slot = seq % self.slots
+        header = self.headers[slot]
+        region = self.regions[slot]
+        header[0] = 0
+        region[:length] = payload
+        if meta_length:
+            region[length:length + meta_length] = np.frombuffer(meta, dtype=np.uint8)
+        header[1] = length
+        header[2] = meta_length
+        self.timestamps[slot][0] = timestamp
+        header[0] = seq
+        self.head[0] = seq
+        return seq
+
+    def read(self, seq=None, out=None):
+        """
+        Salin entri `seq` (default: terbaru). Dengan `out` (ndarray uint8),
+        data disalin ke sana dan `out` yang dikembalikan sebagai data.
+        None bila belum ada entri atau slotnya sudah ditimpa penulis.
+        """
+        seq = self.latest_seq() if seq is None else seq
+        if seq <= 0:
+            return None
+        slot = seq % self.slots
+        header = self.headers[slot]
+        if int(header[0]) != seq:
+            return None
+        length, meta_length = int(header[1]), int(header[2])
+        timestamp = float(self.timestamps[slot][0])
+        region = self.regions[slot]
+        if out is not None:
+            np.copyto(out.reshape(-1)[:length], region[:length])
+            data = out
+        else:
+            data = region[:length].tobytes()
+        meta = region[length:length + meta_length].tobytes()
+        if int(header[0]) != seq:
+            return None
+        return RingSlot(seq, data, meta, timestamp)
+
+    def close(self):
+        # View numpy harus dilepas dulu, kalau tidak mmap menolak ditutup.
+        self.head = None
+        self.headers = self.timestamps = self.regions = []
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
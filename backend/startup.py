@@ -0,0 +1,97 @@
+import threading
+import time
+
+from logs import get_logger
+
+log = get_logger()
+
+
+class StartupTracker:
+    """
+    Status startup server untuk endpoint /ready. Server HTTP/Socket.IO langsung
+    melayani client; fase berat (memuat + warm-up model, worker lajur) berjalan
+    di latar belakang dan dicatat di sini. Semua waktu dihitung dari
+    `started_at` (time.monotonic() saat proses mulai) dan dilaporkan sebagai
+    gauge startup.*_seconds di /metrics.
+    """
+    def __init__(self, started_at, phases, metrics=None):
+        self.started_at = started_at
+        self.metrics = metrics
+        self.phases = {name: {'status': 'pending', 'seconds': None, 'error': None} for name in phases}
+        self.first_classification_seconds = None
+        self.lock = threading.Lock()
+        self.ready_event = threading.Event()
+        self.ready_callbacks = []
+        if not self.phases:
+            self.ready_event.set()
+
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    def _gauge(self, name, seconds):
+        if self.metrics:
+            self.metrics.set_gauge(f'startup.{name}_seconds', round(seconds, 3))
+
+    def mark(self, name):
+        """Catat tonggak satu kali (mis. 'http_ready') tanpa memengaruhi kesiapan."""
+        seconds = self.elapsed()
+        self._gauge(name, seconds)
+        return seconds
+
+    def begin(self, phase):
+        with self.lock:
+            self.phases[phase]['status'] = 'running'
+
+    def done(self, phase):
+        seconds = self.elapsed()
+        with self.lock:
+            self.phases[phase].update(status='ready', seconds=round(seconds, 3), error=None)
+            became_ready = all(p['status'] == 'ready' for p in self.phases.values()) and not self.ready_event.is_set()
+            if became_ready:
+                self.ready_event.set()
+                callbacks, self.ready_callbacks = self.ready_callbacks, []
+        self._gauge(phase, seconds)
+        log.info("⏱️ Startup: fase siap", rate_limit=False, phase=phase, seconds=round(seconds, 2))
+        if became_ready:
+            self._gauge('ready', seconds)
+            log.info("✅ Sistem siap sejak proses dimulai", rate_limit=False, seconds=round(seconds, 2))
+            for callback in callbacks:
+                callback()
+
+    def fail(self, phase, error):
+        with self.lock:
+            self.phases[phase].update(status='failed', error=str(error))
+        log.error("❌ Startup: fase gagal", rate_limit=False, phase=phase, error=error)
+
+    @property
+    def ready(self):
+        return self.ready_event.is_set()
+
+    def when_ready(self, callback):
+        """Panggil callback sekarang bila sudah siap, atau sekali setelah semua fase siap."""
+        with self.lock:
+            if not self.ready_event.is_set():
+                self.ready_callbacks.append(callback)
+                return
+        callback()
+
+    def note_classification(self):
+        """Dipanggil tiap kali hasil klasifikasi dikirim; hanya yang pertama dicatat (cold start)."""
+        if self.first_classification_seconds is not None:
+            return
+        with self.lock:
+            if self.first_classification_seconds is not None:
+                return
+            self.first_classification_seconds = round(self.elapsed(), 3)
+        self._gauge('first_classification', self.first_classification_seconds)
+        log.info("⏱️ Cold start: klasifikasi pertama sejak proses dimulai", rate_limit=False,
+                 seconds=self.first_classification_seconds)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'ready': self.ready_event.is_set(),
+                'uptime_seconds': round(self.elapsed(), 1),
+                'phases': {name: dict(phase) for name, phase in self.phases.items()},
+                'first_classification_seconds': self.first_classification_seconds,
+            }
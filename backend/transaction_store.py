@@ -0,0 +1,293 @@
+"""
+Salinan lokal semua transaksi (SQLite, mode WAL) untuk laporan tanpa membaca
+ulang Firestore. Loop lajur hanya memanggil save_vehicle_transaction(), yang
+memasukkan baris ke antrean; thread writer menulisnya per batch.
+
+Dua tabel:
+- transactions  : satu baris per transaksi, diindeks exit_time, (classification,
+                  exit_time), (status, exit_time) dan (lane_id, exit_time).
+- hourly_rollup / daily_rollup : agregat per jam UTC (dan per hari lokal,
+                  offset utc_offset_hours) x lajur x golongan x status: jumlah,
+                  total dan jumlah sampel durasi. Diperbarui dalam transaksi SQL
+                  yang sama; endpoint laporan hanya membaca tabel ini sehingga
+                  waktunya tidak bergantung pada jumlah baris transaksi.
+
+Beberapa proses (worker lajur) boleh menulis ke file yang sama; SQLite
+menyerialkan penulisan dan busy_timeout menunggu lock.
+"""
+import atexit
+import queue
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+from logs import get_logger
+
+log = get_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    lane_id TEXT,
+    vehicle_id TEXT NOT NULL,
+    classification TEXT,
+    axle_count INTEGER,
+    tire_config TEXT,
+    entry_time REAL,
+    exit_time REAL NOT NULL,
+    processing_duration_seconds REAL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_exit_time ON transactions (exit_time);
+CREATE INDEX IF NOT EXISTS idx_transactions_classification ON transactions (classification, exit_time);
+CREATE INDEX IF NOT EXISTS idx_transactions_status ON transactions (status, exit_time);
+CREATE INDEX IF NOT EXISTS idx_transactions_lane ON transactions (lane_id, exit_time);
+CREATE TABLE IF NOT EXISTS hourly_rollup (
+    hour INTEGER NOT NULL,
+    lane_id TEXT NOT NULL,
+    classification TEXT NOT NULL,
+    status TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    duration_sum REAL NOT NULL,
+    duration_count INTEGER NOT NULL,
+    PRIMARY KEY (hour, lane_id, classification, status)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    day INTEGER NOT NULL,
+    lane_id TEXT NOT NULL,
+    classification TEXT NOT NULL,
+    status TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    duration_sum REAL NOT NULL,
+    duration_count INTEGER NOT NULL,
+    PRIMARY KEY (day, lane_id, classification, status)
+) WITHOUT ROWID;
+"""
+
+INSERT_TRANSACTION = """
+INSERT INTO transactions (lane_id, vehicle_id, classification, axle_count, tire_config, entry_time, exit_time,
+                          processing_duration_seconds, status)
+VALUES (:lane_id, :vehicle_id, :classification, :axle_count, :tire_config, :entry_time, :exit_time,
+        :processing_duration_seconds, :status)
+"""
+
+UPSERT_ROLLUP = """
+INSERT INTO {table} ({bucket}, lane_id, classification, status, count, duration_sum, duration_count)
+VALUES (:{bucket}, :rollup_lane, :rollup_classification, :status, 1, COALESCE(:processing_duration_seconds, 0),
+        :processing_duration_seconds IS NOT NULL)
+ON CONFLICT ({bucket}, lane_id, classification, status) DO UPDATE SET
+    count = count + 1,
+    duration_sum = duration_sum + excluded.duration_sum,
+    duration_count = duration_count + excluded.duration_count
+"""
+UPSERT_HOURLY = UPSERT_ROLLUP.format(table='hourly_rollup', bucket='hour')
+UPSERT_DAILY = UPSERT_ROLLUP.format(table='daily_rollup', bucket='day')
+
+
+def _epoch(value):
+    if value is None:
+        return None
+    return value.timestamp() if isinstance(value, datetime) else float(value)
+
+
+class TransactionStore:
+    def __init__(self, path='transactions.sqlite3', flush_interval=1.0, batch_size=200, max_queue=10000,
+                 utc_offset_hours=8, metrics=None):
+        self.path = path
+        # Batas hari daily_rollup; default WITA (Asia/Makassar, tanpa DST) seperti waktu transaksi.
+        self.utc_offset = utc_offset_hours * 3600
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.metrics = metrics
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.stopped = threading.Event()
+        self.thread = None
+        self.local = threading.local()
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.close()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10.0)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _reader(self):
+        # Satu koneksi per thread request; koneksi sqlite3 tidak boleh dipakai lintas thread.
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = self._connect()
+            connection.row_factory = sqlite3.Row
+        return connection
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True, name='transaction-store')
+        self.thread.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self, timeout=5.0):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join(timeout)
+
+    def _count(self, name, amount=1):
+        if self.metrics:
+            self.metrics.increment(name, amount)
+
+    def save_vehicle_transaction(self, vehicle_data, processing_duration, entry_time, exit_time, is_timeout=False,
+                                 lane_id=None):
+        """Signature sama dengan FirestoreManager.save_vehicle_transaction; tidak pernah memblokir."""
+        row = {
+            'lane_id': lane_id,
+            'vehicle_id': vehicle_data.vehicle_id,
+            'classification': vehicle_data.classification,
+            'axle_count': vehicle_data.axle_count,
+            'tire_config': vehicle_data.tire_config,
+            'entry_time': _epoch(entry_time),
+            'exit_time': _epoch(exit_time),
+            'processing_duration_seconds': round(processing_duration, 2) if processing_duration else None,
+            'status': 'timeout' if is_timeout else 'completed',
+        }
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            self._count('transaction_store.dropped')
+            log.error("❌ Antrean penyimpanan transaksi lokal penuh, transaksi dibuang",
+                      vehicle_id=row['vehicle_id'], lane=lane_id)
+
+    def _drain(self):
+        rows = []
+        try:
+            rows.append(self.queue.get(timeout=self.flush_interval))
+            while len(rows) < self.batch_size:
+                rows.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return rows
+
+    def _run(self):
+        connection = self._connect()
+        while not (self.stopped.is_set() and self.queue.empty()):
+            rows = self._drain()
+            if rows:
+                self._write(connection, rows)
+        connection.close()
+
+    def _write(self, connection, rows):
+        for row in rows:
+            row['hour'] = int(row['exit_time'] // 3600)
+            row['day'] = int((row['exit_time'] + self.utc_offset) // 86400)
+            row['rollup_lane'] = row['lane_id'] or ''
+            row['rollup_classification'] = row['classification'] or '--'
+        try:
+            with connection:
+                connection.executemany(INSERT_TRANSACTION, rows)
+                connection.executemany(UPSERT_HOURLY, rows)
+                connection.executemany(UPSERT_DAILY, rows)
+        except sqlite3.Error as e:
+            self._count('transaction_store.write_failed', len(rows))
+            log.error("❌ Gagal menyimpan transaksi ke penyimpanan lokal", rate_limit=False, records=len(rows), error=e)
+            return
+        self._count('transaction_store.written', len(rows))
+
+    def _rollup_filter(self, bucket, size, offset, start, end, lane_id):
+        # Rentang epoch [start, end) dibulatkan ke bucket rollup (jam UTC atau hari lokal).
+        clauses = [f'{bucket} >= ? AND {bucket} < ?']
+        params = [int((start + offset) // size), int(-(-(end + offset) // size))]
+        if lane_id is not None:
+            clauses.append('lane_id = ?')
+            params.append(lane_id)
+        return ' AND '.join(clauses), params
+
+    def summary(self, start, end, lane_id=None):
+        """Jumlah per golongan dan status serta rata-rata durasi proses dalam [start, end)."""
+        # Rentang per hari lokal (default endpoint) dibaca dari daily_rollup, selain itu per jam.
+        if (start + self.utc_offset) % 86400 == 0 and (end + self.utc_offset) % 86400 == 0:
+            table = 'daily_rollup'
+            where, params = self._rollup_filter('day', 86400, self.utc_offset, start, end, lane_id)
+        else:
+            table = 'hourly_rollup'
+            where, params = self._rollup_filter('hour', 3600, 0, start, end, lane_id)
+        rows = self._reader().execute(
+            f"SELECT classification, status, SUM(count) AS count, SUM(duration_sum) AS duration_sum, "
+            f"SUM(duration_count) AS duration_count FROM {table} WHERE {where} "
+            f"GROUP BY classification, status", params).fetchall()
+        by_class, by_status = {}, {}
+        total = duration_sum = duration_count = 0
+        for row in rows:
+            by_class[row['classification']] = by_class.get(row['classification'], 0) + row['count']
+            by_status[row['status']] = by_status.get(row['status'], 0) + row['count']
+            total += row['count']
+            duration_sum += row['duration_sum']
+            duration_count += row['duration_count']
+        return {
+            'total': total,
+            'by_classification': dict(sorted(by_class.items())),
+            'by_status': by_status,
+            'avg_processing_duration_seconds': round(duration_sum / duration_count, 2) if duration_count else None,
+        }
+
+    def hourly(self, start, end, lane_id=None, tz=None):
+        """Throughput dan rata-rata durasi proses per jam; label jam pada zona waktu tz (offset jam penuh)."""
+        where, params = self._rollup_filter('hour', 3600, 0, start, end, lane_id)
+        rows = self._reader().execute(
+            f"SELECT hour, SUM(count) AS count, SUM(duration_sum) AS duration_sum, "
+            f"SUM(duration_count) AS duration_count FROM hourly_rollup WHERE {where} GROUP BY hour ORDER BY hour",
+            params).fetchall()
+        return [{
+            'hour': datetime.fromtimestamp(row['hour'] * 3600, tz or timezone.utc).strftime('%Y-%m-%d %H:00'),
+            'count': row['count'],
+            'avg_processing_duration_seconds': (round(row['duration_sum'] / row['duration_count'], 2)
+                                                if row['duration_count'] else None),
+        } for row in rows]
+
+    def transactions(self, start, end, lane_id=None, classification=None, status=None, limit=100):
+        """Transaksi terbaru dalam [start, end), memakai indeks exit_time/classification/status/lane."""
+        clauses, params = ['exit_time >= ? AND exit_time < ?'], [start, end]
+        for column, value in (('lane_id', lane_id), ('classification', classification), ('status', status)):
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        rows = self._reader().execute(
+            f"SELECT * FROM transactions WHERE {' AND '.join(clauses)} ORDER BY exit_time DESC LIMIT ?",
+            params + [limit]).fetchall()
+        return [dict(row) for row in rows]
+
+
+def day_range(first_day, last_day, tz):
+    """Epoch [awal first_day, awal hari setelah last_day) pada zona waktu tz (pytz)."""
+    start = tz.localize(datetime.combine(first_day, datetime.min.time()))
+    end = tz.localize(datetime.combine(last_day + timedelta(days=1), datetime.min.time()))
+    return start.timestamp(), end.timestamp()
+
+
+def create_transaction_store(config, metrics=None, writer=True):
+    """Store sesuai config "transaction_store"; writer=False untuk proses yang hanya membaca (web pada mode worker)."""
+    settings = config.get('transaction_store', {})
+    if not settings.get('enabled', True):
+        return None
+    try:
+        store = TransactionStore(settings.get('path', 'transactions.sqlite3'),
+                                 flush_interval=settings.get('flush_interval', 1.0),
+                                 batch_size=settings.get('batch_size', 200),
+                                 max_queue=settings.get('max_queue', 10000),
+                                 utc_offset_hours=settings.get('utc_offset_hours', 8),
+                                 metrics=metrics)
+        return store.start() if writer else store
+    except sqlite3.Error as e:
+        log.error("❌ Gagal membuka penyimpanan transaksi lokal", rate_limit=False, error=e)
+        return None
+
+
+def transaction_sink(lane_id, *targets):
+    """save_transaction untuk VehicleQueue yang meneruskan ke semua target (Firestore, store lokal) yang aktif."""
+    targets = [target for target in targets if target is not None]
+    if not targets:
+        return None
+
+    def save_transaction(**kwargs):
+        for target in targets:
+            target.save_vehicle_transaction(lane_id=lane_id, **kwargs)
+    return save_transaction
@@ -0,0 +1,178 @@
+"""
+Validasi mode detector-every-k (config "detection_interval") pada rekaman overhead:
+jumlah gandar per kendaraan dari deteksi penuh (YOLO tiap frame) dibandingkan
+dengan mode interpolasi untuk beberapa nilai k.
+
+YOLO dijalankan sekali per frame dan hasilnya di-cache; LineCrossingDetector lalu
+dijalankan ulang untuk tiap k, dengan frame di luar giliran deteksi memakai box
+dari BoxPropagator, sama seperti loop overhead. Motion gate tidak disimulasikan.
+
+Pemakaian:
+    python validate_interpolation.py --every 2 3 4
+    python validate_interpolation.py --video recordings/overhead.mp4 --lane 2 --report validasi.json
+"""
+import argparse
+import json
+import logging
+import time
+
+import cv2
+import numpy as np
+
+from detections import Detections
+from inference import InferenceROI, run_detector
+from interpolation import BoxPropagator, DetectionSchedule
+from lane import LineCrossingDetector, lane_configs
+from logs import LOGGER_NAME
+from metrics import LaneMetrics
+from model_backends import load_detector
+
+
+class _ManualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+class _AxleCountQueue:
+    """Pengganti VehicleQueue yang hanya mencatat jumlah gandar tiap kendaraan."""
+    def __init__(self):
+        self.counter = 0
+        self.axle_counts = {}
+
+    def create_new_vehicle(self):
+        self.counter += 1
+        vehicle_id = f"V{self.counter:04d}"
+        self.axle_counts[vehicle_id] = 0
+        return vehicle_id
+
+    def update_vehicle_axle_count(self, vehicle_id, axle_count):
+        self.axle_counts[vehicle_id] = axle_count
+
+    def finalize_vehicle_from_overhead(self, vehicle_id):
+        pass
+
+
+def detect_all_frames(model, video_path, roi, max_frames=None):
+    """Deteksi YOLO untuk setiap frame rekaman: ([Detections], [timestamp], detik inferensi)."""
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise IOError(f"Rekaman '{video_path}' tidak dapat dibuka")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+    small_frame = np.empty((480, 640, 3), dtype=np.uint8)
+    cached, timestamps = [], []
+    inference_seconds = 0.0
+    while max_frames is None or len(cached) < max_frames:
+        grabbed, frame = capture.read()
+        if not grabbed:
+            break
+        cv2.resize(frame, (640, 480), dst=small_frame, interpolation=cv2.INTER_LINEAR)
+        start = time.perf_counter()
+        cached.append(Detections.from_results(run_detector(model, small_frame, roi)))
+        inference_seconds += time.perf_counter() - start
+        timestamps.append(len(timestamps) / fps)
+    capture.release()
+    return cached, timestamps, inference_seconds
+
+
+def simulate(cached, timestamps, line_settings, every, min_confidence=0.6, adaptive=True):
+    """Jalankan LineCrossingDetector atas deteksi ter-cache; mengembalikan (axle_counts, jumlah run YOLO)."""
+    clock = _ManualClock()
+    vehicle_queue = _AxleCountQueue()
+    line_detector = LineCrossingDetector(clock, line_settings, LaneMetrics())
+    schedule = DetectionSchedule(every, min_confidence, adaptive)
+    propagator = BoxPropagator(max_match_distance=line_detector.max_match_distance)
+    detector_runs = 0
+    # Log tracking per gandar tidak relevan di sini (dan dijalankan ulang untuk tiap k).
+    logger = logging.getLogger(LOGGER_NAME)
+    was_disabled, logger.disabled = logger.disabled, True
+    try:
+        for detections, timestamp in zip(cached, timestamps):
+            clock.now = timestamp
+            if schedule.should_detect():
+                schedule.detected(detections)
+                propagator.correct(detections, timestamp)
+                detector_runs += 1
+            else:
+                detections = propagator.predict(timestamp)
+                schedule.interpolated()
+            line_detector.update_axle_tracking(detections, vehicle_queue)
+            line_detector.cleanup_old_axles(timestamp)
+    finally:
+        logger.disabled = was_disabled
+    return vehicle_queue.axle_counts, detector_runs
+
+
+def compare_counts(reference, candidate):
+    reference_counts = list(reference.values())
+    candidate_counts = list(candidate.values())
+    paired = list(zip(reference_counts, candidate_counts))
+    return {
+        'vehicles_full_rate': len(reference_counts),
+        'vehicles_interpolated': len(candidate_counts),
+        'axles_full_rate': sum(reference_counts),
+        'axles_interpolated': sum(candidate_counts),
+        'vehicles_with_identical_axle_count': sum(1 for a, b in paired if a == b),
+        'mismatches': [{'vehicle': index + 1, 'full_rate': a, 'interpolated': b}
+                       for index, (a, b) in enumerate(paired) if a != b],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validasi jumlah gandar mode detector-every-k terhadap deteksi penuh.")
+    parser.add_argument('--video', help="Rekaman overhead (default: replay.overhead lajur).")
+    parser.add_argument('--lane', help="Id lajur untuk garis dan ROI (default: lajur pertama).")
+    parser.add_argument('--every', type=int, nargs='+', default=[2, 3, 4])
+    parser.add_argument('--min-confidence', type=float, default=0.6)
+    parser.add_argument('--no-adaptive', action='store_true')
+    parser.add_argument('--max-frames', type=int)
+    parser.add_argument('--report', help="Simpan laporan sebagai JSON.")
+    parser.add_argument('--config', default='config.json')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    lanes = lane_configs(config)
+    lane = next((lane for lane in lanes if lane['id'] == args.lane), lanes[0]) if args.lane else lanes[0]
+    video_path = args.video or lane['replay']['overhead']
+    roi = InferenceROI.from_config(lane.get('inference_roi', {}).get('overhead'))
+
+    import torch
+    backend = config.get('inference_backend', {})
+    model = load_detector(config['model_paths']['overhead'], backend.get('type', 'torch'),
+                          'cuda' if torch.cuda.is_available() else 'cpu', int8=backend.get('int8', False))
+
+    print(f"🎞️ Mendeteksi semua frame '{video_path}' (lajur {lane['id']})...")
+    cached, timestamps, inference_seconds = detect_all_frames(model, video_path, roi, args.max_frames)
+    if not cached:
+        raise SystemExit("❌ Rekaman kosong")
+    print(f"   {len(cached)} frame, rata-rata {inference_seconds / len(cached) * 1000:.1f} ms/inferensi")
+
+    reference, reference_runs = simulate(cached, timestamps, lane['line_crossing_detector'], every=1)
+    reports = []
+    for every in args.every:
+        candidate, runs = simulate(cached, timestamps, lane['line_crossing_detector'], every,
+                                   args.min_confidence, not args.no_adaptive)
+        report = {'every_k_frames': every, 'adaptive': not args.no_adaptive,
+                  'detector_runs': runs, 'detector_run_ratio': runs / reference_runs,
+                  **compare_counts(reference, candidate)}
+        reports.append(report)
+        print(f"\n=== k = {every} ({'adaptif' if report['adaptive'] else 'tetap'}) ===")
+        print(f"YOLO dijalankan  : {runs}/{reference_runs} frame ({report['detector_run_ratio'] * 100:.1f}%)")
+        print(f"Kendaraan        : {report['vehicles_interpolated']} (penuh: {report['vehicles_full_rate']})")
+        print(f"Total gandar     : {report['axles_interpolated']} (penuh: {report['axles_full_rate']})")
+        print(f"Gandar identik   : {report['vehicles_with_identical_axle_count']}/"
+              f"{min(report['vehicles_full_rate'], report['vehicles_interpolated'])} kendaraan")
+        for mismatch in report['mismatches']:
+            print(f"   ⚠️ Kendaraan #{mismatch['vehicle']}: {mismatch['full_rate']} → {mismatch['interpolated']} gandar")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'video': video_path, 'lane': lane['id'], 'frames': len(cached), 'results': reports}, f, indent=2)
+        print(f"\n💾 Laporan disimpan ke '{args.report}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+from collections import OrderedDict
+
+from expiry import ExpiryHeap
+
+
+class VehicleIndex:
+    """
+    Indeks status untuk VehicleQueue, supaya loop frontal tidak perlu mengurutkan
+    dan memindai seluruh dict kendaraan:
+
+    - `waiting`: FIFO id kendaraan berstatus counted_and_waiting (urutan masuk
+      antrean = urutan id), ambil/hapus O(1).
+    - `expiry`: heap (deadline, kendaraan, alasan) untuk kendaraan yang boleh
+      dibuang dari memori (completed, ghost). Entri yang sudah tidak berlaku
+      dibuang saat di-pop (lazy deletion), bukan dicari di heap.
+
+    Tidak memakai lock sendiri; pemanggil memegang VehicleQueue.lock.
+    """
+    def __init__(self):
+        self.waiting = OrderedDict()
+        self.expiry = ExpiryHeap()
+
+    def enqueue_waiting(self, vehicle_id):
+        self.waiting[vehicle_id] = None
+
+    def discard_waiting(self, vehicle_id):
+        self.waiting.pop(vehicle_id, None)
+
+    def first_waiting(self):
+        return next(iter(self.waiting), None)
+
+    def waiting_count(self):
+        return len(self.waiting)
+
+    def schedule_expiry(self, deadline, vehicle, reason):
+        self.expiry.schedule(deadline, (vehicle, reason))
+
+    def next_deadline(self):
+        return self.expiry.next_deadline()
+
+    def pop_due(self, now):
+        """Ambil semua entri expiry dengan deadline <= now: [(kendaraan, alasan)]."""
+        return self.expiry.pop_due(now)
+
+    def clear(self):
+        self.waiting.clear()
+        self.expiry.clear()
@@ -0,0 +1,318 @@
+import cv2
+import numpy as np
+import threading
+import time
+from collections import namedtuple
+from threading import Lock
+from clock import SystemClock
+from frame_pool import FrameBufferPool
+from logs import get_logger
+
+log = get_logger()
+
+
+FramePacket = namedtuple('FramePacket', ['image', 'seq', 'timestamp'])
+
+
+class OptimizedVideoStream:
+    """
+    Membaca stream RTSP di thread terpisah. Setiap frame diberi nomor urut
+    (seq) dan waktu tangkap; konsumen menunggu frame yang lebih baru lewat
+    read_next() sehingga inferensi tidak pernah diulang pada frame yang sama.
+
+    Frame di-decode ke buffer FrameBufferPool. read_next() menyerahkan buffer
+    itu ke (satu) konsumen tanpa salinan; konsumen wajib memanggil release().
+
+    Stale (is_stale) hanya berarti tidak ada frame baru selama stale_after
+    detik. Gambar yang hampir tidak berubah (selisih rata-rata sampel di bawah
+    frozen_epsilon) selama frozen_after detik hanya menandai `frozen` dan memicu
+    sambung ulang; deteksi tetap berjalan, karena lajur kosong di malam hari
+    juga menghasilkan gambar yang nyaris sama.
+    """
+    def __init__(self, src=0, clock=None, metrics=None, name='camera', stale_after=3.0, frozen_after=60.0,
+                 frozen_epsilon=0.5):
+        self.src = src
+        self.stream = self._open()
+        self.clock = clock or SystemClock()
+        self.metrics = metrics
+        self.name = name
+        self.stale_after = stale_after
+        self.frozen_after = frozen_after
+        self.frozen_epsilon = frozen_epsilon
+        self.frame = None
+        self.seq = -1
+        self.frame_time = None
+        self.frame_fresh = False
+        self.last_sample = None
+        self.unchanged_since = None
+        self.frozen = False
+        self.reconnect_requested = False
+        self.stopped = False
+        self.finished = False
+        self.lock = Lock()
+        self.new_frame = threading.Condition(self.lock)
+        self.pool = FrameBufferPool()
+        self.grabbed, frame = self.pool.read_from(self.stream)
+        if frame is not None:
+            self._publish(frame)
+
+    def _open(self):
+        stream = cv2.VideoCapture(self.src, cv2.CAP_FFMPEG)
+        stream.set(cv2.CAP_PROP_BUFFERSIZE, 2)
+        stream.set(cv2.CAP_PROP_FPS, 25)
+        return stream
+
+    def start(self):
+        threading.Thread(target=self.update, daemon=True).start()
+        return self
+
+    def _reconnect(self):
+        log.warning("🔄 Menyambung ulang stream yang membeku", rate_limit=False, camera=self.name)
+        self.reconnect_requested = False
+        self.stream.release()
+        self.stream = self._open()
+        if self.metrics:
+            self.metrics.increment(f'{self.name}.frozen_reconnects')
+
+    def update(self):
+        while not self.stopped:
+            if self.reconnect_requested:
+                self._reconnect()
+            decode_start = time.perf_counter()
+            grabbed, frame = self.pool.read_from(self.stream)
+            if not grabbed:
+                time.sleep(0.02)
+                continue
+            if frame is None:
+                if self.metrics:
+                    self.metrics.increment(f'{self.name}.frames_dropped')
+                continue
+            if self.metrics:
+                self.metrics.observe_stage(self.name, 'decode', time.perf_counter() - decode_start)
+            self._publish(frame)
+
+    def _publish(self, frame):
+        now = self.clock.time()
+        # Sampel jarang (salinan: buffer frame dipakai ulang oleh pool) cukup untuk mengenali feed yang membeku.
+        sample = np.ascontiguousarray(frame[::32, ::32])
+        unchanged = self.last_sample is not None and cv2.absdiff(sample, self.last_sample).mean() < self.frozen_epsilon
+        self.last_sample = sample
+        with self.new_frame:
+            if unchanged:
+                if self.unchanged_since is None:
+                    self.unchanged_since = now
+                elif now - self.unchanged_since > self.frozen_after:
+                    if not self.frozen:
+                        self.frozen = True
+                        log.warning("⚠️ Stream tampak membeku: gambar tidak berubah", rate_limit=False,
+                                    camera=self.name, seconds=self.frozen_after)
+                    # Sambung ulang paling sering sekali per frozen_after selama gambar tetap sama.
+                    self.reconnect_requested = True
+                    self.unchanged_since = now
+                if self.metrics:
+                    self.metrics.increment(f'{self.name}.frames_unchanged')
+            else:
+                if self.frozen:
+                    log.info("✅ Stream kembali bergerak", camera=self.name)
+                self.unchanged_since = None
+                self.frozen = False
+
+            if self.frame_fresh:
+                if self.metrics:
+                    self.metrics.increment(f'{self.name}.frames_dropped')
+                self.pool.release(self.frame)
+            self.frame = frame
+            self.seq += 1
+            self.frame_time = now
+            self.frame_fresh = True
+            self.new_frame.notify_all()
+
+    def read_next(self, last_seq=-1, timeout=1.0):
+        """Tunggu frame dengan seq > last_seq; None bila timeout atau stream berhenti."""
+        with self.new_frame:
+            if not self.new_frame.wait_for(lambda: self.seq > last_seq or self.stopped, timeout=timeout):
+                return None
+            if self.frame is None or self.seq <= last_seq:
+                return None
+            if self.metrics:
+                self.metrics.increment(f'{self.name}.frames_read')
+            packet = FramePacket(self.frame, self.seq, self.frame_time)
+            self.frame = None
+            self.frame_fresh = False
+            return packet
+
+    def release(self, image):
+        """Kembalikan buffer frame dari read_next() ke pool."""
+        self.pool.release(image)
+
+    def is_stale(self):
+        """Tidak ada frame baru selama stale_after detik (status `frozen` tidak dihitung)."""
+        with self.lock:
+            if self.frame_time is None:
+                return True
+            return self.clock.time() - self.frame_time > self.stale_after
+
+    def stop(self):
+        self.stopped = True
+        with self.new_frame:
+            self.new_frame.notify_all()
+        self.stream.release()
+
+
+class ReplayVideoStream:
+    """
+    Pengganti OptimizedVideoStream yang membaca file video rekaman.
+    Waktu media tiap frame dilaporkan ke ReplayClock sehingga logika
+    overhead/frontal bisa diuji tanpa jaringan kamera.
+    """
+    def __init__(self, path, clock, name, metrics=None, clock_name=None):
+        self.path = path
+        self.metrics = metrics
+        self.clock = clock
+        self.name = name
+        # Nama sumber di ReplayClock harus unik bila beberapa lajur berbagi satu jam.
+        self.clock_name = clock_name or name
+        self.stream = cv2.VideoCapture(path)
+        if not self.stream.isOpened():
+            raise IOError(f"File replay '{path}' tidak dapat dibuka")
+        fps = self.stream.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if fps and fps > 0 else 25.0
+        self.frame_interval = 1.0 / self.fps
+        self.pool = FrameBufferPool()
+        self.frame = None
+        self.frame_time = None
+        self.frozen = False
+        self.frame_index = -1
+        self.frames_decoded = 0
+        self.frames_delivered = 0
+        self.frames_skipped = 0
+        self.stopped = False
+        self.finished = False
+        self.lock = Lock()
+        self.frame_ready = threading.Condition(self.lock)
+        self.frame_taken = True
+        self.stop_event = threading.Event()
+        self.wall_start = None
+        self.wall_end = None
+        self.clock.register(self.clock_name)
+
+    def start(self):
+        self.wall_start = time.perf_counter()
+        self.clock.start()
+        threading.Thread(target=self.update, daemon=True).start()
+        return self
+
+    def update(self):
+        index = 0
+        while not self.stopped:
+            media_time = index * self.frame_interval
+
+            if self.clock.is_max_speed:
+                if not self.clock.wait_for_turn(self.clock_name, media_time, self.frame_interval, self.stop_event):
+                    break
+                with self.frame_ready:
+                    while not self.frame_taken and not self.stopped:
+                        self.frame_ready.wait(timeout=0.1)
+            else:
+                lag = (self.clock.time() - self.clock.origin) - media_time
+                # Tertinggal lebih dari satu frame: buang frame seperti kamera live.
+                while lag > self.frame_interval:
+                    if not self.stream.grab():
+                        self._finish()
+                        return
+                    self.frames_skipped += 1
+                    if self.metrics:
+                        self.metrics.increment(f'{self.name}.frames_dropped')
+                    index += 1
+                    media_time = index * self.frame_interval
+                    lag -= self.frame_interval
+                if lag < 0:
+                    self.clock.sleep(-lag)
+
+            decode_start = time.perf_counter()
+            grabbed, frame = self.pool.read_from(self.stream)
+            if not grabbed:
+                break
+            if frame is None:
+                self.frames_skipped += 1
+                if self.metrics:
+                    self.metrics.increment(f'{self.name}.frames_dropped')
+                index += 1
+                continue
+            self.frames_decoded += 1
+            if self.metrics:
+                self.metrics.observe_stage(self.name, 'decode', time.perf_counter() - decode_start)
+
+            with self.frame_ready:
+                if not self.frame_taken:
+                    if self.metrics:
+                        self.metrics.increment(f'{self.name}.frames_dropped')
+                    self.pool.release(self.frame)
+                self.frame = frame
+                self.frame_time = media_time
+                self.frame_index = index
+                self.frame_taken = False
+                self.frame_ready.notify_all()
+            index += 1
+
+        self._finish()
+
+    def _finish(self):
+        with self.frame_ready:
+            if self.clock.is_max_speed:
+                while not self.frame_taken and not self.stopped:
+                    self.frame_ready.wait(timeout=0.1)
+            self.finished = True
+            if not self.frame_taken:
+                self.pool.release(self.frame)
+            self.frame = None
+            self.wall_end = time.perf_counter()
+            self.frame_ready.notify_all()
+        self.clock.unregister(self.clock_name)
+
+    def read_next(self, last_seq=-1, timeout=1.0):
+        deadline = time.perf_counter() + timeout
+        with self.frame_ready:
+            # Pada kecepatan maksimum setiap frame diproses tepat satu kali.
+            while (self.frame is None or self.frame_index <= last_seq) and not self.finished and not self.stopped:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return None
+                self.frame_ready.wait(timeout=remaining)
+            if self.frame is None or self.frame_index <= last_seq:
+                return None
+            if self.metrics:
+                self.metrics.increment(f'{self.name}.frames_read')
+            packet = FramePacket(self.frame, self.frame_index, self.clock.origin + self.frame_time)
+            media_time = self.frame_time
+            self.frame = None
+            self.frame_taken = True
+            self.frames_delivered += 1
+            self.frame_ready.notify_all()
+        self.clock.advance(self.clock_name, media_time)
+        return packet
+
+    def release(self, image):
+        self.pool.release(image)
+
+    def is_stale(self):
+        return False
+
+    def summary(self):
+        end = self.wall_end if self.wall_end is not None else time.perf_counter()
+        elapsed = end - self.wall_start if self.wall_start is not None else 0.0
+        return {
+            'source': self.path,
+            'frames_decoded': self.frames_decoded,
+            'frames_delivered': self.frames_delivered,
+            'frames_skipped': self.frames_skipped,
+            'wall_seconds': round(elapsed, 2),
+            'processing_fps': round(self.frames_delivered / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+    def stop(self):
+        self.stopped = True
+        self.stop_event.set()
+        with self.frame_ready:
+            self.frame_ready.notify_all()
+        self.stream.release()
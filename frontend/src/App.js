@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { io } from 'socket.io-client';
 import VideoStream from './videoStream';
 import AnalysisPanel from './analysisPanel';
@@ -16,6 +16,7 @@ function App() {
 
     const [overheadStatus, setOverheadStatus] = useState('pending');
     const [frontalStatus, setFrontalStatus] = useState('pending');
+    const frameUrls = useRef({ overhead: null, frontal: null });
     
     const resetAnalysisData = () => {
         setAxleCount(0);
@@ -25,11 +26,15 @@ function App() {
     };
     
     useEffect(() => {
-        const newSocket = io('http://127.0.0.1:5000');
+        // ?lane=<id> memilih lajur (namespace /lanes/<id>); tanpa parameter, lajur pertama.
+        const lane = new URLSearchParams(window.location.search).get('lane');
+        const newSocket = io(lane ? `http://127.0.0.1:5000/lanes/${encodeURIComponent(lane)}` : 'http://127.0.0.1:5000');
         setSocket(newSocket);
 
         newSocket.on('connect', () => {
             console.log('Terhubung ke server backend!');
+            // Dengan ack, server tidak mengirim frame baru sebelum frame sebelumnya ditampilkan.
+            newSocket.emit('subscribe_stream', { cameras: ['overhead', 'frontal'], max_fps: 15, ack: true });
         });
 
         newSocket.on('disconnect', () => {
@@ -38,16 +43,42 @@ function App() {
             setFrontalStatus('disconnected');
         });
 
-        newSocket.on('overhead_stream', data => {
-            setOverheadFrame(data.image_data);
+        // Mode biner: JPEG mentah datang sebagai ArrayBuffer, ditampilkan lewat object URL.
+        const showBinaryFrame = (camera, setFrame) => (buffer, ack) => {
+            const url = URL.createObjectURL(new Blob([buffer], { type: 'image/jpeg' }));
+            if (frameUrls.current[camera]) {
+                URL.revokeObjectURL(frameUrls.current[camera]);
+            }
+            frameUrls.current[camera] = url;
+            setFrame(url);
+            if (ack) {
+                requestAnimationFrame(() => ack());
+            }
+        };
+
+        newSocket.on('overhead_frame', showBinaryFrame('overhead', setOverheadFrame));
+        newSocket.on('frontal_frame', showBinaryFrame('frontal', setFrontalFrame));
+
+        newSocket.on('overhead_stream', (data, ack) => {
+            if (data.image_data) {
+                setOverheadFrame(`data:image/jpeg;base64,${data.image_data}`);
+            }
+            if (ack) {
+                requestAnimationFrame(() => ack());
+            }
             setOverheadStatus(data.connection_status);
             if (data.detected_axles !== undefined) {
                 setDetectedAxles(data.detected_axles);
             }
         });
 
-        newSocket.on('frontal_stream', data => {
-            setFrontalFrame(data.image_data);
+        newSocket.on('frontal_stream', (data, ack) => {
+            if (data.image_data) {
+                setFrontalFrame(`data:image/jpeg;base64,${data.image_data}`);
+            }
+            if (ack) {
+                requestAnimationFrame(() => ack());
+            }
             setFrontalStatus(data.connection_status);
             if (data.tire_config !== undefined) {
                 setTireConfig(data.tire_config);
@@ -70,6 +101,7 @@ function App() {
         return () => {
             console.log('Memutuskan koneksi dari server backend.');
             newSocket.disconnect();
+            Object.values(frameUrls.current).forEach(url => url && URL.revokeObjectURL(url));
         };
     }, []);
 
@@ -14,6 +14,11 @@ const StatusIndicator = ({ status }) => {
             textColor = 'text-red-300';
             text = 'Terputus';
             break;
+        case 'stale':
+            bgColor = 'bg-orange-500';
+            textColor = 'text-orange-300';
+            text = 'Gambar Membeku';
+            break;
         default:
             bgColor = 'bg-yellow-500';
             textColor = 'text-yellow-300';
@@ -43,7 +48,7 @@ function VideoStream({ title, frameData, subtitle, status }) {
 		<div className="relative w-full bg-black aspect-video">
 			{frameData ? (
 			<img
-				src={`data:image/jpeg;base64,${frameData}`}
+				src={frameData}
 				alt="Video Stream"
 				className="w-full h-full object-cover"
 			/>